@@ -0,0 +1,140 @@
+"""Modulo memory."""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from src.common.compact import parse_compact
+from src.common.parser import clone_parser
+from src.common.tokenizer import get_tokenizer
+
+TEMPLATES = (
+    "v{i} = {i} + {j} * (v{k} - 3) / 2",
+    "if (v{i} > {j}) {{ w = f(v{i}, {k}) }} else {{ w = -{j} }}",
+    "while (v{i} < {j}) {{ v{i} = v{i} + 1 }}",
+    "print(w + {k} ^ 2)",
+)
+
+
+def generate(statements):
+    """
+    Generates a script with a function definition followed by assignments,
+    conditionals, loops and prints.
+
+    :param statements: The number of statements after the definition.
+    :return: The source text.
+    """
+    lines = ["def f(a, b) {", "  c = a * b + 2", "  return c - 1", "}"]
+    for index in range(statements):
+        template = TEMPLATES[index % len(TEMPLATES)]
+        lines.append(template.format(i=index % 50, j=index, k=(index + 1) % 50))
+    return "\n".join(lines) + "\n"
+
+
+def parse_tuples(source):
+    """
+    Parses a source text into the tuple AST, with the same Tokenizer as
+    `parse_compact`, so that the parse times only differ by the AST built.
+
+    :param source: The source text.
+    :return: The tuple AST.
+    """
+    scanner = get_tokenizer().clone()
+    scanner.lineno = 1
+    return clone_parser().parse(source, lexer=scanner)
+
+
+def retained(parse, source):
+    """
+    Parses a source text and measures the memory held by the result.
+
+    The parse is timed separately, since tracing allocations slows it down.
+
+    :param parse: The parsing function.
+    :param source: The source text.
+    :return: A tuple with the result, the retained size in bytes and the parse time
+             in seconds.
+    """
+    start = time.perf_counter()
+    parse(source)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    result = parse(source)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def read_scripts(paths):
+    """
+    Reads script files.
+
+    :param paths: The paths of the files.
+    :return: A list of (path, source text) tuples.
+    """
+    scripts = []
+    for file_path in paths:
+        with open(file_path, "r", encoding="utf-8") as file:
+            scripts.append((file_path, file.read()))
+    return scripts
+
+
+def measure(name, source):
+    """
+    Compares the tuple AST and the CompactAst of a source text.
+
+    :param name: The name of the input.
+    :param source: The source text.
+    :return: A dictionary with the sizes, in bytes, and the parse times, in seconds.
+             The parser is built beforehand, so that its tables are not counted.
+    """
+    parse_tuples("0")
+    tuples, tuple_bytes, tuple_time = retained(parse_tuples, source)
+    del tuples
+    compact, compact_bytes, compact_time = retained(parse_compact, source)
+    return {
+        "input": name,
+        "source_bytes": len(source.encode("utf-8")),
+        "nodes": len(compact),
+        "tuple_bytes": tuple_bytes,
+        "compact_bytes": compact_bytes,
+        "ratio": round(tuple_bytes / max(compact_bytes, 1), 2),
+        "tuple_parse": tuple_time,
+        "compact_parse": compact_time,
+        "equal": compact.to_tuple() == parse_tuples(source),
+    }
+
+
+def main(argv=None):
+    """
+    Runs the memory benchmark and prints the results as JSON.
+
+    :param argv: Optional list of command line arguments.
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Compare the memory used by the tuple AST and the compact AST."
+    )
+    arg_parser.add_argument("files", nargs="*", help="scripts to be parsed")
+    arg_parser.add_argument(
+        "--statements",
+        type=int,
+        default=50000,
+        help="statements of the generated script, used when no file is given",
+    )
+    args = arg_parser.parse_args(argv)
+
+    inputs = read_scripts(args.files)
+    if not inputs:
+        inputs.append((f"generated:{args.statements}", generate(args.statements)))
+
+    print(json.dumps([measure(name, source) for name, source in inputs], indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,67 @@
+"""Modulo startup."""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+PROBE = """
+import time
+start = time.perf_counter()
+from src.common import Interpreter
+imported = time.perf_counter()
+Interpreter().run("1 + 2")
+done = time.perf_counter()
+print(imported - start, done - start)
+"""
+
+
+def measure(runs):
+    """
+    Starts fresh interpreters and measures the latency from the import of the package
+    to the result of a first expression.
+
+    :param runs: The number of processes to start.
+    :return: A dictionary with the median and minimum timings, in seconds.
+    """
+    imports, first_results, processes = [], [], []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        processes.append(time.perf_counter() - start)
+        imported, first_result = map(float, completed.stdout.split())
+        imports.append(imported)
+        first_results.append(first_result)
+
+    return {
+        name: {"median": statistics.median(values), "min": min(values)}
+        for name, values in (
+            ("import", imports),
+            ("import_to_first_result", first_results),
+            ("process", processes),
+        )
+    }
+
+
+def main(argv=None):
+    """
+    Runs the startup benchmark and prints the timings as JSON.
+
+    :param argv: Optional list of command line arguments.
+    """
+    arg_parser = argparse.ArgumentParser(description="Measure the cold start latency.")
+    arg_parser.add_argument("--runs", type=int, default=10, help="number of processes")
+    args = arg_parser.parse_args(argv)
+    print(json.dumps(measure(args.runs), indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
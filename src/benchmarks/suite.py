@@ -0,0 +1,409 @@
+"""Modulo suite."""
+
+import argparse
+import json
+import sys
+import time
+
+from src.common.compiler import run_compiled
+from src.common.interpreter import eval_ast, global_functions
+from src.common.lexer import lexer
+from src.common.machine import run_stack
+from src.common.output import Diagnostics, NullSink, redirect
+from src.common.parser import clone_parser
+from src.common.profiler import Profiler, ProfilingCompiler
+
+ENGINES = {"tree": eval_ast, "compiled": run_compiled, "stack": run_stack}
+
+PHASES = ("lex", "parse", "eval")
+
+UNITS = {"lex": "tokens", "parse": "statements", "eval": "nodes"}
+
+DEFAULT_TOLERANCE = 0.25
+
+DEFAULT_REPEAT = 5
+
+CONFIRMATIONS = 3
+
+MIN_SECONDS = 0.01
+
+CALIBRATION_LOOPS = 100000
+
+
+def arithmetic(scale):
+    """
+    Generates statements made of deeply nested arithmetic expressions.
+
+    :param scale: The size multiplier of the workload.
+    :return: The source text.
+    """
+    lines = []
+    for index in range(200 * scale):
+        expression = str(index % 7 + 1)
+        for depth in range(40):
+            op = "+-*/"[depth % 4]
+            expression = f"({expression} {op} {depth % 5 + 1})"
+        lines.append(f"v{index % 10} = {expression}")
+    return "\n".join(lines) + "\n"
+
+
+def loops(scale):
+    """
+    Generates a long while loop.
+
+    :param scale: The size multiplier of the workload.
+    :return: The source text.
+    """
+    return (
+        "i = 0\n"
+        "s = 0\n"
+        f"while (i < {20000 * scale}) {{\n"
+        "  s = s + i * 2 - 1\n"
+        "  i = i + 1\n"
+        "}\n"
+    )
+
+
+def recursion(scale):
+    """
+    Generates recursive function calls.
+
+    :param scale: The size multiplier of the workload.
+    :return: The source text.
+    """
+    return (
+        "def fib(n) {\n"
+        "  if (n < 2) { return n }\n"
+        "  return fib(n - 1) + fib(n - 2)\n"
+        "}\n"
+        "def total(n) {\n"
+        "  if (n < 1) { return 0 }\n"
+        "  return n + total(n - 1)\n"
+        "}\n"
+        f"a = fib({15 + scale})\n"
+        "b = total(60)\n"
+    )
+
+
+def math_calls(scale):
+    """
+    Generates a loop calling the math functions.
+
+    :param scale: The size multiplier of the workload.
+    :return: The source text.
+    """
+    return (
+        "i = 1\n"
+        f"while (i < {5000 * scale}) {{\n"
+        "  y = sqrt(abs(sin(i)) + 1) + log(i + 1) + cos(i) * exp(0 - i / 1000)\n"
+        "  i = i + 1\n"
+        "}\n"
+    )
+
+
+def flat(scale):
+    """
+    Generates a very large script of simple top-level statements.
+
+    :param scale: The size multiplier of the workload.
+    :return: The source text.
+    """
+    lines = ["v0 = 1"]
+    for index in range(1, 20000 * scale):
+        previous = f"v{(index - 1) % 100}"
+        lines.append(f"v{index % 100} = {previous} * 2 - {previous} + {index % 9}")
+    return "\n".join(lines) + "\n"
+
+
+WORKLOADS = {
+    "arithmetic": arithmetic,
+    "loops": loops,
+    "recursion": recursion,
+    "math": math_calls,
+    "flat": flat,
+}
+
+
+def tokenize(source):
+    """
+    Runs the lexer over a source text.
+
+    :param source: The source text.
+    :return: The number of tokens.
+    """
+    scanner = lexer.clone()
+    scanner.lineno = 1
+    scanner.input(source)
+    count = 0
+    while scanner.token() is not None:
+        count += 1
+    return count
+
+
+def parse(source):
+    """
+    Parses a source text.
+
+    :param source: The source text.
+    :return: The tuple AST.
+    """
+    scanner = lexer.clone()
+    scanner.lineno = 1
+    return clone_parser().parse(source, lexer=scanner)
+
+
+def evaluate(ast, engine):
+    """
+    Evaluates an AST in a fresh environment, with an empty function table, the
+    printed output discarded by a NullSink and the errors kept apart, so that no
+    output is formatted or written while timing.
+
+    :param ast: The tuple AST.
+    :param engine: The evaluation function.
+    """
+    global_functions.clear()
+    with redirect(NullSink(), Diagnostics()):
+        engine(ast, {})
+
+
+def count_nodes(ast):
+    """
+    Counts the node evaluations of a run of an AST, with the profiler.
+
+    :param ast: The tuple AST.
+    :return: The number of evaluated operators, variables and literals.
+    """
+    profiler = Profiler()
+    compiled = ProfilingCompiler(profiler, functions={}).compile(ast)
+    with redirect(NullSink(), Diagnostics()):
+        profiler.run(compiled, {})
+    return sum(count for op, count in profiler.opcodes.items() if op != "program")
+
+
+def calibrate():
+    """
+    Times a fixed pure-Python loop, which gives the speed of the machine at that
+    moment rather than the speed of the interpreter.
+
+    :return: The time, in seconds.
+    """
+    start = time.perf_counter()
+    total = 0
+    for index in range(CALIBRATION_LOOPS):
+        total += index * 2 % 7
+    return time.perf_counter() - start
+
+
+def best_time(function, repeat):
+    """
+    Runs a function several times and returns the best time, both in seconds and
+    relative to the calibration loop run just before and after it. On a shared
+    machine, whose speed changes over seconds, the relative time varies much less
+    between runs than the time in seconds.
+
+    :param function: The function without arguments.
+    :param repeat: The number of runs.
+    :return: A tuple with the best time, in seconds, and the best relative time.
+    """
+    best = relative = None
+    for _ in range(repeat):
+        before = calibrate()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        ratio = elapsed / ((before + calibrate()) / 2)
+        best = elapsed if best is None else min(best, elapsed)
+        relative = ratio if relative is None else min(relative, ratio)
+    return best, relative
+
+
+def measure(name, scale=1, repeat=DEFAULT_REPEAT, engine="tree"):
+    """
+    Times the lexer, the parser and the evaluation of a workload separately.
+
+    :param name: The name of a workload of WORKLOADS.
+    :param scale: The size multiplier of the workload.
+    :param repeat: The number of runs of each phase; the best time is kept.
+    :param engine: The name of the evaluation engine of ENGINES.
+    :return: A dictionary with the time, the time relative to the calibration loop,
+             the amount of work and the throughput of each phase.
+    """
+    source = WORKLOADS[name](scale)
+    ast = parse(source)
+    amounts = {
+        "lex": tokenize(source),
+        "parse": len(ast[1]),
+        "eval": count_nodes(ast),
+    }
+    times = {
+        "lex": best_time(lambda: tokenize(source), repeat),
+        "parse": best_time(lambda: parse(source), repeat),
+        "eval": best_time(lambda: evaluate(ast, ENGINES[engine]), repeat),
+    }
+    return {
+        phase: {
+            "seconds": times[phase][0],
+            "relative_time": times[phase][1],
+            UNITS[phase]: amounts[phase],
+            f"{UNITS[phase]}_per_second": amounts[phase] / max(times[phase][0], 1e-9),
+        }
+        for phase in PHASES
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares the throughput of every phase with a baseline, measured as the time
+    relative to the calibration loop when both results have it. Phases that took
+    less than MIN_SECONDS in the baseline are too short to be compared reliably and
+    are skipped.
+
+    :param results: The results of `run_suite`.
+    :param baseline: Results of an earlier run of `run_suite`.
+    :param tolerance: The relative slowdown tolerated before a phase is flagged.
+    :return: A list of regressions, as dictionaries.
+    """
+    regressions = []
+    for name, phases in results["workloads"].items():
+        for phase, stats in phases.items():
+            key = f"{UNITS[phase]}_per_second"
+            try:
+                reference = baseline["workloads"][name][phase][key]
+            except KeyError:
+                continue
+            previous = baseline["workloads"][name][phase]
+            if previous["seconds"] < MIN_SECONDS:
+                continue
+            if "relative_time" in previous:
+                ratio = previous["relative_time"] / max(stats["relative_time"], 1e-9)
+            else:
+                ratio = stats[key] / reference if reference else 1.0
+            if ratio < 1 - tolerance:
+                regressions.append(
+                    {
+                        "workload": name,
+                        "phase": phase,
+                        "baseline": reference,
+                        "current": stats[key],
+                        "ratio": round(ratio, 3),
+                    }
+                )
+    return regressions
+
+
+def confirm(results, regressions, repeat=DEFAULT_REPEAT):
+    """
+    Measures the workloads of suspected regressions again and keeps, for every
+    phase, the better of the two measures, so that a regression is only reported
+    when it persists.
+
+    :param results: The results of `run_suite`, updated in place.
+    :param regressions: The regressions found by `compare`.
+    :param repeat: The number of runs of each phase.
+    """
+    for name in dict.fromkeys(regression["workload"] for regression in regressions):
+        retry = measure(name, results["scale"], repeat, results["engine"])
+        for phase, stats in results["workloads"][name].items():
+            if retry[phase]["relative_time"] < stats["relative_time"]:
+                stats.update(retry[phase])
+
+
+def run_suite(names=None, scale=1, repeat=DEFAULT_REPEAT, engine="tree"):
+    """
+    Runs the benchmark workloads.
+
+    :param names: Optional list of workload names. Defaults to every workload.
+    :param scale: The size multiplier of the workloads.
+    :param repeat: The number of runs of each phase; the best time is kept.
+    :param engine: The name of the evaluation engine of ENGINES.
+    :return: A dictionary with the settings and the results of every workload.
+    """
+    names = list(WORKLOADS) if not names else names
+    return {
+        "engine": engine,
+        "scale": scale,
+        "repeat": repeat,
+        "python": sys.version.split()[0],
+        "workloads": {
+            name: measure(name, scale=scale, repeat=repeat, engine=engine)
+            for name in names
+        },
+    }
+
+
+def main(argv=None):
+    """
+    Runs the benchmark suite, prints or writes the results as JSON and compares
+    them with a baseline. Suspected regressions are measured again, up to
+    CONFIRMATIONS times, since the speed of a shared machine can drop for seconds,
+    and the program exits with status 1 when one persists.
+
+    :param argv: Optional list of command line arguments.
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Measure the lexer, parser and evaluator on several workloads."
+    )
+    arg_parser.add_argument(
+        "workloads", nargs="*", help=f"workloads to run: {', '.join(WORKLOADS)}"
+    )
+    arg_parser.add_argument("--scale", type=int, default=1, help="size multiplier")
+    arg_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="runs per phase, of which the best is kept",
+    )
+    arg_parser.add_argument(
+        "--engine", choices=sorted(ENGINES), default="tree", help="evaluation engine"
+    )
+    arg_parser.add_argument("--output", metavar="FILE", help="write the results")
+    arg_parser.add_argument(
+        "--baseline", metavar="FILE", help="results to compare the throughput with"
+    )
+    arg_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="relative slowdown tolerated before a regression is reported",
+    )
+    args = arg_parser.parse_args(argv)
+    unknown = [name for name in args.workloads if name not in WORKLOADS]
+    if unknown:
+        arg_parser.error(f"unknown workloads: {', '.join(unknown)}")
+
+    results = run_suite(args.workloads, args.scale, args.repeat, args.engine)
+    regressions = []
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        for setting in ("engine", "scale"):
+            if baseline.get(setting) != results[setting]:
+                print(
+                    f"Warning: the baseline was measured with {setting} "
+                    f"{baseline.get(setting)!r}, not {results[setting]!r}."
+                )
+        regressions = compare(results, baseline, args.tolerance)
+        for _ in range(CONFIRMATIONS):
+            if not regressions:
+                break
+            confirm(results, regressions, args.repeat)
+            regressions = compare(results, baseline, args.tolerance)
+
+    text = json.dumps(results, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+
+    for regression in regressions:
+        print(
+            f"Regression: {regression['workload']} {regression['phase']} at "
+            f"{regression['ratio']:.0%} of the baseline throughput."
+        )
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
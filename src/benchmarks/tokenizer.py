@@ -0,0 +1,141 @@
+"""Modulo tokenizer."""
+
+import argparse
+import functools
+import json
+import sys
+import time
+
+from src.benchmarks.memory import read_scripts
+from src.benchmarks.suite import WORKLOADS
+from src.common.lexer import lexer
+from src.common.parser import clone_parser
+from src.common.tokenizer import get_tokenizer
+
+COMMENTED = "// running total\nt = t + 1 /* step */\n"
+
+
+def commented(scale):
+    """
+    Generates a script where half of the lines are comments.
+
+    :param scale: The size multiplier of the workload.
+    :return: The source text.
+    """
+    return "t = 0\n" + COMMENTED * 10000 * scale
+
+
+INPUTS = {"flat": WORKLOADS["flat"], "commented": commented}
+
+SCANNERS = {"ply": lexer, "fast": get_tokenizer}
+
+
+def new_scanner(name):
+    """
+    Creates a scanner at line 1.
+
+    :param name: The name of a scanner of SCANNERS.
+    :return: A clone of the PLY lexer or of the Tokenizer.
+    """
+    base = SCANNERS[name]
+    scanner = (base() if callable(base) else base).clone()
+    scanner.lineno = 1
+    return scanner
+
+
+def tokenize(name, source):
+    """
+    Reads every token of a source text.
+
+    :param name: The name of a scanner of SCANNERS.
+    :param source: The source text.
+    :return: The tokens, as (type, value, lineno, lexpos) tuples.
+    """
+    scanner = new_scanner(name)
+    scanner.input(source)
+    return [
+        (token.type, token.value, token.lineno, token.lexpos)
+        for token in iter(scanner.token, None)
+    ]
+
+
+def parse(name, source):
+    """
+    Parses a source text with the tokens of a scanner.
+
+    :param name: The name of a scanner of SCANNERS.
+    :param source: The source text.
+    :return: The tuple AST.
+    """
+    return clone_parser().parse(source, lexer=new_scanner(name))
+
+
+def best_time(function, repeat):
+    """
+    Runs a function several times and returns the best time.
+
+    :param function: The function without arguments.
+    :param repeat: The number of runs.
+    :return: The best time, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def measure(name, source, repeat=3):
+    """
+    Compares the throughput of the PLY lexer and of the Tokenizer on a source text,
+    alone and feeding the parser.
+
+    :param name: The name of the input.
+    :param source: The source text.
+    :param repeat: The number of runs of each measure; the best time is kept.
+    :return: A dictionary with the throughputs, in MB/s, and the speedups.
+    """
+    megabytes = len(source.encode("utf-8")) / 1_000_000
+    result = {"input": name, "megabytes": round(megabytes, 3)}
+
+    for scanner in SCANNERS:
+        lex_time = best_time(functools.partial(tokenize, scanner, source), repeat)
+        parse_time = best_time(functools.partial(parse, scanner, source), repeat)
+        result[f"{scanner}_lex_mb_per_second"] = megabytes / lex_time
+        result[f"{scanner}_parse_mb_per_second"] = megabytes / parse_time
+
+    for phase in ("lex", "parse"):
+        result[f"{phase}_speedup"] = round(
+            result[f"fast_{phase}_mb_per_second"]
+            / result[f"ply_{phase}_mb_per_second"],
+            2,
+        )
+    result["equal"] = tokenize("ply", source) == tokenize("fast", source)
+    return result
+
+
+def main(argv=None):
+    """
+    Runs the tokenizer comparison and prints the results as JSON.
+
+    :param argv: Optional list of command line arguments.
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Compare the PLY lexer with the regex Tokenizer."
+    )
+    arg_parser.add_argument("files", nargs="*", help="scripts to be tokenized")
+    arg_parser.add_argument("--scale", type=int, default=1, help="size multiplier")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="runs per measure")
+    args = arg_parser.parse_args(argv)
+
+    inputs = read_scripts(args.files)
+    if not inputs:
+        inputs = [(name, generate(args.scale)) for name, generate in INPUTS.items()]
+
+    results = [measure(name, source, args.repeat) for name, source in inputs]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,5 +1,78 @@
 from .parser import parser
 from .lexer import lexer
+from .tokenizer import Tokenizer
 from .interpreter import print_ast, eval_ast
+from .compiler import Compiler, compile_ast, run_compiled
+from .budget import Budget, BudgetExceeded, run_budgeted
+from .machine import Machine, run_stack
+from .compact import CompactAst, parse_compact
+from .hashcons import HashConsBuilder, parse_shared
+from .profiler import Profiler, profile_source
+from .reactive import Reactive
+from .parallel import Parallel
+from .optimizer import Optimizer, optimize_ast
+from .specialize import TypeSpecializer, infer_types
+from .output import (
+    BufferedSink,
+    Diagnostics,
+    ListSink,
+    NullSink,
+    StreamSink,
+    capture,
+    redirect,
+)
+from .cache import ParseCache, parse_cached
+from .session import Evaluation, Interpreter, InterpreterPool, evaluate_script
+from .snapshot import SnapshotError, load_snapshot, save_snapshot, warm_start
+from .stream import execute_stream, stream_file
+from .vectorize import Vectorizer, VectorizeError, eval_vectorized
 
-__all__ = ["parser", "lexer", "print_ast", "eval_ast"]
+__all__ = [
+    "parser",
+    "lexer",
+    "Tokenizer",
+    "print_ast",
+    "eval_ast",
+    "Compiler",
+    "compile_ast",
+    "run_compiled",
+    "Budget",
+    "BudgetExceeded",
+    "run_budgeted",
+    "Machine",
+    "run_stack",
+    "CompactAst",
+    "parse_compact",
+    "HashConsBuilder",
+    "parse_shared",
+    "Profiler",
+    "profile_source",
+    "Reactive",
+    "Parallel",
+    "Optimizer",
+    "optimize_ast",
+    "TypeSpecializer",
+    "infer_types",
+    "BufferedSink",
+    "Diagnostics",
+    "ListSink",
+    "NullSink",
+    "StreamSink",
+    "capture",
+    "redirect",
+    "ParseCache",
+    "parse_cached",
+    "Interpreter",
+    "InterpreterPool",
+    "Evaluation",
+    "evaluate_script",
+    "SnapshotError",
+    "load_snapshot",
+    "save_snapshot",
+    "warm_start",
+    "execute_stream",
+    "stream_file",
+    "Vectorizer",
+    "VectorizeError",
+    "eval_vectorized",
+]
@@ -0,0 +1,85 @@
+"""Modulo batch."""
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .cache import parse_cache
+from .output import NullSink
+from .session import Evaluation, evaluate_script
+
+SCRIPT_PATTERN = "*.txt"
+
+
+def collect_scripts(target):
+    """
+    Lists the scripts designated by a directory or a glob pattern.
+
+    A directory selects every `*.txt` file below it, recursively.
+
+    :param target: A directory, a file path or a glob pattern such as `examples/*.txt`.
+    :return: A sorted list of file paths.
+    """
+    if os.path.isdir(target):
+        target = os.path.join(target, "**", SCRIPT_PATTERN)
+    return sorted(
+        path for path in glob.glob(target, recursive=True) if os.path.isfile(path)
+    )
+
+
+def warm_worker():
+    """
+    Prepares a worker process, building the lexer and parser tables once so that
+    every script evaluated by the worker reuses them.
+    """
+    evaluate_script("0", jit=False, output=NullSink())
+
+
+def run_script(path, jit=True):
+    """
+    Evaluates a script file in a fresh interpreter, capturing its output and the
+    errors reported while lexing, parsing and evaluating it.
+
+    :param path: The path of the script.
+    :param jit: Whether hot functions and loops are translated to Python code.
+    :return: The evaluation as a dictionary.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            source = file.read()
+    except OSError as e:
+        return Evaluation(path, error=f"{type(e).__name__}: {e}").as_dict()
+
+    evaluation = evaluate_script(source, path, jit=jit, cache=parse_cache)
+    return evaluation.as_dict()
+
+
+def run_batch(paths, workers=None, jit=True):
+    """
+    Evaluates many scripts across a pool of worker processes.
+
+    :param paths: The paths of the scripts.
+    :param workers: The number of worker processes. Defaults to the number of CPUs.
+    :param jit: Whether hot functions and loops are translated to Python code.
+    :return: A report dictionary with one entry per script and a summary.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(paths) // (workers * 4))
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_worker) as executor:
+        scripts = list(
+            executor.map(run_script, paths, [jit] * len(paths), chunksize=chunksize)
+        )
+
+    return {
+        "scripts": scripts,
+        "summary": {
+            "scripts": len(scripts),
+            "errors": sum(1 for script in scripts if script["error"] is not None),
+            "workers": workers,
+            "cpu_time": sum(script["elapsed"] for script in scripts),
+            "wall_time": time.perf_counter() - start,
+        },
+    }
@@ -0,0 +1,303 @@
+"""Modulo budget."""
+
+import time
+
+from .compiler import Compiler
+from .interpreter import global_env
+
+CHECK_INTERVAL = 1000
+
+LIMITS = ("steps", "seconds", "depth", "int_bits")
+
+
+class BudgetExceeded(Exception):
+    """
+    Exception raised when an evaluation exceeds one of the limits of its Budget.
+    """
+
+    def __init__(self, resource, limit, used, usage):
+        """
+        Initializes a BudgetExceeded exception.
+
+        :param resource: The name of the exceeded limit, one of LIMITS.
+        :param limit: The value of the limit.
+        :param used: The amount of the resource that was requested.
+        :param usage: A dictionary with the resources consumed so far.
+        """
+        super().__init__(
+            f"{resource} limit of {limit} exceeded ({used} used; "
+            f"{usage['steps']} steps, {usage['seconds']:.3f} s, "
+            f"depth {usage['depth']})"
+        )
+        self.resource = resource
+        self.limit = limit
+        self.used = used
+        self.usage = usage
+
+    def as_dict(self):
+        """
+        Converts the exception to a dictionary of JSON-compatible values.
+
+        :return: The dictionary.
+        """
+        return {
+            "resource": self.resource,
+            "limit": self.limit,
+            "used": self.used,
+            "usage": self.usage,
+        }
+
+
+class Budget:
+    """
+    Limits on the work of an evaluation.
+
+    A step is a loop iteration or a call to a user-defined function, the only
+    constructs whose number of evaluations is not bounded by the size of the source.
+    Steps are counted down in a window of at most `interval` steps; the step limit
+    and the clock are only checked when a window runs out, so the cost of a step is
+    a decrement and a comparison. The call depth is checked on every call, and the
+    size of integers produced by `*` and `^` before they are computed.
+    """
+
+    def __init__(  # pylint: disable=R0913,R0917
+        self,
+        steps=None,
+        seconds=None,
+        depth=None,
+        int_bits=None,
+        interval=CHECK_INTERVAL,
+        clock=time.monotonic,
+    ):
+        """
+        Initializes a Budget. A limit of None is not enforced.
+
+        :param steps: The maximum number of steps.
+        :param seconds: The maximum wall time, in seconds.
+        :param depth: The maximum depth of nested calls to user-defined functions.
+        :param int_bits: The maximum size of integers, in bits.
+        :param interval: The maximum number of steps between two checks of the
+                         limits.
+        :param clock: The function returning the current time in seconds.
+        """
+        self.steps = steps
+        self.seconds = seconds
+        self.depth = depth
+        self.int_bits = int_bits
+        self.interval = interval
+        self.clock = clock
+        self.start()
+
+    def start(self):
+        """
+        Resets the consumed resources, before an evaluation.
+        """
+        self.spent = 0
+        self.calls = 0
+        self.deepest = 0
+        self.started = self.clock()
+        self.window = self.next_window()
+        self.ticks = self.window
+
+    def next_window(self):
+        """
+        Returns the number of steps until the next check of the limits.
+
+        :return: The number of steps.
+        """
+        if self.steps is None:
+            return self.interval
+        return max(0, min(self.interval, self.steps - self.spent))
+
+    def used_steps(self):
+        """
+        Returns the number of steps consumed so far.
+
+        :return: The number of steps.
+        """
+        return self.spent + self.window - self.ticks
+
+    def usage(self):
+        """
+        Returns the resources consumed so far.
+
+        :return: A dictionary with the steps, the elapsed seconds and the deepest
+                 call depth.
+        """
+        return {
+            "steps": self.used_steps(),
+            "seconds": self.clock() - self.started,
+            "depth": self.deepest,
+        }
+
+    def exceeded(self, resource, used):
+        """
+        Builds the exception reporting an exceeded limit.
+
+        :param resource: The name of the limit.
+        :param used: The amount of the resource that was requested.
+        :return: A BudgetExceeded exception.
+        """
+        return BudgetExceeded(resource, getattr(self, resource), used, self.usage())
+
+    def checkpoint(self):
+        """
+        Checks the step and time limits when a window runs out, and opens the next
+        window.
+
+        :raises BudgetExceeded: If a limit is exceeded.
+        """
+        self.spent += self.window - self.ticks
+        self.window = self.ticks = 0
+        if self.steps is not None and self.spent > self.steps:
+            raise self.exceeded("steps", self.spent)
+        if self.seconds is not None:
+            elapsed = self.clock() - self.started
+            if elapsed > self.seconds:
+                raise self.exceeded("seconds", round(elapsed, 3))
+        self.window = self.ticks = self.next_window()
+
+    def check_bits(self, bits):
+        """
+        Checks the size of an integer about to be computed.
+
+        :param bits: A lower bound of the size of the integer, in bits.
+        :raises BudgetExceeded: If the size exceeds the limit.
+        """
+        if bits > self.int_bits:
+            raise self.exceeded("int_bits", bits)
+
+
+class BudgetCompiler(Compiler):
+    """
+    Compiler whose closures enforce a Budget.
+
+    Loops and calls to user-defined functions consume steps, calls are limited in
+    depth, and multiplications and powers of integers are limited in size. The JIT
+    is disabled, since translated code would run without the checks. The Compiler
+    used without limits is not affected.
+    """
+
+    def __init__(
+        self, budget, functions=None, output=None, memoize=True, diagnostics=None
+    ):
+        """
+        Initializes a BudgetCompiler.
+
+        :param budget: The Budget to enforce.
+        :param functions: The dictionary of user-defined functions. Defaults to the
+                          interpreter's global table.
+        :param output: Optional Sink or file receiving print statements and error
+                       messages.
+        :param memoize: Whether the results of pure functions are cached.
+        :param diagnostics: Optional callable receiving the errors.
+        """
+        super().__init__(
+            functions=functions,
+            jit=False,
+            output=output,
+            memoize=memoize,
+            diagnostics=diagnostics,
+        )
+        self.budget = budget
+
+    def compile_binary(self, node):
+        """
+        Compiles an operator, checking the size of the integers produced by `*` and
+        `^` when the budget limits it.
+
+        :param node: A tuple of the form (op, left, right).
+        :return: The compiled closure.
+        """
+        op = node[0]
+        if self.budget.int_bits is None or op not in ("*", "^"):
+            return super().compile_binary(node)
+
+        left = self.compile(node[1])
+        right = self.compile(node[2])
+        budget = self.budget
+
+        if op == "*":
+
+            def multiply(env):
+                a = left(env)
+                b = right(env)
+                if a.__class__ is int and b.__class__ is int:
+                    budget.check_bits(a.bit_length() + b.bit_length() - 1)
+                return a * b
+
+            return multiply
+
+        def power(env):
+            base = left(env)
+            exponent = right(env)
+            if base.__class__ is int and exponent.__class__ is int and exponent > 0:
+                budget.check_bits((base.bit_length() - 1) * exponent + 1)
+            return base**exponent
+
+        return power
+
+    def execute(self, name, definition, values, env):
+        """
+        Runs the body of a user-defined function, consuming a step and checking the
+        call depth.
+
+        :param name: The name of the function.
+        :param definition: The (params, body) tuple of the function.
+        :param values: The evaluated argument values.
+        :param env: The environment of the caller.
+        :return: The result of the function call.
+        """
+        budget = self.budget
+        budget.ticks -= 1
+        if budget.ticks < 0:
+            budget.checkpoint()
+        budget.calls += 1
+        if budget.calls > budget.deepest:
+            budget.deepest = budget.calls
+            if budget.depth is not None and budget.calls > budget.depth:
+                budget.calls -= 1
+                raise budget.exceeded("depth", budget.calls + 1)
+        try:
+            return super().execute(name, definition, values, env)
+        finally:
+            budget.calls -= 1
+
+    def compile_while(self, node):
+        """
+        Compiles a while loop whose iterations consume steps.
+
+        :param node: A tuple of the form ("while", condition, block).
+        :return: The compiled closure.
+        """
+        condition = self.compile(node[1])
+        block = self.compile_block(node[2])
+        budget = self.budget
+
+        def loop(env):
+            while condition(env):
+                budget.ticks -= 1
+                if budget.ticks < 0:
+                    budget.checkpoint()
+                block(env)
+            return env.get("x", 0)
+
+        return loop
+
+
+def run_budgeted(node, budget, local_env=None, functions=None):
+    """
+    Compiles and evaluates an AST under a Budget.
+
+    :param node: The root node of the AST to be evaluated.
+    :param budget: The Budget to enforce.
+    :param local_env: Optional dictionary representing a local variable environment.
+    :param functions: The dictionary of user-defined functions. Defaults to the
+                      interpreter's global table.
+    :return: The result of the evaluation of the AST.
+    :raises BudgetExceeded: If a limit is exceeded.
+    """
+    env = local_env if local_env is not None else global_env
+    compiled = BudgetCompiler(budget, functions=functions).compile(node)
+    budget.start()
+    return compiled(env)
@@ -0,0 +1,204 @@
+"""Modulo cache."""
+
+import contextlib
+import hashlib
+import marshal
+import os
+import threading
+from collections import OrderedDict
+
+from .output import channels
+from .parser import clone_parser
+from .tables import grammar_version
+from .tokenizer import get_tokenizer
+
+DEFAULT_CACHE_SIZE = 256
+
+
+def source_key(source):
+    """
+    Returns the content hash used as the cache key of a source text.
+
+    :param source: The source text.
+    :return: A hexadecimal digest.
+    """
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def parse_text(source, report=None):
+    """
+    Parses a source text with a new parser state and Tokenizer, so that several
+    threads can parse at the same time.
+
+    :param source: The source text.
+    :param report: Optional function receiving the illegal characters and syntax
+                   errors, called with the message, the kind of error and the line.
+                   Defaults to the global channels.
+    :return: The AST, or None if the source could not be parsed.
+    """
+    scanner = get_tokenizer().clone()
+    scanner.lineno = 1
+    if report is not None:
+        scanner.report = report
+    return clone_parser().parse(source, lexer=scanner)
+
+
+class ParseCache:
+    """
+    Content-addressed cache of parsed ASTs.
+
+    ASTs are kept in an in-memory LRU keyed by the hash of the source text. When a
+    cache directory is configured, they are also stored on disk, in a subdirectory
+    named after the grammar version, so that other processes can reuse them.
+    Sources that fail to parse, or whose parse reported an illegal character or a
+    syntax error, are never cached, so every parse reports their errors again.
+
+    Cached ASTs are shared between callers and must not be modified.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, cache_dir=None, parse=None):
+        """
+        Initializes a ParseCache.
+
+        :param maxsize: The maximum number of ASTs kept in memory.
+        :param cache_dir: Optional directory where ASTs are persisted.
+        :param parse: The function used to parse a source text on a miss, called
+                      with the source and the function reporting its errors.
+                      Defaults to `parse_text`.
+        """
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.parse_source = parse
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def parse(self, source, parse=None, report=None):
+        """
+        Returns the AST of a source text, parsing it only on a cache miss.
+
+        :param source: The source text.
+        :param parse: Optional function used to parse the source on a miss, instead
+                      of the one given to the cache.
+        :param report: Optional function receiving the errors of the parse, called
+                       with the message, the kind of error and the line. Defaults to
+                       the global channels.
+        :return: The AST, or None if the source could not be parsed.
+        """
+        key = source_key(source)
+
+        with self.lock:
+            ast = self.entries.get(key)
+            if ast is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return ast
+
+        ast = self.load(key)
+        with self.lock:
+            if ast is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+        if ast is None:
+            report = channels.report if report is None else report
+            reported = []
+
+            def record(message, kind=None, line=None):
+                reported.append(kind)
+                report(message, kind, line)
+
+            ast = (parse or self.parse_source or parse_text)(source, record)
+            if ast is None or reported:
+                return ast
+            self.store(key, ast)
+
+        self.remember(key, ast)
+        return ast
+
+    def remember(self, key, ast):
+        """
+        Adds an AST to the in-memory LRU, evicting the least recently used entries.
+
+        :param key: The content hash of the source.
+        :param ast: The AST to be cached.
+        """
+        with self.lock:
+            self.entries[key] = ast
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def path(self, key):
+        """
+        Returns the path of the file holding an AST on disk.
+
+        :param key: The content hash of the source.
+        :return: The file path.
+        """
+        return os.path.join(self.cache_dir, grammar_version()[:16], f"{key}.ast")
+
+    def load(self, key):
+        """
+        Reads an AST from the cache directory.
+
+        :param key: The content hash of the source.
+        :return: The AST, or None if it is not on disk or cannot be read.
+        """
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self.path(key), "rb") as file:
+                return marshal.load(file)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+    def store(self, key, ast):
+        """
+        Writes an AST to the cache directory. Failures are ignored, since the
+        on-disk cache is only an optimization.
+
+        :param key: The content hash of the source.
+        :param ast: The AST to be stored.
+        """
+        if self.cache_dir is None:
+            return
+        path = self.path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, "wb") as file:
+                marshal.dump(ast, file)
+            os.replace(temp_path, path)
+        except (OSError, ValueError):
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+
+    def clear(self):
+        """
+        Empties the in-memory cache and resets the statistics.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+
+parse_cache = ParseCache(
+    maxsize=int(os.environ.get("PARSE_CACHE_SIZE", DEFAULT_CACHE_SIZE)),
+    cache_dir=os.environ.get("PARSE_CACHE_DIR") or None,
+)
+
+
+def parse_cached(source):
+    """
+    Parses a source text through the default parse cache.
+
+    The size and directory of the default cache are read from the PARSE_CACHE_SIZE
+    and PARSE_CACHE_DIR environment variables.
+
+    :param source: The source text.
+    :return: The AST, or None if the source could not be parsed.
+    """
+    return parse_cache.parse(source)
@@ -0,0 +1,314 @@
+"""Modulo compact."""
+
+from array import array
+
+from .interpreter import eval_ast, print_ast
+from .parser import clone_parser
+from .tokenizer import get_tokenizer
+
+OPCODES = (
+    "number",
+    "var",
+    "assign",
+    "call",
+    "list",
+    "names",
+    "+",
+    "-",
+    "*",
+    "/",
+    "^",
+    "<",
+    ">",
+    "==",
+    "!=",
+    "<=",
+    ">=",
+    "neg",
+    "if",
+    "while",
+    "def",
+    "return",
+    "print",
+    "program",
+    "sin",
+    "cos",
+    "tan",
+    "exp",
+    "sqrt",
+    "log",
+    "abs",
+    "parallel",
+)
+
+OPCODE = {name: code for code, name in enumerate(OPCODES)}
+
+NUMBER = OPCODE["number"]
+LIST = OPCODE["list"]
+NAMES = OPCODE["names"]
+NAMED = {OPCODE["var"], OPCODE["assign"], OPCODE["call"], OPCODE["def"]}
+
+NO_NODE = -1
+
+
+class CompactAst:
+    """
+    Struct-of-arrays encoding of an AST.
+
+    Node `i` is described by `ops[i]`, an index into OPCODES, by up to three fields
+    `first[i]`, `second[i]` and `third[i]`, and by the line and column where it
+    starts in the source. Fields hold the indices of child nodes, with these
+    exceptions:
+
+    * `number`: `first` is the index of the value in `values`;
+    * `var`, `assign`, `call` and `def`: `first` is the index of the name in
+      `values`;
+    * `list` and `names`: `first` is the start of the items in `items` and `second`
+      their count. Items are node indices for `list`, which holds statements and
+      arguments, and indices in `values` for `names`, which holds parameters.
+
+    Unused fields are NO_NODE. Children are always stored before their parent, and
+    numbers and names are stored once in `values`.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty CompactAst.
+        """
+        self.ops = array("B")
+        self.first = array("i")
+        self.second = array("i")
+        self.third = array("i")
+        self.lines = array("i")
+        self.columns = array("i")
+        self.items = array("i")
+        self.values = []
+        self.root = NO_NODE
+
+    def __len__(self):
+        """
+        Returns the number of nodes.
+
+        :return: The number of nodes.
+        """
+        return len(self.ops)
+
+    def op(self, index):
+        """
+        Returns the operator of a node.
+
+        :param index: The index of the node.
+        :return: The operator, as it appears in the tuple AST.
+        """
+        return OPCODES[self.ops[index]]
+
+    def position(self, index):
+        """
+        Returns the source position of a node.
+
+        :param index: The index of the node.
+        :return: A (line, column) tuple. Columns start at 1.
+        """
+        return self.lines[index], self.columns[index]
+
+    def nbytes(self):
+        """
+        Returns the size of the buffers of the encoding, not counting the values.
+
+        :return: The size in bytes.
+        """
+        buffers = (self.ops, self.first, self.second, self.third)
+        buffers += (self.lines, self.columns, self.items)
+        return sum(len(buffer) * buffer.itemsize for buffer in buffers)
+
+    def to_tuple(self, index=None, positions=None):
+        """
+        Converts the encoding back into the tuple AST produced by the parser.
+
+        Since children are stored before their parents, the nodes are rebuilt in a
+        single pass without recursion, so ASTs of any depth can be converted.
+
+        :param index: The index of the node to convert. Defaults to the root.
+        :param positions: Optional dictionary receiving the line of every tuple
+                          node, keyed by the id of the tuple.
+        :return: The tuple AST, equal to the one the parser builds for the source.
+        """
+        index = self.root if index is None else index
+        built = []
+        values, items = self.values, self.items
+
+        for node in range(index + 1):
+            code = self.ops[node]
+            first, second, third = self.first[node], self.second[node], self.third[node]
+            if code == NUMBER:
+                built.append(values[first])
+            elif code == LIST:
+                built.append([built[item] for item in items[first : first + second]])
+            elif code == NAMES:
+                built.append([values[item] for item in items[first : first + second]])
+            elif code in NAMED:
+                children = (built[f] for f in (second, third) if f != NO_NODE)
+                built.append((OPCODES[code], values[first], *children))
+            else:
+                children = (built[f] for f in (first, second, third) if f != NO_NODE)
+                built.append((OPCODES[code], *children))
+            if positions is not None and code not in (NUMBER, LIST, NAMES):
+                positions[id(built[-1])] = self.lines[node]
+
+        return built[index]
+
+
+class CompactBuilder:
+    """
+    Builder used by the parser actions to write the nodes of an AST into a
+    CompactAst instead of building tuples.
+
+    The parser passes the values it would put in the tuple of a node. Names become
+    indices in `values`, lists of statements, arguments or parameters become list
+    nodes, and child nodes are already indices.
+    """
+
+    def __init__(self):
+        """
+        Initializes a CompactBuilder with an empty CompactAst.
+        """
+        self.tree = CompactAst()
+        self.indices = {}
+
+    def value(self, value):
+        """
+        Stores a number or a name in `values`, once.
+
+        :param value: The number or name.
+        :return: The index of the value.
+        """
+        key = (value.__class__, value)
+        index = self.indices.get(key)
+        if index is None:
+            index = self.indices[key] = len(self.tree.values)
+            self.tree.values.append(value)
+        return index
+
+    def add(self, code, position, first=NO_NODE, second=NO_NODE, third=NO_NODE):
+        """
+        Appends a node to the tree.
+
+        :param code: The opcode of the node.
+        :param position: The (line, column) tuple of the node.
+        :param first: The first field.
+        :param second: The second field.
+        :param third: The third field.
+        :return: The index of the node.
+        """
+        tree = self.tree
+        tree.ops.append(code)
+        tree.first.append(first)
+        tree.second.append(second)
+        tree.third.append(third)
+        tree.lines.append(position[0])
+        tree.columns.append(position[1])
+        return len(tree.ops) - 1
+
+    def number(self, value, position):
+        """
+        Adds a number literal.
+
+        :param value: The int or float.
+        :param position: The (line, column) tuple of the literal.
+        :return: The index of the node.
+        """
+        return self.add(NUMBER, position, self.value(value))
+
+    def sequence(self, children, position):
+        """
+        Adds a list node holding statements, arguments or parameter names.
+
+        :param children: A list of node indices, or a list of names.
+        :param position: The (line, column) tuple of the node owning the list.
+        :return: The index of the node.
+        """
+        items = self.tree.items
+        start = len(items)
+        if children and children[0].__class__ is str:
+            items.extend(self.value(child) for child in children)
+            return self.add(NAMES, position, start, len(children))
+        items.extend(children)
+        return self.add(LIST, position, start, len(children))
+
+    def node(self, op, children, position):
+        """
+        Adds a node.
+
+        :param op: The operator, as it appears in the tuple AST.
+        :param children: The children of the tuple AST node, with child nodes
+                         already replaced by their indices.
+        :param position: The (line, column) tuple of the node. A program, which
+                         has no position of its own, takes the position of its
+                         first statement.
+        :return: The index of the node.
+        """
+        if op == "program" and children[0]:
+            position = self.tree.position(children[0][0])
+        fields = []
+        for child in children:
+            if child.__class__ is str:
+                child = self.value(child)
+            elif child.__class__ is list:
+                child = self.sequence(child, position)
+            fields.append(child)
+        return self.add(OPCODE[op], position, *fields)
+
+    def finish(self, root):
+        """
+        Completes the tree.
+
+        :param root: The index of the root node.
+        :return: The CompactAst.
+        """
+        self.tree.root = root
+        self.indices = {}
+        return self.tree
+
+
+def parse_compact(source):
+    """
+    Parses a source text into a CompactAst.
+
+    :param source: The source text.
+    :return: The CompactAst, or None if the source could not be parsed.
+    """
+    compact_parser = clone_parser()
+    builder = compact_parser.builder = CompactBuilder()
+    scanner = get_tokenizer().clone()
+    scanner.lineno = 1
+    root = compact_parser.parse(source, lexer=scanner)
+    if root is None:
+        return None
+    return builder.finish(root)
+
+
+def print_compact(tree):
+    """
+    Converts a CompactAst into the representation of `print_ast`.
+
+    This is a debugging helper: it rebuilds the whole tuple AST, so it needs as much
+    memory as parsing into tuples in the first place.
+
+    :param tree: The CompactAst.
+    :return: A string representation of the AST.
+    """
+    return print_ast(tree.to_tuple())
+
+
+def eval_compact(tree, local_env=None):
+    """
+    Evaluates a CompactAst with `eval_ast`.
+
+    This is a debugging helper: it rebuilds the whole tuple AST, so it needs as much
+    memory as parsing into tuples in the first place.
+
+    :param tree: The CompactAst.
+    :param local_env: Optional dictionary representing a local variable environment.
+    :return: The result of the evaluation.
+    """
+    return eval_ast(tree.to_tuple(), local_env)
@@ -0,0 +1,602 @@
+"""Modulo compiler."""
+
+import contextlib
+
+from .cse import SubexpressionEliminator
+from .interpreter import (
+    ReturnValue,
+    define_function,
+    eval_variable,
+    global_env,
+    global_functions,
+    math_functions,
+)
+from .jit import Jit, LoopTier
+from .loops import UNSET, LoopOptimizer
+from .memo import Memoizer
+from .output import open_channels
+from .scope import enter_frame, scope_names
+from .specialize import KINDS, TypeSpecializer
+
+BINARY_OPERATIONS = {
+    "+": lambda left, right: lambda env: left(env) + right(env),
+    "-": lambda left, right: lambda env: left(env) - right(env),
+    "*": lambda left, right: lambda env: left(env) * right(env),
+    "^": lambda left, right: lambda env: left(env) ** right(env),
+    "<": lambda left, right: lambda env: left(env) < right(env),
+    ">": lambda left, right: lambda env: left(env) > right(env),
+    "==": lambda left, right: lambda env: left(env) == right(env),
+    "!=": lambda left, right: lambda env: left(env) != right(env),
+    "<=": lambda left, right: lambda env: left(env) <= right(env),
+    ">=": lambda left, right: lambda env: left(env) >= right(env),
+}
+
+
+class Compiler:  # pylint: disable=R0904
+    """
+    Translates the tuple AST produced by the parser into a tree of closures.
+
+    Every node is resolved to its handler once, at compile time, so running the
+    compiled program only calls pre-bound Python functions. Each closure takes the
+    environment dictionary as its only argument and returns the same value that
+    `eval_ast` would return for the node.
+    """
+
+    def __init__(  # pylint: disable=R0913,R0917
+        self,
+        functions=None,
+        jit=True,
+        output=None,
+        memoize=True,
+        loops=True,
+        diagnostics=None,
+        cse=True,
+        specialize=True,
+    ):
+        """
+        Initializes a Compiler bound to a function table.
+
+        :param functions: The dictionary of user-defined functions used by `def`
+                          and `call` nodes. Defaults to the interpreter's global table.
+        :param jit: Whether hot functions and loops are translated to Python code.
+        :param output: Optional Sink or file receiving print statements, and error
+                       messages without a diagnostics channel. Defaults to the
+                       global output channel.
+        :param memoize: Whether the results of pure functions are cached.
+        :param loops: Whether while loops are specialized by the LoopOptimizer.
+        :param diagnostics: Optional callable receiving the message, kind and line of
+                            every error, such as a Diagnostics channel.
+        :param cse: Whether the repeated pure subexpressions of a statement are
+                    evaluated once, by the SubexpressionEliminator.
+        :param specialize: Whether operators are specialized for the inferred types
+                           of their operands, by the TypeSpecializer.
+        """
+        self.functions = global_functions if functions is None else functions
+        self.channels = open_channels(output, diagnostics)
+        self.print = self.channels.print
+        self.report = self.channels.report
+        self.bodies = {}
+        self.memo = Memoizer(self) if memoize else None
+        self.jit = Jit(self) if jit else None
+        self.loops = LoopOptimizer(self, native=not jit) if loops else None
+        self.cse = SubexpressionEliminator(self) if cse else None
+        self.types = TypeSpecializer(self) if specialize else None
+        self.repeated = False
+
+    def compile(self, node):
+        """
+        Compiles an AST node into a closure.
+
+        :param node: The AST node to be compiled.
+        :return: A callable that receives an environment and evaluates the node.
+        """
+        if isinstance(node, (int, float)):
+            return lambda env: node
+
+        if isinstance(node, list):
+            return self.compile_block(node)
+
+        if isinstance(node, tuple):
+            handler = getattr(self, HANDLERS.get(node[0], "compile_unknown"))
+            return handler(node)
+
+        return lambda env: 0
+
+    def compile_block(self, statements):
+        """
+        Compiles a list of statements into a closure returning the last result.
+
+        :param statements: A list of AST nodes.
+        :return: The compiled closure.
+        """
+        compiled = tuple(self.compile_statement(stmt) for stmt in statements)
+
+        if not compiled:
+            return lambda env: None
+
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def run_block(env):
+            result = None
+            for stmt in compiled:
+                result = stmt(env)
+            return result
+
+        return run_block
+
+    @contextlib.contextmanager
+    def repeating(self):
+        """
+        Marks the code compiled during a `with` block as code that may run many
+        times, such as the body of a loop or of a function. The
+        SubexpressionEliminator and the TypeSpecializer only apply to such code,
+        since their work at compile time does not pay off for statements that run
+        once.
+
+        :return: A context manager.
+        """
+        saved = self.repeated
+        self.repeated = True
+        try:
+            yield
+        finally:
+            self.repeated = saved
+
+    def compile_statement(self, node):
+        """
+        Compiles a statement, sharing its repeated pure subexpressions when the
+        SubexpressionEliminator is enabled and the statement may run many times.
+
+        :param node: The AST node of the statement.
+        :return: The compiled closure.
+        """
+        if self.cse is not None and self.repeated:
+            compiled = self.cse.compile(node)
+            if compiled is not None:
+                return compiled
+        return self.compile(node)
+
+    def compile_binary(self, node):
+        """
+        Compiles an arithmetic or comparison operator.
+
+        :param node: A tuple of the form (op, left, right).
+        :return: The compiled closure.
+        """
+        if self.types is not None and self.repeated:
+            specialized = self.types.compile(node)
+            if specialized is not None:
+                return specialized
+        return BINARY_OPERATIONS[node[0]](self.compile(node[1]), self.compile(node[2]))
+
+    def compile_divide(self, node):
+        """
+        Compiles a division, reporting an error and returning 0 on division by zero.
+
+        :param node: A tuple of the form ("/", left, right).
+        :return: The compiled closure.
+        """
+        if self.types is not None and self.repeated:
+            specialized = self.types.compile(node)
+            if specialized is not None:
+                return specialized
+        left = self.compile(node[1])
+        right = self.compile(node[2])
+        report = self.report
+
+        def divide(env):
+            divisor = right(env)
+            if divisor != 0:
+                return left(env) / divisor
+            report("Error: division by zero", "division-by-zero")
+            return 0
+
+        return divide
+
+    def compile_neg(self, node):
+        """
+        Compiles a unary minus.
+
+        :param node: A tuple of the form ("neg", operand).
+        :return: The compiled closure.
+        """
+        operand = self.compile(node[1])
+        return lambda env: -operand(env)
+
+    def compile_assign(self, node):
+        """
+        Compiles a variable assignment.
+
+        :param node: A tuple of the form ("assign", name, expression).
+        :return: The compiled closure.
+        """
+        name = node[1]
+        value = self.compile(node[2])
+
+        def assign(env):
+            env[name] = result = value(env)
+            return result
+
+        return assign
+
+    def compile_var(self, node):
+        """
+        Compiles a variable reference.
+
+        :param node: A tuple of the form ("var", name).
+        :return: The compiled closure.
+        """
+        name = node[1]
+        report = self.report
+
+        def variable(env):
+            try:
+                return env[name]
+            except KeyError:
+                return eval_variable(name, env, report)
+
+        return variable
+
+    def compile_call(self, node):
+        """
+        Compiles a call to a mathematical or user-defined function.
+
+        Mathematical functions are bound at compile time. User-defined functions are
+        looked up when the call runs, since they may be defined later in the program.
+
+        :param node: A tuple of the form ("call", name, args).
+        :return: The compiled closure.
+        """
+        name = node[1]
+        args = tuple(self.compile(arg) for arg in node[2])
+
+        if name in math_functions:
+            function = math_functions[name]
+            return lambda env: function(*[arg(env) for arg in args])
+
+        return lambda env: self.call_user_function(name, args, env)
+
+    def call_user_function(self, name, args, env):
+        """
+        Calls a user-defined function with compiled argument closures.
+
+        :param name: The name of the function to call.
+        :param args: A tuple of compiled argument closures.
+        :param env: The environment of the caller.
+        :return: The result of the function call, or 0 if an error occurs.
+        """
+        definition = self.resolve(name, len(args))
+        if definition is None:
+            return 0
+        return self.invoke(name, definition, [arg(env) for arg in args], env)
+
+    def resolve(self, name, count):
+        """
+        Looks up a user-defined function and checks the number of arguments.
+
+        An error is reported if the function is not defined or if the number
+        of arguments does not match.
+
+        :param name: The name of the function.
+        :param count: The number of arguments of the call.
+        :return: The (params, body) tuple of the function, or None on error.
+        """
+        definition = self.functions.get(name)
+
+        if definition is None:
+            self.report(f"Erro: função '{name}' não definida.", "undefined-function")
+            return None
+
+        if len(definition[0]) != count:
+            self.report(
+                f"Error: function '{name}' expects {len(definition[0])} "
+                f"arguments, but {count} were provided.",
+                "arity",
+            )
+            return None
+
+        return definition
+
+    def invoke(self, name, definition, values, env):
+        """
+        Runs a user-defined function with evaluated arguments.
+
+        The results of pure functions are looked up in their cache first.
+
+        :param name: The name of the function.
+        :param definition: The (params, body) tuple of the function.
+        :param values: The evaluated argument values.
+        :param env: The environment of the caller.
+        :return: The result of the function call.
+        """
+        if self.memo is not None:
+            cache = self.memo.cache(name, definition)
+            if cache is not None:
+                return cache.call(
+                    values, lambda *args: self.execute(name, definition, args, env)
+                )
+        return self.execute(name, definition, values, env)
+
+    def execute(self, name, definition, values, env):
+        """
+        Runs the body of a user-defined function.
+
+        Hot functions run their translated code. Otherwise the body runs as closures
+        in a new Frame holding the parameters and the variables the body mentions.
+
+        :param name: The name of the function.
+        :param definition: The (params, body) tuple of the function.
+        :param values: The evaluated argument values.
+        :param env: The environment of the caller.
+        :return: The result of the function call.
+        """
+        params = definition[0]
+        compiled, names = self.compile_body(name, definition, values)
+
+        if self.jit is not None:
+            entry = self.jit.lookup(name, definition)
+            if entry is not None:
+                return entry.run(names, params, values, env)
+
+        try:
+            return compiled(enter_frame(env, names, params, values))
+        except ReturnValue as rv:
+            return rv.value
+
+    def compile_body(self, name, definition, values=None):
+        """
+        Returns the compiled body of a user-defined function and the variables of
+        its frame, compiling and resolving them on first use.
+
+        The cache is keyed by function name and checked against the body object, so
+        a redefinition is picked up automatically.
+
+        :param name: The name of the function.
+        :param definition: The (params, body) tuple of the function.
+        :param values: Optional argument values of the first call, whose types seed
+                       the inference of the types of the body.
+        :return: The compiled closure of the body and the names returned by
+                 `scope_names`.
+        """
+        params, body = definition
+        cached = self.bodies.get(name)
+        if cached is not None and cached[0] is body:
+            return cached[1], cached[2]
+
+        with self.repeating():
+            if self.types is None:
+                compiled = self.compile(body)
+            else:
+                seeds = {
+                    param: value.__class__
+                    for param, value in zip(params, values or ())
+                    if value.__class__ in KINDS
+                }
+                with self.types.scope(body, seeds):
+                    compiled = self.compile(body)
+        names = scope_names(params, body)
+        self.bodies[name] = (body, compiled, names)
+        return compiled, names
+
+    def compile_def(self, node):
+        """
+        Compiles a function definition.
+
+        :param node: A tuple of the form ("def", name, params, body).
+        :return: The compiled closure.
+        """
+        functions = self.functions
+        report = self.report
+        return lambda env: define_function(node, functions, report)
+
+    def compile_if(self, node):
+        """
+        Compiles an if statement, with an optional else block.
+
+        :param node: A tuple of the form ("if", condition, block[, else_block]).
+        :return: The compiled closure.
+        """
+        condition = self.compile(node[1])
+        block = self.compile_block(node[2])
+
+        if len(node) > 3:
+            else_block = self.compile_block(node[3])
+            return lambda env: block(env) if condition(env) else else_block(env)
+
+        return lambda env: block(env) if condition(env) else None
+
+    def compile_if_else(self, node):
+        """
+        Compiles an if-else expression.
+
+        :param node: A tuple of the form ("if-else", condition, then, otherwise).
+        :return: The compiled closure.
+        """
+        condition = self.compile(node[1])
+        then = self.compile(node[2])
+        otherwise = self.compile(node[3])
+        return lambda env: then(env) if condition(env) else otherwise(env)
+
+    def compile_while(self, node):
+        """
+        Compiles a while loop. Like `eval_while`, the loop evaluates to the final
+        value of variable x, or 0 if x is not defined.
+
+        Loops with a special shape are compiled by the LoopOptimizer, with the
+        regular loop as a fallback.
+
+        :param node: A tuple of the form ("while", condition, block).
+        :return: The compiled closure.
+        """
+        with self.repeating():
+            loop = self.compile_plain_while(node)
+            if self.loops is None:
+                return loop
+            optimized = self.loops.compile(node, loop)
+        return loop if optimized is None else optimized
+
+    def compile_plain_while(self, node):
+        """
+        Compiles a while loop as written, with the JIT tiers when they are enabled.
+
+        :param node: A tuple of the form ("while", condition, block).
+        :return: The compiled closure.
+        """
+        condition = self.compile(node[1])
+        block = self.compile_block(node[2])
+
+        if self.jit is None:
+
+            def loop(env):
+                while condition(env):
+                    block(env)
+                return env.get("x", 0)
+
+            return loop
+
+        tier = LoopTier(self.jit, node)
+
+        def tiered_loop(env):
+            code = tier.code()
+            if code is not None:
+                return code(env)
+            while condition(env):
+                block(env)
+                tier.iterations += 1
+                if tier.iterations >= tier.threshold:
+                    code = tier.promote()
+                    if code is not None:
+                        return code(env)
+            return env.get("x", 0)
+
+        return tiered_loop
+
+    def compile_hoisted(self, node):
+        """
+        Compiles an expression hoisted out of a loop by the LoopOptimizer. It is
+        evaluated the first time it is needed in a run of the loop, and its value is
+        reused until the loop ends.
+
+        :param node: A tuple of the form ("hoisted", slots, index, expression).
+        :return: The compiled closure.
+        """
+        slots = node[1]
+        index = node[2]
+        value = self.compile(node[3])
+
+        def hoisted(env):
+            result = slots[index]
+            if result is UNSET:
+                result = slots[index] = value(env)
+            return result
+
+        return hoisted
+
+    def compile_block_node(self, node):
+        """
+        Compiles a block node.
+
+        :param node: A tuple of the form ("block", statements).
+        :return: The compiled closure.
+        """
+        return self.compile_block(node[1])
+
+    def compile_return(self, node):
+        """
+        Compiles a return statement.
+
+        :param node: A tuple of the form ("return", expression).
+        :return: The compiled closure.
+        """
+        value = self.compile(node[1])
+
+        def return_value(env):
+            raise ReturnValue(value(env))
+
+        return return_value
+
+    def compile_print(self, node):
+        """
+        Compiles a print statement.
+
+        :param node: A tuple of the form ("print", expression).
+        :return: The compiled closure.
+        """
+        value = self.compile(node[1])
+        emit = self.print
+        return lambda env: emit(value(env))
+
+    def compile_program(self, node):
+        """
+        Compiles a program node.
+
+        :param node: A tuple of the form ("program", statements).
+        :return: The compiled closure.
+        """
+        if self.types is None:
+            return self.compile_block(node[1])
+        with self.types.scope(node[1]):
+            return self.compile_block(node[1])
+
+    def compile_unknown(self, node):
+        """
+        Compiles a node with an unknown operator, which reports an error when run.
+
+        :param node: The offending AST node.
+        :return: The compiled closure.
+        """
+        op = node[0]
+        report = self.report
+
+        def unknown(_env):
+            report(f"Error: unknown operator '{op}'.", "unknown-operator")
+            return 0
+
+        return unknown
+
+
+HANDLERS = {op: "compile_binary" for op in BINARY_OPERATIONS}
+HANDLERS.update(
+    {
+        "/": "compile_divide",
+        "neg": "compile_neg",
+        "assign": "compile_assign",
+        "var": "compile_var",
+        "call": "compile_call",
+        "def": "compile_def",
+        "if": "compile_if",
+        "if-else": "compile_if_else",
+        "while": "compile_while",
+        "hoisted": "compile_hoisted",
+        "block": "compile_block_node",
+        "parallel": "compile_block_node",
+        "return": "compile_return",
+        "print": "compile_print",
+        "program": "compile_program",
+    }
+)
+
+default_compiler = Compiler()
+
+
+def compile_ast(node):
+    """
+    Compiles an AST with the default compiler, bound to the global function table.
+
+    :param node: The root node of the AST to be compiled.
+    :return: A callable that receives an environment and evaluates the AST.
+    """
+    return default_compiler.compile(node)
+
+
+def run_compiled(node, local_env=None):
+    """
+    Compiles and evaluates an AST, as a drop-in replacement for `eval_ast`.
+
+    :param node: The root node of the AST to be evaluated.
+    :param local_env: Optional dictionary representing a local variable environment.
+    :return: The result of the evaluation of the AST.
+    """
+    env_to_use = local_env if local_env is not None else global_env
+    return compile_ast(node)(env_to_use)
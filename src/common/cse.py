@@ -0,0 +1,259 @@
+"""Modulo cse."""
+
+from collections import Counter
+
+from .interpreter import math_functions
+from .loops import HOISTED, UNSET, expression_variables, operation_count
+
+STATEMENTS = {"assign", "print", "return"}
+
+SKIPPED = {"def", "while", "block", "parallel", "program", HOISTED}
+
+MIN_SAVED = 4
+
+
+def node_key(node, keys):
+    """
+    Returns a hashable key identifying an AST node by its structure, and records
+    the keys of the tuple nodes of its subtree. Numbers of different types have
+    different keys, so `1` and `1.0` are not confused.
+
+    :param node: The AST node.
+    :param keys: The dictionary of node id to key receiving the keys.
+    :return: The key.
+    """
+    if isinstance(node, tuple):
+        key = keys.get(id(node))
+        if key is None:
+            if node[0] == HOISTED:
+                key = (HOISTED, id(node[1]), node[2])
+            elif node[0] == "def":
+                key = ("def", id(node))
+            else:
+                key = (node[0],) + tuple(node_key(child, keys) for child in node[1:])
+            keys[id(node)] = key
+        return key
+    if isinstance(node, list):
+        return ("list",) + tuple(node_key(child, keys) for child in node)
+    return (node.__class__, node)
+
+
+def calls_functions(node):
+    """
+    Checks whether a node calls a user-defined function, which may run the same
+    statement again before it ends.
+
+    :param node: The AST node.
+    :return: True if the node calls a function that is not a math function.
+    """
+    if isinstance(node, list):
+        return any(calls_functions(child) for child in node)
+    if not isinstance(node, tuple) or node[0] == HOISTED:
+        return False
+    if node[0] == "call" and node[1] not in math_functions:
+        return True
+    return any(calls_functions(child) for child in node[1:])
+
+
+def saved_operations(node, slots, uses):
+    """
+    Counts the operations a statement avoids by reusing the values of its hoisted
+    nodes.
+
+    :param node: The rewritten AST node of the statement.
+    :param slots: The list of values of the shared subexpressions of the statement.
+    :param uses: The Counter of slot index to uses receiving the uses of each slot.
+    :return: The number of operations evaluated once instead of several times.
+    """
+    if isinstance(node, list):
+        return sum(saved_operations(child, slots, uses) for child in node)
+    if not isinstance(node, tuple):
+        return 0
+    if node[0] == HOISTED and node[1] is slots:
+        uses[node[2]] += 1
+        return operation_count(node[3]) if uses[node[2]] > 1 else 0
+    return sum(saved_operations(child, slots, uses) for child in node[1:])
+
+
+class SubexpressionEliminator:
+    """
+    Common subexpression elimination of the compiler.
+
+    Within a statement, an expression cannot assign variables, and calls to
+    user-defined functions run in their own frame, so a pure subexpression that
+    appears several times has the same value everywhere in the statement. Each
+    repeated pure subexpression of an assignment, a print, a return, an expression
+    statement or the condition of an if is replaced by a hoisted node, evaluated the
+    first time it is needed and reused until the statement ends. Statements that
+    would save fewer than MIN_SAVED operations are not worth the bookkeeping and are
+    compiled as written, as are, at run time, statements whose shared subexpressions
+    read a variable that is not defined, so that every error is still reported.
+
+    The Compiler only applies it to statements that may run many times, in the
+    bodies of loops and functions and in reactive rules. A top-level statement runs
+    once, so its analysis would cost more than the evaluations it saves.
+    """
+
+    def __init__(self, compiler):
+        """
+        Initializes a SubexpressionEliminator.
+
+        :param compiler: The Compiler of the statements.
+        """
+        self.compiler = compiler
+        self.eliminated = 0
+
+    def compile(self, node):
+        """
+        Compiles a statement, sharing its repeated pure subexpressions.
+
+        :param node: The AST node of the statement.
+        :return: The compiled closure, or None if the statement has no repeated
+                 pure subexpression.
+        """
+        if not isinstance(node, tuple) or node[0] in SKIPPED:
+            return None
+        keys = {}
+        counts = Counter()
+        scope = node[1] if node[0] == "if" else node
+        self.count(scope, keys, counts)
+        if not any(count > 1 for count in counts.values()):
+            return None
+
+        slots = []
+        indices = {}
+        required = set()
+        shared = self.share(scope, keys, counts, slots, indices, required)
+        if not slots or saved_operations(shared, slots, Counter()) < MIN_SAVED:
+            return None
+        if node[0] == "if":
+            shared = (node[0], shared) + node[2:]
+        self.eliminated += len(slots)
+        return self.guard(
+            self.compiler.compile(shared),
+            self.plain(node),
+            slots,
+            frozenset(required),
+            calls_functions(node),
+        )
+
+    def plain(self, node):
+        """
+        Returns a closure running a statement as written, compiled the first time it
+        runs, since it is only needed when a variable is not defined.
+
+        :param node: The AST node of the statement.
+        :return: The closure.
+        """
+        compiled = []
+
+        def plain_statement(env):
+            if not compiled:
+                compiled.append(self.compiler.compile(node))
+            return compiled[0](env)
+
+        return plain_statement
+
+    def count(self, node, keys, counts):
+        """
+        Counts the occurrences of the expressions of a node, by structure.
+
+        :param node: The AST node.
+        :param keys: The dictionary of node id to key.
+        :param counts: The Counter of keys receiving the occurrences.
+        """
+        if isinstance(node, list):
+            for child in node:
+                self.count(child, keys, counts)
+        elif isinstance(node, tuple) and node[0] not in SKIPPED:
+            if node[0] not in STATEMENTS:
+                counts[node_key(node, keys)] += 1
+            for child in node[1:]:
+                self.count(child, keys, counts)
+
+    def share(  # pylint: disable=R0913,R0917
+        self, node, keys, counts, slots, indices, required
+    ):
+        """
+        Replaces the repeated pure subexpressions of a node by hoisted nodes, the
+        largest first. Equal subexpressions share a slot.
+
+        :param node: The AST node to be rewritten.
+        :param keys: The dictionary of node id to key.
+        :param counts: The Counter of occurrences of each key.
+        :param slots: The list of values of the shared subexpressions.
+        :param indices: The dictionary of key to slot index.
+        :param required: The set receiving the variables of the shared
+                         subexpressions, which must exist when the statement runs.
+        :return: The rewritten node.
+        """
+        if isinstance(node, list):
+            return [
+                self.share(child, keys, counts, slots, indices, required)
+                for child in node
+            ]
+        if not isinstance(node, tuple) or node[0] in SKIPPED or node[0] == "var":
+            return node
+
+        key = keys.get(id(node))
+        if counts[key] > 1:
+            index = indices.get(key)
+            if index is not None:
+                return (HOISTED, slots, index, node)
+            names = set()
+            if expression_variables(node, names) and operation_count(node) >= 2:
+                indices[key] = len(slots)
+                slots.append(UNSET)
+                required |= names
+                return (HOISTED, slots, indices[key], node)
+
+        return (node[0],) + tuple(
+            self.share(child, keys, counts, slots, indices, required)
+            for child in node[1:]
+        )
+
+    @staticmethod
+    def guard(shared, plain, slots, required, reentrant):
+        """
+        Wraps a statement with shared subexpressions so that its slots are cleared
+        on every run. When the statement calls user-defined functions, which may run
+        it again recursively, the slots of the outer run are saved and restored.
+
+        :param shared: The compiled statement with hoisted nodes.
+        :param plain: The compiled statement as written.
+        :param slots: The list of values of the shared subexpressions.
+        :param required: The variables the shared subexpressions read.
+        :param reentrant: Whether the statement may run again before it ends.
+        :return: The compiled closure.
+        """
+        unset = [UNSET] * len(slots)
+
+        if not reentrant and not required:
+
+            def constant_statement(env):
+                slots[:] = unset
+                return shared(env)
+
+            return constant_statement
+
+        if not reentrant:
+
+            def statement(env):
+                if not env.keys() >= required:
+                    return plain(env)
+                slots[:] = unset
+                return shared(env)
+
+            return statement
+
+        def reentrant_statement(env):
+            if not env.keys() >= required:
+                return plain(env)
+            saved = slots[:]
+            slots[:] = unset
+            try:
+                return shared(env)
+            finally:
+                slots[:] = saved
+
+        return reentrant_statement
@@ -0,0 +1,99 @@
+"""Modulo hashcons."""
+
+from .parser import clone_parser
+from .tokenizer import get_tokenizer
+
+STATEMENTS = {
+    "program",
+    "assign",
+    "print",
+    "return",
+    "if",
+    "while",
+    "def",
+    "parallel",
+}
+
+
+def child_key(child):
+    """
+    Returns the part of the key of a node contributed by one of its children.
+
+    Children that are nodes have already been interned, so their identity stands
+    for their structure. Numbers of different types have different keys, so `1`
+    and `1.0` are not confused.
+
+    :param child: The child: a node, a list of arguments, a name or a number.
+    :return: A hashable key.
+    """
+    if child.__class__ is tuple:
+        return id(child)
+    if child.__class__ is list:
+        return tuple(child_key(item) for item in child)
+    return (child.__class__, child)
+
+
+class HashConsBuilder:
+    """
+    Builder used by the parser actions to build a tuple AST in which structurally
+    identical expressions are a single node.
+
+    Every expression node is looked up in a table keyed by its operator and the
+    identities of its children, which are interned first, so a subtree such as
+    `sin(x * 2 + 3)` written several times is allocated once. Statements are built
+    as usual, since they own their position in the program. The AST has the same
+    shape as the one the parser builds, and can be given to any engine.
+    """
+
+    def __init__(self):
+        """
+        Initializes a HashConsBuilder with an empty table.
+        """
+        self.nodes = {}
+        self.numbers = {}
+        self.shared = 0
+
+    def number(self, value, _position):
+        """
+        Interns a number literal.
+
+        :param value: The int or float.
+        :param _position: The (line, column) tuple of the literal, unused.
+        :return: The number, shared with the equal literals of the same type.
+        """
+        return self.numbers.setdefault((value.__class__, value), value)
+
+    def node(self, op, children, _position):
+        """
+        Builds a node, or returns the equal expression node built before.
+
+        :param op: The operator, as it appears in the tuple AST.
+        :param children: The children of the tuple AST node.
+        :param _position: The (line, column) tuple of the node, unused.
+        :return: The node.
+        """
+        if op in STATEMENTS:
+            return (op, *children)
+        key = (op,) + tuple(child_key(child) for child in children)
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = (op, *children)
+        else:
+            self.shared += 1
+        return node
+
+
+def parse_shared(source, builder=None):
+    """
+    Parses a source text into a tuple AST whose identical expressions are shared.
+
+    :param source: The source text.
+    :param builder: Optional HashConsBuilder, which keeps its table across calls
+                    and counts the shared nodes. Defaults to a new one.
+    :return: The AST, or None if the source could not be parsed.
+    """
+    shared_parser = clone_parser()
+    shared_parser.builder = HashConsBuilder() if builder is None else builder
+    scanner = get_tokenizer().clone()
+    scanner.lineno = 1
+    return shared_parser.parse(source, lexer=scanner)
@@ -2,6 +2,8 @@
 
 import math
 
+from .output import channels
+
 global_env = {}
 global_functions = {}
 math_functions = {
@@ -29,36 +31,63 @@ class ReturnValue(Exception):
         self.value = value
 
 
-def eval_variable(name, env):
+def eval_variable(name, env, report=None):
     """
     Evaluates a variable and returns its value.
 
-    If the variable is not found in the provided environment, an error message is printed
+    If the variable is not found in the provided environment, an error is reported
     and 0 is returned.
 
     :param name: The name of the variable to be evaluated.
     :param env: The environment in which to evaluate the variable.
+    :param report: The function used to report the error, called with the message
+                   and the kind of error. Defaults to the global channels.
     :return: The value of the variable, or 0 if not found.
     """
     if name in env:
         return env[name]
-    print(f"Erro: variável '{name}' não encontrada.")
+    report = channels.report if report is None else report
+    report(f"Erro: variável '{name}' não encontrada.", "undefined-variable")
+    return 0
+
+
+def eval_divide(dividend, divisor, env):
+    """
+    Evaluates a division and returns the quotient.
+
+    The divisor is evaluated once, before the dividend, like in the compiled and
+    stack engines. If it is zero, an error is reported, the dividend is not
+    evaluated and 0 is returned.
+
+    :param dividend: The AST node of the dividend.
+    :param divisor: The AST node of the divisor.
+    :param env: The environment in which to evaluate the operands.
+    :return: The quotient, or 0 on division by zero.
+    """
+    value = eval_ast(divisor, env)
+    if value != 0:
+        return eval_ast(dividend, env) / value
+    channels.report("Error: division by zero", "division-by-zero")
     return 0
 
 
-def eval_if(condition, block, env):
+def eval_if(condition, block, env, else_block=None):
     """
     Evaluates an if statement and returns the result of the block if the condition is true.
 
-    If the condition is not true, the function returns None.
+    If the condition is not true, the else block is evaluated when present, otherwise
+    the function returns None.
 
     :param condition: The condition to be evaluated.
     :param block: The block of statements to be executed if the condition is true.
     :param env: The environment in which to evaluate the if statement.
-    :return: The result of the block if the condition is true, or None if not.
+    :param else_block: Optional block of statements to be executed if the condition is false.
+    :return: The result of the executed block, or None if no block was executed.
     """
     if eval_ast(condition, env):
         return eval_block(block, env)
+    if else_block is not None:
+        return eval_block(else_block, env)
     return None
 
 
@@ -91,24 +120,27 @@ def eval_block(statements, env):
     return result
 
 
-def define_function(node, functions):
+def define_function(node, functions, report=None):
     """
     Defines a new function with the given name, parameters, and body.
 
     The function is added to the functions dictionary with its name as the key
     and a tuple of its parameters and body as the value.
 
-    If the function with the given name is already defined, an error message is printed.
+    If the function with the given name is already defined, an error is reported.
 
     :param node: An AST node representing the function definition.
     :param functions: The dictionary in which to add the function.
+    :param report: The function used to report the error, called with the message
+                   and the kind of error. Defaults to the global channels.
     """
     name = node[1]
     params = node[2]
     body = node[3]
 
     if name in functions:
-        print(f"Error: function '{name}' is already defined")
+        report = channels.report if report is None else report
+        report(f"Error: function '{name}' is already defined", "redefinition")
     else:
         functions[name] = (params, body)
 
@@ -134,15 +166,16 @@ def call_user_function(name, arg_nodes, env_to_use):
         return math_functions[name](*evaluated_args)
 
     if name not in global_functions:
-        print(f"Erro: função '{name}' não definida.")
+        channels.report(f"Erro: função '{name}' não definida.", "undefined-function")
         return 0
 
     params, body = global_functions[name]
 
     if len(params) != len(arg_nodes):
-        print(
+        channels.report(
             f"Error: function '{name}' expects {len(params)} "
-            "arguments, but {len(arg_nodes)} were provided."
+            f"arguments, but {len(arg_nodes)} were provided.",
+            "arity",
         )
         return 0
 
@@ -208,11 +241,7 @@ def eval_ast(node, local_env=None):
             "+": lambda: eval_ast(node[1], env_to_use) + eval_ast(node[2], env_to_use),
             "-": lambda: eval_ast(node[1], env_to_use) - eval_ast(node[2], env_to_use),
             "*": lambda: eval_ast(node[1], env_to_use) * eval_ast(node[2], env_to_use),
-            "/": lambda: (
-                eval_ast(node[1], env_to_use) / eval_ast(node[2], env_to_use)
-                if eval_ast(node[2], env_to_use) != 0
-                else (print("Error: division by zero") or 0)
-            ),
+            "/": lambda: eval_divide(node[1], node[2], env_to_use),
             "^": lambda: eval_ast(node[1], env_to_use) ** eval_ast(node[2], env_to_use),
             "<": lambda: eval_ast(node[1], env_to_use) < eval_ast(node[2], env_to_use),
             ">": lambda: eval_ast(node[1], env_to_use) > eval_ast(node[2], env_to_use),
@@ -231,7 +260,9 @@ def eval_ast(node, local_env=None):
             ),
             "var": lambda: eval_variable(node[1], env_to_use),
             "call": lambda: call_user_function(node[1], node[2], env_to_use),
-            "if": lambda: eval_if(node[1], node[2], env_to_use),
+            "if": lambda: eval_if(
+                node[1], node[2], env_to_use, node[3] if len(node) > 3 else None
+            ),
             "if-else": lambda: (
                 eval_ast(node[2], env_to_use)
                 if eval_ast(node[1], env_to_use)
@@ -239,17 +270,18 @@ def eval_ast(node, local_env=None):
             ),
             "while": lambda: eval_while(node[1], node[2], env_to_use),
             "block": lambda: eval_block(node[1], env_to_use),
+            "parallel": lambda: eval_block(node[1], env_to_use),
             "return": lambda: (_ for _ in ()).throw(
                 ReturnValue(eval_ast(node[1], env_to_use))
             ),
-            "print": lambda: print(eval_ast(node[1], env_to_use)),
+            "print": lambda: channels.print(eval_ast(node[1], env_to_use)),
             "program": lambda: eval_program(node, env_to_use),
         }
 
         if op in operations:
             return operations[op]()
 
-        print(f"Error: unknown operator '{op}'.")
+        channels.report(f"Error: unknown operator '{op}'.", "unknown-operator")
         return 0
 
     return 0
@@ -0,0 +1,670 @@
+"""Modulo jit."""
+
+from .interpreter import (
+    ReturnValue,
+    define_function,
+    eval_variable,
+    math_functions,
+)
+from .scope import enter_frame
+
+HOT_CALLS = 50
+HOT_ITERATIONS = 100
+
+PYTHON_OPERATORS = {
+    "+": "+",
+    "-": "-",
+    "*": "*",
+    "^": "**",
+    "<": "<",
+    ">": ">",
+    "==": "==",
+    "!=": "!=",
+    "<=": "<=",
+    ">=": ">=",
+}
+
+
+class Untranslatable(Exception):
+    """
+    Exception raised when a node cannot be translated to Python source.
+    """
+
+
+class JitEntry:
+    """
+    Translated code of a user-defined function or loop, with the function
+    definitions it was translated against.
+    """
+
+    def __init__(self, deps, fast=None, function=None, source=None):
+        """
+        Initializes a JitEntry.
+
+        :param deps: A dictionary of function name to the definition used at translation.
+        :param fast: A Python function taking the argument values, for closed functions.
+        :param function: A Python function taking the environment dictionary.
+        :param source: The generated Python source, kept for inspection.
+        """
+        self.deps = deps
+        self.fast = fast
+        self.function = function
+        self.source = source
+
+    def is_valid(self, functions):
+        """
+        Checks that no function used by the translated code has been redefined.
+
+        :param functions: The current function table.
+        :return: True if every dependency still has the same definition.
+        """
+        for name, definition in self.deps.items():
+            if functions.get(name) is not definition:
+                return False
+        return True
+
+    def run(self, names, params, values, env):
+        """
+        Runs the translated function.
+
+        :param names: The variables of the function other than its parameters.
+        :param params: The parameter names of the function.
+        :param values: The evaluated argument values.
+        :param env: The environment of the caller.
+        :return: The result of the function call.
+        """
+        if self.fast is not None:
+            return self.fast(*values)
+        return self.function(enter_frame(env, names, params, values))
+
+
+class Module:
+    """
+    Python source being generated for one JIT entry, with the namespace it runs in.
+    """
+
+    def __init__(self, jit):
+        """
+        Initializes an empty Module.
+
+        :param jit: The Jit that owns the generated code.
+        """
+        self.jit = jit
+        self.lines = []
+        self.deps = {}
+        self.translated = set()
+        self.namespace = {
+            "_print": jit.compiler.print,
+            "_missing": jit.missing,
+            "_divzero": jit.divide_by_zero,
+            "_call": jit.call_values,
+            "_ReturnValue": ReturnValue,
+        }
+        for name, function in math_functions.items():
+            self.namespace[f"_m_{name}"] = function
+
+    def constant(self, value):
+        """
+        Stores a value in the namespace of the module.
+
+        :param value: The value to be stored.
+        :return: The name under which the value can be referenced.
+        """
+        name = f"_c{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def fast_function(self, name):
+        """
+        Translates a closed user-defined function into the module, along with every
+        function it calls, and returns its Python name.
+
+        :param name: The name of the user-defined function.
+        :return: The name of the generated Python function.
+        """
+        if name not in self.translated:
+            definition = self.jit.functions.get(name)
+            if definition is None:
+                raise Untranslatable(name)
+
+            self.translated.add(name)
+            self.deps[name] = definition
+            params, body = definition
+
+            translator = Translator(self, set(params), check_flow=True)
+            translator.body(body)
+            args = ", ".join(f"v_{param}" for param in params)
+            self.lines += [f"def f_{name}({args}):"] + translator.lines
+
+        return f"f_{name}"
+
+    def build(self, entry, label):
+        """
+        Compiles the generated source and returns one of its functions.
+
+        :param entry: The name of the Python function to return.
+        :param label: A description of the translated code for tracebacks.
+        :return: The compiled Python function.
+        """
+        source = "\n".join(self.lines) + "\n"
+        try:
+            code = compile(source, f"<jit {label}>", "exec")
+        except SyntaxError as e:
+            raise Untranslatable(label) from e
+        return self.load(code, entry), source
+
+    def load(self, code, entry):
+        """
+        Runs the compiled code of the module and returns one of its functions. The
+        calls between translated functions go through their result caches.
+
+        :param code: The code object of the generated source.
+        :param entry: The name of the Python function to return.
+        :return: The Python function.
+        """
+        exec(code, self.namespace)  # pylint: disable=W0122
+        function = self.namespace[entry]
+
+        memo = self.jit.compiler.memo
+        if memo is not None:
+            for name in self.translated:
+                python_name = f"f_{name}"
+                self.namespace[python_name] = memo.wrap(
+                    name, self.namespace[python_name]
+                )
+        return function
+
+
+class Translator:
+    """
+    Translates statements and expressions of the tuple AST into Python source.
+
+    Variables are either read from the `env` dictionary, or, when `local_names` is
+    given, kept in Python locals named `v_<name>`.
+    """
+
+    def __init__(self, module, local_names=None, check_flow=False, in_function=True):
+        """
+        Initializes a Translator.
+
+        :param module: The Module receiving the generated lines.
+        :param local_names: The variables held in Python locals, or None for dict access.
+        :param check_flow: Whether every read must follow an assignment or be a parameter.
+        :param in_function: Whether `return` ends the generated function, as opposed to
+                            raising ReturnValue out of a translated loop.
+        """
+        self.module = module
+        self.lines = []
+        self.fast = local_names is not None
+        self.check_flow = check_flow
+        self.in_function = in_function
+        self.assigned = set(local_names) if self.fast else set()
+        self.stores = set()
+        self.indent = 1
+        self.temps = 0
+
+    def emit(self, line):
+        """
+        Appends a line of source at the current indentation.
+
+        :param line: The line to be appended.
+        """
+        self.lines.append("    " * self.indent + line)
+
+    def body(self, statements):
+        """
+        Translates the body of a function, returning the value of its last statement.
+
+        :param statements: A list of AST nodes.
+        """
+        self.block(statements, True)
+
+    def block(self, statements, tail):
+        """
+        Translates a list of statements.
+
+        :param statements: A list of AST nodes.
+        :param tail: Whether the value of the last statement must be returned.
+        """
+        if not statements:
+            self.emit("return None" if tail else "pass")
+            return
+        for index, stmt in enumerate(statements):
+            self.statement(stmt, tail and index == len(statements) - 1)
+
+    def statement(self, node, tail):  # pylint: disable=R0912
+        """
+        Translates a statement.
+
+        :param node: The AST node of the statement.
+        :param tail: Whether the value of the statement must be returned.
+        """
+        op = node[0] if isinstance(node, tuple) else None
+
+        if isinstance(node, list):
+            self.block(node, tail)
+        elif op == "assign":
+            value = self.expression(node[2])
+            self.emit(f"{self.store(node[1])} = {value}")
+            if tail:
+                self.emit(f"return {self.store(node[1])}")
+        elif op == "print":
+            self.emit(f"_print({self.expression(node[1])})")
+            if tail:
+                self.emit("return None")
+        elif op == "def" and not self.fast:
+            self.emit(f"_define({self.module.constant(node)})")
+            self.module.namespace["_define"] = self.module.jit.define
+            if tail:
+                self.emit("return None")
+        elif op == "return":
+            value = self.expression(node[1])
+            self.emit(
+                f"return {value}"
+                if self.in_function
+                else f"raise _ReturnValue({value})"
+            )
+        elif op == "if":
+            self.if_statement(node, tail)
+        elif op == "while":
+            self.while_statement(node)
+            if tail:
+                self.emit(f"return {self.loop_result()}")
+        elif op in ("block", "parallel"):
+            self.block(node[1], tail)
+        else:
+            value = self.expression(node)
+            self.emit(f"return {value}" if tail else value)
+
+    def if_statement(self, node, tail):
+        """
+        Translates an if statement, with an optional else block.
+
+        :param node: A tuple of the form ("if", condition, block[, else_block]).
+        :param tail: Whether the value of the executed block must be returned.
+        """
+        before = set(self.assigned)
+        self.emit(f"if {self.expression(node[1])}:")
+        self.indent += 1
+        self.block(node[2], tail)
+        after_then = self.assigned
+
+        self.assigned = set(before)
+        if len(node) > 3:
+            self.indent -= 1
+            self.emit("else:")
+            self.indent += 1
+            self.block(node[3], tail)
+        elif tail:
+            self.indent -= 1
+            self.emit("else:")
+            self.indent += 1
+            self.emit("return None")
+        self.indent -= 1
+        self.assigned &= after_then
+
+    def while_statement(self, node):
+        """
+        Translates a while loop.
+
+        :param node: A tuple of the form ("while", condition, block).
+        """
+        before = set(self.assigned)
+        self.emit(f"while {self.expression(node[1])}:")
+        self.indent += 1
+        self.block(node[2], False)
+        self.indent -= 1
+        self.assigned = before
+
+    def loop_result(self):
+        """
+        Returns the expression for the value of a while loop, the variable x.
+
+        :return: The Python expression.
+        """
+        if not self.fast:
+            return 'env.get("x", 0)'
+        return self.load("x")
+
+    def store(self, name):
+        """
+        Returns the assignment target for a variable.
+
+        :param name: The name of the variable.
+        :return: The Python assignment target.
+        """
+        self.stores.add(name)
+        if self.fast:
+            self.assigned.add(name)
+            return f"v_{name}"
+        return f"env[{name!r}]"
+
+    def load(self, name):
+        """
+        Returns the expression reading a variable.
+
+        :param name: The name of the variable.
+        :return: The Python expression.
+        """
+        if not self.fast:
+            return f"(env[{name!r}] if {name!r} in env else _missing({name!r}, env))"
+        if self.check_flow and name not in self.assigned:
+            raise Untranslatable(name)
+        return f"v_{name}"
+
+    def expression(self, node):  # pylint: disable=R0911
+        """
+        Translates an expression.
+
+        :param node: The AST node of the expression.
+        :return: The Python expression.
+        """
+        if not isinstance(node, (int, float, tuple)):
+            raise Untranslatable(node)
+
+        if not isinstance(node, tuple):
+            return repr(node)
+
+        op = node[0]
+
+        if op in PYTHON_OPERATORS:
+            left = self.expression(node[1])
+            right = self.expression(node[2])
+            return f"({left} {PYTHON_OPERATORS[op]} {right})"
+        if op == "/":
+            temp = f"_d{self.temps}"
+            self.temps += 1
+            right = self.expression(node[2])
+            left = self.expression(node[1])
+            return f"({left} / {temp} if ({temp} := {right}) != 0 else _divzero())"
+        if op == "neg":
+            return f"(-{self.expression(node[1])})"
+        if op == "var":
+            return self.load(node[1])
+        if op == "call":
+            return self.call(node[1], node[2])
+        if op == "if-else":
+            condition, then, otherwise = (self.expression(n) for n in node[1:4])
+            return f"({then} if {condition} else {otherwise})"
+
+        raise Untranslatable(op)
+
+    def call(self, name, arg_nodes):
+        """
+        Translates a call to a mathematical or user-defined function.
+
+        :param name: The name of the function.
+        :param arg_nodes: A list of AST nodes representing the arguments.
+        :return: The Python expression.
+        """
+        args = [self.expression(arg) for arg in arg_nodes]
+
+        if name in math_functions:
+            return f"_m_{name}({', '.join(args)})"
+
+        definition = self.module.jit.functions.get(name)
+        if definition is None or len(definition[0]) != len(args):
+            raise Untranslatable(name)
+
+        if self.fast:
+            return f"{self.module.fast_function(name)}({', '.join(args)})"
+        return f"_call({', '.join([repr(name), 'env'] + args)})"
+
+
+class LoopTier:
+    """
+    Iteration counter and translated code of a single while loop.
+    """
+
+    def __init__(self, jit, node):
+        """
+        Initializes a LoopTier.
+
+        :param jit: The Jit that owns the loop.
+        :param node: A tuple of the form ("while", condition, block).
+        """
+        self.jit = jit
+        self.node = node
+        self.iterations = 0
+        self.threshold = jit.hot_iterations
+        self.entry = None
+
+    def code(self):
+        """
+        Returns the translated loop if it is available and still valid.
+
+        :return: A Python function taking the environment, or None.
+        """
+        entry = self.entry
+        if entry is None:
+            return None
+        if entry.is_valid(self.jit.functions):
+            return entry.function
+        self.entry = None
+        self.iterations = 0
+        self.threshold = self.jit.hot_iterations
+        return None
+
+    def promote(self):
+        """
+        Translates the loop once it became hot.
+
+        :return: A Python function taking the environment, or None if the loop cannot
+                 be translated.
+        """
+        self.entry = self.jit.translate_loop(self.node)
+        if self.entry is None:
+            self.threshold = float("inf")
+            return None
+        return self.entry.function
+
+
+class Jit:
+    """
+    Tiering layer of the compiler.
+
+    It counts calls of user-defined functions and iterations of while loops, and
+    once they are hot translates them to Python source run through `compile()`.
+    Functions that only read their parameters and local variables, and only call
+    other such functions, are translated to plain Python functions with locals and
+    skip the environment copy. The others are translated to code working on the
+    environment dictionary.
+    """
+
+    def __init__(self, compiler, hot_calls=HOT_CALLS, hot_iterations=HOT_ITERATIONS):
+        """
+        Initializes a Jit.
+
+        :param compiler: The Compiler whose function table is used.
+        :param hot_calls: The number of calls after which a function is translated.
+        :param hot_iterations: The number of iterations after which a loop is translated.
+        """
+        self.compiler = compiler
+        self.functions = compiler.functions
+        self.hot_calls = hot_calls
+        self.hot_iterations = hot_iterations
+        self.counts = {}
+        self.entries = {}
+
+    def lookup(self, name, definition):
+        """
+        Counts a call and returns the translated function if it is hot.
+
+        :param name: The name of the function being called.
+        :param definition: The (params, body) tuple of the function.
+        :return: The JitEntry of the function, or None to use the closures.
+        """
+        entry = self.entries.get(name)
+        if entry is not None:
+            if entry.is_valid(self.functions):
+                return entry if entry.fast or entry.function else None
+            self.invalidate(name)
+
+        count = self.counts.get(name, 0) + 1
+        self.counts[name] = count
+        if count < self.hot_calls:
+            return None
+
+        entry = self.translate_function(name, definition)
+        self.entries[name] = entry
+        return entry if entry.fast or entry.function else None
+
+    def invalidate(self, name):
+        """
+        Drops the translated code and call count of a function.
+
+        :param name: The name of the function.
+        """
+        self.entries.pop(name, None)
+        self.counts.pop(name, None)
+
+    def translate_function(self, name, definition):
+        """
+        Translates a user-defined function, as a closed function when possible.
+
+        :param name: The name of the function.
+        :param definition: The (params, body) tuple of the function.
+        :return: A JitEntry, without code if the function cannot be translated.
+        """
+        try:
+            module = Module(self)
+            python_name = module.fast_function(name)
+            fast, source = module.build(python_name, name)
+            return JitEntry(module.deps, fast=fast, source=source)
+        except Untranslatable:
+            pass
+
+        deps = {name: definition}
+        try:
+            module = Module(self)
+            translator = Translator(module)
+            translator.body(definition[1])
+            module.lines += ["def _function(env):"] + translator.lines
+            function, source = module.build("_function", name)
+            return JitEntry(deps, function=function, source=source)
+        except Untranslatable:
+            return JitEntry(deps)
+
+    def translate_loop(self, node):
+        """
+        Translates a while loop.
+
+        The loop is first translated to code working on the environment dictionary.
+        When the loop does not define or call functions that need the environment,
+        a faster version is added that keeps every variable of the loop in Python
+        locals, provided they all exist when the loop starts.
+
+        :param node: A tuple of the form ("while", condition, block).
+        :return: A JitEntry, or None if the loop cannot be translated.
+        """
+        try:
+            module = Module(self)
+            translator = Translator(module, in_function=False)
+            translator.while_statement(node)
+            module.lines += ["def _loop(env):"] + translator.lines
+            module.lines.append('    return env.get("x", 0)')
+            fallback, source = module.build("_loop", "while")
+        except Untranslatable:
+            return None
+
+        try:
+            return self.translate_fast_loop(node, fallback)
+        except Untranslatable:
+            return JitEntry({}, function=fallback, source=source)
+
+    def translate_fast_loop(self, node, fallback):
+        """
+        Translates a while loop keeping its variables in Python locals.
+
+        :param node: A tuple of the form ("while", condition, block).
+        :param fallback: The dictionary version, used when a variable is missing.
+        :return: A JitEntry.
+        """
+        names = sorted(collect_variables(node))
+        module = Module(self)
+        translator = Translator(module, set(names), in_function=False)
+        translator.indent = 2
+        translator.while_statement(node)
+
+        module.lines += [
+            "def _loop(env):",
+            f"    if not env.keys() >= {module.constant(frozenset(names))}:",
+            f"        return {module.constant(fallback)}(env)",
+        ]
+        module.lines += [f"    v_{name} = env[{name!r}]" for name in names]
+        module.lines += ["    try:"] + translator.lines + ["    finally:"]
+        module.lines += [
+            f"        env[{n!r}] = v_{n}" for n in sorted(translator.stores)
+        ]
+        module.lines.append("        pass")
+        result = "v_x" if "x" in names else 'env.get("x", 0)'
+        module.lines.append(f"    return {result}")
+
+        function, source = module.build("_loop", "while")
+        return JitEntry(module.deps, function=function, source=source)
+
+    def call_values(self, name, env, *values):
+        """
+        Calls a user-defined function with evaluated arguments, from translated code.
+
+        :param name: The name of the function.
+        :param env: The environment of the caller.
+        :param values: The evaluated argument values.
+        :return: The result of the function call, or 0 if an error occurs.
+        """
+        definition = self.compiler.resolve(name, len(values))
+        if definition is None:
+            return 0
+        return self.compiler.invoke(name, definition, values, env)
+
+    def define(self, node):
+        """
+        Runs a function definition from translated code.
+
+        :param node: A tuple of the form ("def", name, params, body).
+        """
+        define_function(node, self.functions, self.compiler.report)
+
+    def missing(self, name, env):
+        """
+        Reports a variable that is not defined, from translated code.
+
+        :param name: The name of the variable.
+        :param env: The environment in which the variable was looked up.
+        :return: 0, the value of an undefined variable.
+        """
+        return eval_variable(name, env, self.compiler.report)
+
+    def divide_by_zero(self):
+        """
+        Reports a division by zero from translated code, like `eval_ast` does.
+
+        :return: 0, the result of a division by zero.
+        """
+        self.compiler.report("Error: division by zero", "division-by-zero")
+        return 0
+
+
+def collect_variables(node, names=None):
+    """
+    Collects the names of every variable read or assigned inside a node.
+
+    :param node: The AST node to be inspected.
+    :param names: Optional set receiving the names.
+    :return: The set of variable names.
+    """
+    names = set() if names is None else names
+
+    if isinstance(node, list):
+        for child in node:
+            collect_variables(child, names)
+    elif isinstance(node, tuple) and node:
+        if node[0] in ("var", "assign"):
+            names.add(node[1])
+        if node[0] == "call":
+            collect_variables(node[2], names)
+        elif node[0] != "def":
+            for child in node[1:]:
+                collect_variables(child, names)
+
+    return names
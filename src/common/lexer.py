@@ -1,6 +1,9 @@
 """Modulo lexer."""
 
-from ply import lex
+import sys
+
+from .output import channels
+from .tables import Lazy, build_lexer
 
 reserved = {
     "if": "IF",
@@ -106,13 +109,28 @@ def t_error(t):
     Handles errors in the lexer.
 
     This function is called when an illegal character is encountered
-    during lexical analysis. It prints an error message indicating
-    the illegal character and skips it to continue processing.
+    during lexical analysis. It reports an error message indicating
+    the illegal character, through the `report` attribute of the lexer if it has
+    one, else through the global channels, and skips it to continue processing.
 
     :param t: The token containing the illegal character.
     """
-    print(f"Character illegal '{t.value[0]}' at line {t.lineno}.")
+    report = getattr(t.lexer, "report", channels.report)
+    report(
+        f"Character illegal '{t.value[0]}' at line {t.lineno}.",
+        "illegal-character",
+        t.lineno,
+    )
     t.lexer.skip(1)
 
 
-lexer = lex.lex()
+def get_lexer():
+    """
+    Returns the shared lexer, building it from the shipped tables on first use.
+
+    :return: The lexer.
+    """
+    return lexer.get()
+
+
+lexer = Lazy(lambda: build_lexer(sys.modules[__name__]))
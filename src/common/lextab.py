@@ -0,0 +1,15 @@
+# Generated by `make tables`; do not edit.
+# pylint: skip-file
+# isort: skip_file
+# fmt: off
+# lextab.py. This file automatically created by PLY (version 3.11). Don't edit!
+_tabversion   = '3.10'
+_lextokens    = set(('ABS', 'COMMA', 'COS', 'DEF', 'DIVIDE', 'ELSE', 'EQ', 'EQUALS', 'EXP', 'GE', 'GT', 'ID', 'IF', 'LBRACE', 'LE', 'LOG', 'LPAREN', 'LT', 'MINUS', 'NE', 'NUMBER', 'PLUS', 'POWER', 'PRINT', 'RBRACE', 'RETURN', 'RPAREN', 'SIN', 'SQRT', 'TAN', 'TIMES', 'WHILE'))
+_lexreflags   = 64
+_lexliterals  = ''
+_lexstateinfo = {'INITIAL': 'inclusive'}
+_lexstatere   = {'INITIAL': [('(?P<t_ID>[a-zA-Z_][a-zA-Z0-9_]*)|(?P<t_NUMBER>\\d+(\\.\\d+)?)|(?P<t_COMMENT_LINE>//.*)|(?P<t_COMMENT_BLOCK>/\\*.*?\\*/)|(?P<t_newline>\\n+)|(?P<t_EQ>==)|(?P<t_GE>>=)|(?P<t_LBRACE>\\{)|(?P<t_LE><=)|(?P<t_LPAREN>\\()|(?P<t_NE>!=)|(?P<t_PLUS>\\+)|(?P<t_POWER>\\^)|(?P<t_RBRACE>\\})|(?P<t_RPAREN>\\))|(?P<t_TIMES>\\*)|(?P<t_COMMA>,)|(?P<t_DIVIDE>/)|(?P<t_EQUALS>=)|(?P<t_GT>>)|(?P<t_LT><)|(?P<t_MINUS>-)', [None, ('t_ID', 'ID'), ('t_NUMBER', 'NUMBER'), None, ('t_COMMENT_LINE', 'COMMENT_LINE'), ('t_COMMENT_BLOCK', 'COMMENT_BLOCK'), ('t_newline', 'newline'), (None, 'EQ'), (None, 'GE'), (None, 'LBRACE'), (None, 'LE'), (None, 'LPAREN'), (None, 'NE'), (None, 'PLUS'), (None, 'POWER'), (None, 'RBRACE'), (None, 'RPAREN'), (None, 'TIMES'), (None, 'COMMA'), (None, 'DIVIDE'), (None, 'EQUALS'), (None, 'GT'), (None, 'LT'), (None, 'MINUS')])]}
+_lexstateignore = {'INITIAL': ' \t'}
+_lexstateerrorf = {'INITIAL': 't_error'}
+_lexstateeoff = {}
+_grammar_version = '45720675cfe1a7fef5800e8384a6e34a8a0f877f88e6428028b87ae3b52e891c'
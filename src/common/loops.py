@@ -0,0 +1,528 @@
+"""Modulo loops."""
+
+import operator
+from collections import Counter
+
+from .interpreter import math_functions
+from .scope import assigned_names
+
+UNSET = object()
+
+HOISTED = "hoisted"
+
+PURE_OPERATORS = {
+    "+",
+    "-",
+    "*",
+    "^",
+    "<",
+    ">",
+    "==",
+    "!=",
+    "<=",
+    ">=",
+    "neg",
+    "if-else",
+}
+
+LINEAR_OPERATORS = {"+", "-", "*", "neg"}
+
+COMPARISONS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "!=": operator.ne,
+}
+
+FLIPPED = {"<": ">", "<=": ">=", ">": "<", ">=": "<=", "!=": "!="}
+
+NUMBERS = (int, float)
+
+
+def is_number(value):
+    """
+    Checks whether a value is an int or a float, and not a bool.
+
+    :param value: The value to be checked.
+    :return: True if the value is a number.
+    """
+    return value.__class__ in NUMBERS
+
+
+def expression_variables(node, names):  # pylint: disable=R0911
+    """
+    Collects the variables an expression reads, if it has no side effects.
+
+    An expression has side effects when it calls a user-defined function, or
+    divides by something other than a non-zero constant, which may print an error.
+
+    :param node: The AST node of the expression.
+    :param names: The set receiving the names.
+    :return: True if the expression is pure.
+    """
+    if isinstance(node, (int, float)):
+        return True
+    if not isinstance(node, tuple):
+        return False
+    op = node[0]
+    if op == "var":
+        names.add(node[1])
+        return True
+    if op == HOISTED:
+        return True
+    if op == "call":
+        return node[1] in math_functions and all(
+            expression_variables(arg, names) for arg in node[2]
+        )
+    if op == "/":
+        divisor = node[2]
+        if not isinstance(divisor, (int, float)) or divisor == 0:
+            return False
+    elif op not in PURE_OPERATORS:
+        return False
+    return all(expression_variables(child, names) for child in node[1:])
+
+
+def operation_count(node):
+    """
+    Estimates the cost of an expression, as its number of operators, a call to a
+    mathematical function counting as two.
+
+    :param node: The AST node of the expression.
+    :return: The number of operations.
+    """
+    if not isinstance(node, tuple) or node[0] in ("var", HOISTED):
+        return 0
+    if node[0] == "call":
+        return 2 + sum(operation_count(child) for child in node[2])
+    return 1 + sum(operation_count(child) for child in node[1:])
+
+
+def count_assignments(node, name):
+    """
+    Counts the assignments to a variable inside a node, outside function bodies.
+
+    :param node: The AST node to be inspected.
+    :param name: The name of the variable.
+    :return: The number of assignments.
+    """
+    if isinstance(node, list):
+        return sum(count_assignments(child, name) for child in node)
+    if not isinstance(node, tuple) or not node or node[0] == "def":
+        return 0
+    own = 1 if node[0] == "assign" and node[1] == name else 0
+    return own + sum(count_assignments(child, name) for child in node[1:])
+
+
+def linear_degree(node, counter, constants):  # pylint: disable=R0911
+    """
+    Returns the degree of an expression as a polynomial of the loop counter.
+
+    :param node: The AST node of the expression.
+    :param counter: The name of the counter.
+    :param constants: The variables that do not change in the loop.
+    :return: 0 or 1, or None if the expression is not linear in the counter.
+    """
+    if isinstance(node, (int, float)):
+        return 0
+    if not isinstance(node, tuple):
+        return None
+    op = node[0]
+    if op == "var":
+        if node[1] == counter:
+            return 1
+        return 0 if node[1] in constants else None
+    if op not in LINEAR_OPERATORS:
+        return None
+    degrees = [linear_degree(child, counter, constants) for child in node[1:]]
+    if None in degrees:
+        return None
+    degree = sum(degrees) if op == "*" else max(degrees)
+    return degree if degree <= 1 else None
+
+
+def iteration_count(op, start, step, limit):
+    """
+    Computes the number of iterations of a counting loop on integers.
+
+    :param op: The comparison of the condition, with the counter on the left.
+    :param start: The value of the counter when the loop starts.
+    :param step: The increment of the counter, not zero.
+    :param limit: The value the counter is compared with.
+    :return: The number of iterations, or None if the loop never ends.
+    """
+    if not COMPARISONS[op](start, limit):
+        return 0
+    if op in ("<", "<=") and step > 0:
+        span = limit - start + (0 if op == "<=" else step - 1)
+        return span // step + (1 if op == "<=" else 0)
+    if op in (">", ">=") and step < 0:
+        span = start - limit + (0 if op == ">=" else -step - 1)
+        return span // -step + (1 if op == ">=" else 0)
+    if op == "!=" and (limit - start) % step == 0 and (limit - start) // step > 0:
+        return (limit - start) // step
+    return None
+
+
+class Counting:  # pylint: disable=R0903
+    """
+    Shape of a loop driven by a counter: `while (i < limit) { ... i = i + step ... }`.
+    """
+
+    def __init__(self, name, op, limit, step, position):
+        """
+        Initializes a Counting.
+
+        :param name: The name of the counter.
+        :param op: The comparison of the condition, with the counter on the left.
+        :param limit: The AST node the counter is compared with.
+        :param step: The constant increment of the counter.
+        :param position: The index of the increment in the body of the loop.
+        """
+        self.name = name
+        self.op = op
+        self.limit = limit
+        self.step = step
+        self.position = position
+
+
+class LoopOptimizer:
+    """
+    Loop analysis pass of the Compiler.
+
+    While loops are specialized when their shape allows it, each with a fallback to
+    the regular loop when the values found at run time do not fit:
+
+    * pure subexpressions that only read variables the loop never assigns are
+      hoisted: they are evaluated once per run of the loop, the first time they are
+      needed, instead of on every iteration;
+    * loops counting a variable up or down by a constant step until a bound that
+      the loop does not change run with a native counter, without evaluating the
+      condition tree;
+    * counting loops on integers whose other statements only accumulate a linear
+      function of the counter, such as `s = s + 2 * i + k`, are replaced by the
+      closed form of the sums.
+    """
+
+    def __init__(self, compiler, native=True):
+        """
+        Initializes a LoopOptimizer.
+
+        :param compiler: The Compiler of the loops.
+        :param native: Whether loops are hoisted and run with native counters. When
+                       the JIT translates hot loops, only closed forms are used.
+        """
+        self.compiler = compiler
+        self.native = native
+        self.stats = Counter()
+
+    def compile(self, node, fallback):
+        """
+        Compiles a while loop into a specialized closure.
+
+        :param node: A tuple of the form ("while", condition, block).
+        :param fallback: The closure of the regular loop.
+        :return: The specialized closure, or None if the loop has no special shape.
+        """
+        assigned = set()
+        assigned_names(node[2], assigned)
+        counting = self.counting(node, assigned)
+        closed = None
+        if counting is not None:
+            closed = self.closed_form(node, counting, assigned)
+
+        optimized = None
+        if self.native:
+            optimized = self.native_loop(node, counting, assigned, fallback)
+        if closed is None:
+            return optimized
+
+        self.stats["closed"] += 1
+        return self.closed_loop(counting, closed, optimized or fallback)
+
+    def counting(self, node, assigned):
+        """
+        Recognizes the counter of a loop.
+
+        :param node: A tuple of the form ("while", condition, block).
+        :param assigned: The variables the loop assigns.
+        :return: A Counting, or None if the loop is not driven by a counter.
+        """
+        condition = node[1]
+        if not isinstance(condition, tuple) or condition[0] not in COMPARISONS:
+            return None
+        op, left, right = condition
+        if isinstance(right, tuple) and right[0] == "var" and right[1] in assigned:
+            op, left, right = FLIPPED[op], right, left
+        if not isinstance(left, tuple) or left[0] != "var":
+            return None
+        name = left[1]
+        limit_names = set()
+        if not expression_variables(right, limit_names) or limit_names & assigned:
+            return None
+        if count_assignments(node[2], name) != 1:
+            return None
+
+        for position, statement in enumerate(node[2]):
+            step = increment(statement, name)
+            if step is not None:
+                return Counting(name, op, right, step, position)
+        return None
+
+    def closed_form(self, node, counting, assigned):  # pylint: disable=R0911
+        """
+        Recognizes a loop whose statements, besides the increment, only accumulate
+        linear functions of the counter.
+
+        :param node: A tuple of the form ("while", condition, block).
+        :param counting: The Counting of the loop.
+        :param assigned: The variables the loop assigns.
+        :return: A list of (name, sign, after, expression) tuples, one per
+                 accumulation, or None if the loop has another shape.
+        """
+        if counting.op == "!=" and not isinstance(counting.step, int):
+            return None
+        accumulations = []
+        for position, statement in enumerate(node[2]):
+            if position == counting.position:
+                continue
+            accumulation = accumulate(statement)
+            if accumulation is None:
+                return None
+            name, sign, expression = accumulation
+            if name == counting.name or count_assignments(node[2], name) != 1:
+                return None
+            constants = set()
+            if not expression_variables(expression, constants):
+                return None
+            constants.discard(counting.name)
+            if constants & assigned:
+                return None
+            if linear_degree(expression, counting.name, constants) is None:
+                return None
+            accumulations.append((name, sign, position > counting.position, expression))
+        return accumulations
+
+    def native_loop(self, node, counting, assigned, fallback):
+        """
+        Compiles a loop with its invariant subexpressions hoisted and, for counting
+        loops, a native counter.
+
+        :param node: A tuple of the form ("while", condition, block).
+        :param counting: The Counting of the loop, or None.
+        :param assigned: The variables the loop assigns.
+        :param fallback: The closure of the regular loop.
+        :return: The compiled closure, or None if nothing can be optimized.
+        """
+        slots = []
+        required = set()
+        condition = self.hoist(node[1], assigned, slots, required)
+        body = [self.hoist(stmt, assigned, slots, required) for stmt in node[2]]
+        if counting is None and not slots:
+            return None
+
+        if counting is not None:
+            return self.counted_loop(counting, body, slots, required, fallback)
+
+        self.stats["hoisted"] += 1
+        required = frozenset(required)
+        condition = self.compiler.compile(condition)
+        block = self.compiler.compile_block(body)
+
+        def hoisted_loop(env):
+            if not env.keys() >= required:
+                return fallback(env)
+            saved = slots[:]
+            slots[:] = [UNSET] * len(saved)
+            try:
+                while condition(env):
+                    block(env)
+            finally:
+                slots[:] = saved
+            return env.get("x", 0)
+
+        return hoisted_loop
+
+    def counted_loop(self, counting, body, slots, required, fallback):
+        """
+        Compiles a counting loop run with a native counter.
+
+        :param counting: The Counting of the loop.
+        :param body: The statements of the loop, with their hoisted nodes.
+        :param slots: The list of values of the hoisted expressions of the loop.
+        :param required: The variables of the hoisted expressions.
+        :param fallback: The closure of the regular loop.
+        :return: The compiled closure.
+        """
+        self.stats["counted"] += 1
+        name = counting.name
+        step = counting.step
+        test = COMPARISONS[counting.op]
+        limit = self.compiler.compile(counting.limit)
+        before = self.compiler.compile_block(body[: counting.position])
+        after = self.compiler.compile_block(body[counting.position + 1 :])
+        required = frozenset(required | {name} | variables_of(counting.limit))
+
+        def counted_loop(env):
+            if not env.keys() >= required:
+                return fallback(env)
+            value = env[name]
+            if not is_number(value):
+                return fallback(env)
+            saved = slots[:]
+            slots[:] = [UNSET] * len(saved)
+            try:
+                bound = limit(env)
+                if not is_number(bound):
+                    return fallback(env)
+                while test(value, bound):
+                    before(env)
+                    env[name] = value = value + step
+                    after(env)
+            finally:
+                slots[:] = saved
+            return env.get("x", 0)
+
+        return counted_loop
+
+    def hoist(self, node, assigned, slots, required):
+        """
+        Replaces the invariant pure subexpressions of a node by hoisted nodes.
+
+        :param node: The AST node to be rewritten.
+        :param assigned: The variables the loop assigns.
+        :param slots: The list of values of the hoisted expressions of the loop.
+        :param required: The set receiving the variables of the hoisted expressions,
+                         which must exist when the loop starts.
+        :return: The rewritten node.
+        """
+        if isinstance(node, list):
+            return [self.hoist(child, assigned, slots, required) for child in node]
+        if not isinstance(node, tuple) or node[0] in ("var", "def", HOISTED):
+            return node
+
+        names = set()
+        if (
+            expression_variables(node, names)
+            and not names & assigned
+            and operation_count(node) >= 2
+        ):
+            slots.append(UNSET)
+            required |= names
+            return (HOISTED, slots, len(slots) - 1, node)
+
+        op = node[0]
+        if op in ("assign", "call"):
+            return (op, node[1], self.hoist(node[2], assigned, slots, required))
+        return (op,) + tuple(
+            self.hoist(child, assigned, slots, required) for child in node[1:]
+        )
+
+    def closed_loop(self, counting, accumulations, fallback):
+        """
+        Compiles a counting loop replaced by the closed form of its sums.
+
+        :param counting: The Counting of the loop.
+        :param accumulations: The accumulations returned by `closed_form`.
+        :param fallback: The closure used when the values are not all integers.
+        :return: The compiled closure.
+        """
+        name = counting.name
+        step = counting.step
+        op = counting.op
+        limit = self.compiler.compile(counting.limit)
+        compiled = [
+            (target, sign, after, self.compiler.compile(expression))
+            for target, sign, after, expression in accumulations
+        ]
+        required = {name} | variables_of(counting.limit)
+        for target, _, _, expression in accumulations:
+            required |= {target} | variables_of(expression)
+        required = frozenset(required)
+
+        def closed(env):  # pylint: disable=R0911
+            if not env.keys() >= required or step.__class__ is not int:
+                return fallback(env)
+            start = env[name]
+            bound = limit(env)
+            if start.__class__ is not int or bound.__class__ is not int:
+                return fallback(env)
+            if any(env[target].__class__ is not int for target, _, _, _ in compiled):
+                return fallback(env)
+            count = iteration_count(op, start, step, bound)
+            if count is None:
+                return fallback(env)
+            if count == 0:
+                return env.get("x", 0)
+
+            totals = []
+            for target, sign, after, expression in compiled:
+                env[name] = 0
+                constant = expression(env)
+                env[name] = 1
+                slope = expression(env) - constant
+                if constant.__class__ is not int or slope.__class__ is not int:
+                    env[name] = start
+                    return fallback(env)
+                first = start + step if after else start
+                counters = count * first + step * (count * (count - 1) // 2)
+                totals.append((target, sign * (slope * counters + constant * count)))
+
+            for target, total in totals:
+                env[target] += total
+            env[name] = start + count * step
+            return env.get("x", 0)
+
+        return closed
+
+
+def variables_of(node):
+    """
+    Returns the variables an expression reads.
+
+    :param node: The AST node of the expression.
+    :return: The set of variable names.
+    """
+    names = set()
+    expression_variables(node, names)
+    return names
+
+
+def increment(statement, name):
+    """
+    Recognizes `name = name + step`, `name = step + name` or `name = name - step`
+    with a non-zero constant step.
+
+    :param statement: The AST node of the statement.
+    :param name: The name of the counter.
+    :return: The step, or None if the statement is not an increment of the counter.
+    """
+    accumulation = accumulate(statement)
+    if accumulation is None or accumulation[0] != name:
+        return None
+    _, sign, step = accumulation
+    if not is_number(step) or step == 0:
+        return None
+    return sign * step
+
+
+def accumulate(statement):
+    """
+    Recognizes `name = name + expression`, `name = expression + name` or
+    `name = name - expression`.
+
+    :param statement: The AST node of the statement.
+    :return: A (name, sign, expression) tuple, or None.
+    """
+    if not isinstance(statement, tuple) or statement[0] != "assign":
+        return None
+    name, value = statement[1], statement[2]
+    if not isinstance(value, tuple) or value[0] not in ("+", "-"):
+        return None
+    this = ("var", name)
+    if value[1] == this and value[2] != this:
+        return name, 1 if value[0] == "+" else -1, value[2]
+    if value[0] == "+" and value[2] == this and value[1] != this:
+        return name, 1, value[1]
+    return None
@@ -0,0 +1,348 @@
+"""Modulo machine."""
+
+from .interpreter import (
+    ReturnValue,
+    define_function,
+    eval_variable,
+    global_env,
+    global_functions,
+    math_functions,
+)
+from .optimizer import FOLDABLE_OPERATIONS
+from .output import open_channels
+from .scope import enter_frame, scope_names
+
+MAX_DEPTH = 1_000_000
+
+OPERATIONS = {op: f for op, f in FOLDABLE_OPERATIONS.items() if op != "/"}
+
+# Kinds of the tasks on the continuation stack.
+EVAL = 0
+APPLY = 1
+SEQUENCE = 2
+DISCARD = 3
+STORE = 4
+BRANCH = 5
+LOOP = 6
+CALL = 7
+ENTER = 8
+LEAVE = 9
+RETURN = 10
+DIVIDE = 11
+QUOTIENT = 12
+NEGATE = 13
+PRINT = 14
+CHOOSE = 15
+
+
+class Machine:
+    """
+    Evaluator of the tuple AST that keeps its state on explicit stacks instead of
+    the Python call stack.
+
+    Pending work is a stack of continuation tasks and intermediate results are
+    kept on a value stack, so deeply nested expressions and deep user recursion do
+    not consume Python frames. `return` unwinds the stacks to the frame of the
+    current call instead of raising an exception. The number of nested user
+    function calls is limited by `max_depth`.
+
+    Results, printed output and error messages are the same as `run_compiled`.
+    """
+
+    def __init__(
+        self, functions=None, output=None, max_depth=MAX_DEPTH, diagnostics=None
+    ):
+        """
+        Initializes a Machine bound to a function table.
+
+        :param functions: The dictionary of user-defined functions. Defaults to the
+                          interpreter's global table.
+        :param output: Optional Sink or file receiving print statements, and error
+                       messages without a diagnostics channel. Defaults to the
+                       global output channel.
+        :param max_depth: The maximum number of nested user function calls.
+        :param diagnostics: Optional callable receiving the errors.
+        """
+        self.functions = global_functions if functions is None else functions
+        channels = open_channels(output, diagnostics)
+        self.print = channels.print
+        self.report = channels.report
+        self.max_depth = max_depth
+        self.scopes = {}
+
+    def run(self, node, env):  # pylint: disable=R0912,R0914,R0915
+        """
+        Evaluates an AST.
+
+        :param node: The root node of the AST.
+        :param env: The environment in which to evaluate the AST.
+        :return: The result of the evaluation.
+        :raises RecursionError: If the calls nest deeper than `max_depth`.
+        """
+        tasks = [(EVAL, node, env)]
+        values = []
+        frames = []
+
+        while tasks:
+            task = tasks.pop()
+            kind = task[0]
+
+            if kind == EVAL:
+                node = task[1]
+                if node.__class__ is int:
+                    values.append(node)
+                elif (
+                    node.__class__ is tuple and node[0] == "var" and node[1] in task[2]
+                ):
+                    values.append(task[2][node[1]])
+                else:
+                    self.evaluate(node, task[2], tasks, values)
+            elif kind == APPLY:
+                right = values.pop()
+                values[-1] = task[1](values[-1], right)
+            elif kind == SEQUENCE:
+                statements, index, scope = task[1], task[2], task[3]
+                if index < len(statements) - 1:
+                    tasks.append((SEQUENCE, statements, index + 1, scope))
+                    tasks.append((DISCARD,))
+                tasks.append((EVAL, statements[index], scope))
+            elif kind == DISCARD:
+                values.pop()
+            elif kind == STORE:
+                task[2][task[1]] = values[-1]
+            elif kind == BRANCH:
+                self.branch(task[1], task[2], values.pop(), tasks, values)
+            elif kind == LOOP:
+                self.loop(task[1], task[2], values.pop(), tasks, values)
+            elif kind == CALL:
+                count = task[2]
+                args = values[len(values) - count :]
+                del values[len(values) - count :]
+                values.append(task[1](*args))
+            elif kind == ENTER:
+                if len(frames) >= self.max_depth:
+                    raise RecursionError(
+                        f"maximum call depth of {self.max_depth} exceeded"
+                    )
+                task_height = len(tasks)
+                self.enter(task[1], task[2], tasks, values)
+                frames.append((task_height, len(values)))
+            elif kind == LEAVE:
+                frames.pop()
+            elif kind == RETURN:
+                if not frames:
+                    raise ReturnValue(values.pop())
+                task_height, value_height = frames.pop()
+                values[value_height] = values[-1]
+                del values[value_height + 1 :]
+                del tasks[task_height:]
+            elif kind == DIVIDE:
+                divisor = values.pop()
+                if divisor != 0:
+                    tasks.append((QUOTIENT, divisor))
+                    tasks.append((EVAL, task[1], task[2]))
+                else:
+                    self.report("Error: division by zero", "division-by-zero")
+                    values.append(0)
+            elif kind == QUOTIENT:
+                values[-1] = values[-1] / task[1]
+            elif kind == NEGATE:
+                values[-1] = -values[-1]
+            elif kind == PRINT:
+                self.print(values.pop())
+                values.append(None)
+            elif kind == CHOOSE:
+                node = task[1]
+                chosen = node[2] if values.pop() else node[3]
+                tasks.append((EVAL, chosen, task[2]))
+
+        return values.pop() if values else None
+
+    def evaluate(self, node, env, tasks, values):  # pylint: disable=R0912
+        """
+        Evaluates a number or a variable directly, and schedules the tasks that
+        evaluate any other node.
+
+        :param node: The AST node.
+        :param env: The environment of the node.
+        :param tasks: The continuation stack.
+        :param values: The value stack.
+        """
+        if isinstance(node, (int, float)):
+            values.append(node)
+            return
+        if isinstance(node, list):
+            self.sequence(node, env, tasks, values)
+            return
+        if not isinstance(node, tuple):
+            values.append(0)
+            return
+
+        op = node[0]
+
+        if op in OPERATIONS:
+            tasks.append((APPLY, OPERATIONS[op]))
+            tasks.append((EVAL, node[2], env))
+            tasks.append((EVAL, node[1], env))
+        elif op == "var":
+            name = node[1]
+            values.append(
+                env[name] if name in env else eval_variable(name, env, self.report)
+            )
+        elif op == "assign":
+            tasks.append((STORE, node[1], env))
+            tasks.append((EVAL, node[2], env))
+        elif op == "call":
+            self.call(node[1], node[2], env, tasks, values)
+        elif op == "/":
+            tasks.append((DIVIDE, node[1], env))
+            tasks.append((EVAL, node[2], env))
+        elif op == "neg":
+            tasks.append((NEGATE,))
+            tasks.append((EVAL, node[1], env))
+        elif op in ("if", "while"):
+            tasks.append((BRANCH if op == "if" else LOOP, node, env))
+            tasks.append((EVAL, node[1], env))
+        elif op == "return":
+            tasks.append((RETURN,))
+            tasks.append((EVAL, node[1], env))
+        elif op == "print":
+            tasks.append((PRINT,))
+            tasks.append((EVAL, node[1], env))
+        elif op in ("program", "block", "parallel"):
+            self.sequence(node[1], env, tasks, values)
+        elif op == "def":
+            define_function(node, self.functions, self.report)
+            values.append(None)
+        elif op == "if-else":
+            tasks.append((CHOOSE, node, env))
+            tasks.append((EVAL, node[1], env))
+        else:
+            self.report(f"Error: unknown operator '{op}'.", "unknown-operator")
+            values.append(0)
+
+    def sequence(self, statements, env, tasks, values):
+        """
+        Schedules a list of statements, whose value is the value of the last one.
+
+        :param statements: A list of AST nodes.
+        :param env: The environment of the statements.
+        :param tasks: The continuation stack.
+        :param values: The value stack.
+        """
+        if statements:
+            tasks.append((SEQUENCE, statements, 0, env))
+        else:
+            values.append(None)
+
+    def branch(self, node, env, condition, tasks, values):
+        """
+        Schedules the block of an if statement selected by its condition.
+
+        :param node: A tuple of the form ("if", condition, block[, else_block]).
+        :param env: The environment of the statement.
+        :param condition: The value of the condition.
+        :param tasks: The continuation stack.
+        :param values: The value stack.
+        """
+        if condition:
+            self.sequence(node[2], env, tasks, values)
+        elif len(node) > 3:
+            self.sequence(node[3], env, tasks, values)
+        else:
+            values.append(None)
+
+    def loop(self, node, env, condition, tasks, values):
+        """
+        Schedules the next iteration of a while loop, or pushes the value of the loop,
+        the variable x, when its condition is false.
+
+        :param node: A tuple of the form ("while", condition, block).
+        :param env: The environment of the loop.
+        :param condition: The value of the condition.
+        :param tasks: The continuation stack.
+        :param values: The value stack.
+        """
+        if not condition:
+            values.append(env.get("x", 0))
+            return
+        tasks.append((LOOP, node, env))
+        tasks.append((EVAL, node[1], env))
+        tasks.append((DISCARD,))
+        self.sequence(node[2], env, tasks, values)
+
+    def call(self, name, arg_nodes, env, tasks, values):
+        """
+        Schedules a call to a mathematical or user-defined function.
+
+        Errors are reported like `call_user_function` does, before the arguments
+        are evaluated.
+
+        :param name: The name of the function.
+        :param arg_nodes: A list of AST nodes representing the arguments.
+        :param env: The environment of the caller.
+        :param tasks: The continuation stack.
+        :param values: The value stack.
+        """
+        if name in math_functions:
+            tasks.append((CALL, math_functions[name], len(arg_nodes)))
+        else:
+            definition = self.functions.get(name)
+            if definition is None:
+                self.report(
+                    f"Erro: função '{name}' não definida.", "undefined-function"
+                )
+                values.append(0)
+                return
+            if len(definition[0]) != len(arg_nodes):
+                self.report(
+                    f"Error: function '{name}' expects {len(definition[0])} "
+                    f"arguments, but {len(arg_nodes)} were provided.",
+                    "arity",
+                )
+                values.append(0)
+                return
+            tasks.append((ENTER, definition, env))
+
+        for arg in reversed(arg_nodes):
+            tasks.append((EVAL, arg, env))
+
+    def enter(self, definition, env, tasks, values):
+        """
+        Starts the body of a user-defined function in a new Frame, with the
+        parameters bound to the arguments on the value stack.
+
+        :param definition: The (params, body) tuple of the function.
+        :param env: The environment of the caller.
+        :param tasks: The continuation stack.
+        :param values: The value stack.
+        """
+        params, body = definition
+        scope = self.scopes.get(id(definition))
+        if scope is None or scope[0] is not definition:
+            scope = self.scopes[id(definition)] = (
+                definition,
+                scope_names(params, body),
+            )
+
+        start = len(values) - len(params)
+        local_env = enter_frame(env, scope[1], params, values[start:])
+        del values[start:]
+
+        tasks.append((LEAVE,))
+        self.sequence(body, local_env, tasks, values)
+
+
+default_machine = Machine()
+
+
+def run_stack(node, local_env=None):
+    """
+    Evaluates an AST with the explicit-stack evaluator.
+
+    :param node: The root node of the AST.
+    :param local_env: Optional dictionary representing a local variable environment.
+    :return: The result of the evaluation.
+    """
+    env = local_env if local_env is not None else global_env
+    return default_machine.run(node, env)
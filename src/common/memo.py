@@ -0,0 +1,330 @@
+"""Modulo memo."""
+
+from collections import OrderedDict
+
+from .interpreter import math_functions
+
+MEMO_CACHE_SIZE = 1024
+
+PURE_OPERATIONS = {
+    "+",
+    "-",
+    "*",
+    "^",
+    "<",
+    ">",
+    "==",
+    "!=",
+    "<=",
+    ">=",
+    "neg",
+    "if-else",
+}
+
+
+class Impure(Exception):
+    """
+    Exception raised when a function body may have an effect or read a variable of
+    its caller.
+    """
+
+
+def memo_key(values):
+    """
+    Returns the cache key of a list of argument values.
+
+    Ints are used as they are. Other values are keyed by their type and repr, so that
+    1, 1.0 and True, which are equal, and 0.0 and -0.0 get different entries.
+
+    :param values: The argument values.
+    :return: A hashable key.
+    """
+    if all(value.__class__ is int for value in values):
+        return tuple(values)
+    return tuple((value.__class__, repr(value)) for value in values)
+
+
+class FunctionCache:
+    """
+    Bounded LRU cache of the results of one pure function, with hit and miss counts.
+    """
+
+    def __init__(self, definition, deps, maxsize=MEMO_CACHE_SIZE):
+        """
+        Initializes a FunctionCache.
+
+        :param definition: The (params, body) tuple of the function.
+        :param deps: A dictionary of function name to the definition the purity
+                     analysis relied on.
+        :param maxsize: The maximum number of results kept.
+        """
+        self.definition = definition
+        self.deps = deps
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def is_valid(self, functions):
+        """
+        Checks that no function the analysis relied on has been defined or redefined.
+
+        :param functions: The current function table.
+        :return: True if every dependency still has the same definition.
+        """
+        for name, definition in self.deps.items():
+            if functions.get(name) is not definition:
+                return False
+        return True
+
+    def call(self, values, function):
+        """
+        Returns the cached result for the arguments, calling the function on a miss.
+
+        :param values: The evaluated argument values.
+        :param function: A callable computing the result from the argument values.
+        :return: The result of the function call.
+        """
+        key = memo_key(values)
+        entries = self.entries
+        try:
+            result = entries[key]
+        except KeyError:
+            self.misses += 1
+            result = function(*values)
+            entries[key] = result
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+            return result
+        self.hits += 1
+        entries.move_to_end(key)
+        return result
+
+
+class Memoizer:
+    """
+    Memoization layer of the compiler.
+
+    A user-defined function is memoized when its result only depends on its
+    arguments: it does not print or define functions, only reads its parameters
+    and variables it assigned before, only divides by non-zero constants, and only
+    calls math functions or other such functions. Assignments inside a function
+    never affect its caller, since the body runs in a copy of the environment.
+    """
+
+    def __init__(self, compiler, maxsize=MEMO_CACHE_SIZE):
+        """
+        Initializes a Memoizer.
+
+        :param compiler: The Compiler whose function table is used.
+        :param maxsize: The maximum number of results kept per function.
+        """
+        self.functions = compiler.functions
+        self.maxsize = maxsize
+        self.caches = {}
+
+    def cache(self, name, definition):
+        """
+        Returns the result cache of a function, analyzing it on first use.
+
+        :param name: The name of the function.
+        :param definition: The (params, body) tuple of the function.
+        :return: The FunctionCache, or None if the function is not pure.
+        """
+        cache = self.caches.get(name)
+        if (
+            cache is None
+            or cache.definition is not definition
+            or not cache.is_valid(self.functions)
+        ):
+            cache = self.analyze(name, definition)
+            self.caches[name] = cache
+        return cache if cache.maxsize else None
+
+    def analyze(self, name, definition):
+        """
+        Runs the purity analysis of a function.
+
+        :param name: The name of the function.
+        :param definition: The (params, body) tuple of the function.
+        :return: A FunctionCache, with a size of 0 if the function is not pure.
+        """
+        deps = {name: definition}
+        try:
+            check_function(definition, self.functions, deps, {name})
+        except Impure:
+            return FunctionCache(definition, deps, 0)
+        return FunctionCache(definition, deps, self.maxsize)
+
+    def wrap(self, name, function):
+        """
+        Routes the calls of a translated function through its result cache.
+
+        :param name: The name of the user-defined function.
+        :param function: The Python function taking the argument values.
+        :return: The memoized function, or the function itself if it is not pure.
+        """
+        definition = self.functions.get(name)
+        cache = None if definition is None else self.cache(name, definition)
+        if cache is None:
+            return function
+        return lambda *values: cache.call(values, function)
+
+    def stats(self):
+        """
+        Returns the hit and miss counts of every memoized function.
+
+        :return: A dictionary of function name to a dictionary with the hits,
+                 misses and size of its cache.
+        """
+        return {
+            name: {
+                "hits": cache.hits,
+                "misses": cache.misses,
+                "size": len(cache.entries),
+            }
+            for name, cache in self.caches.items()
+            if cache.maxsize
+        }
+
+    def clear(self):
+        """
+        Drops every cached result and analysis.
+        """
+        self.caches.clear()
+
+
+def check_function(definition, functions, deps, visiting):
+    """
+    Checks that a function body is pure.
+
+    :param definition: The (params, body) tuple of the function.
+    :param functions: The function table.
+    :param deps: A dictionary receiving the definitions the analysis relies on.
+    :param visiting: The names of the functions being analyzed, assumed pure so that
+                     recursive functions can be memoized.
+    :raises Impure: If the function is not pure.
+    """
+    params, body = definition
+    check_statements(body, set(params), functions, deps, visiting)
+
+
+def check_statements(statements, assigned, functions, deps, visiting):
+    """
+    Checks a list of statements, tracking the variables assigned on every path.
+
+    :param statements: A list of AST nodes.
+    :param assigned: The set of variables known to be assigned, updated in place.
+    :param functions: The function table.
+    :param deps: A dictionary receiving the definitions the analysis relies on.
+    :param visiting: The names of the functions being analyzed.
+    :raises Impure: If a statement is not pure.
+    """
+    for stmt in statements:
+        check_statement(stmt, assigned, functions, deps, visiting)
+
+
+def check_statement(node, assigned, functions, deps, visiting):
+    """
+    Checks a statement.
+
+    :param node: The AST node of the statement.
+    :param assigned: The set of variables known to be assigned, updated in place.
+    :param functions: The function table.
+    :param deps: A dictionary receiving the definitions the analysis relies on.
+    :param visiting: The names of the functions being analyzed.
+    :raises Impure: If the statement is not pure.
+    """
+    op = node[0] if isinstance(node, tuple) else None
+    context = (functions, deps, visiting)
+
+    if isinstance(node, list) or op in ("block", "parallel"):
+        check_statements(node if op is None else node[1], assigned, *context)
+    elif op == "assign":
+        check_expression(node[2], assigned, *context)
+        assigned.add(node[1])
+    elif op == "return":
+        check_expression(node[1], assigned, *context)
+    elif op == "if":
+        check_expression(node[1], assigned, *context)
+        then = set(assigned)
+        check_statements(node[2], then, *context)
+        otherwise = set(assigned)
+        if len(node) > 3:
+            check_statements(node[3], otherwise, *context)
+        assigned |= then & otherwise
+    elif op == "while":
+        check_expression(node[1], assigned, *context)
+        check_statements(node[2], set(assigned), *context)
+        if "x" not in assigned:
+            raise Impure("x")
+    elif op in ("print", "def"):
+        raise Impure(op)
+    else:
+        check_expression(node, assigned, *context)
+
+
+def check_expression(node, assigned, functions, deps, visiting):
+    """
+    Checks an expression.
+
+    :param node: The AST node of the expression.
+    :param assigned: The set of variables known to be assigned.
+    :param functions: The function table.
+    :param deps: A dictionary receiving the definitions the analysis relies on.
+    :param visiting: The names of the functions being analyzed.
+    :raises Impure: If the expression is not pure.
+    """
+    if isinstance(node, (int, float)):
+        return
+    if not isinstance(node, tuple):
+        raise Impure(node)
+
+    op = node[0]
+    context = (functions, deps, visiting)
+
+    if op in PURE_OPERATIONS:
+        for child in node[1:]:
+            check_expression(child, assigned, *context)
+    elif op == "/":
+        divisor = node[2]
+        if not isinstance(divisor, (int, float)) or divisor == 0:
+            raise Impure(op)
+        check_expression(node[1], assigned, *context)
+    elif op == "var":
+        if node[1] not in assigned:
+            raise Impure(node[1])
+    elif op == "call":
+        for arg in node[2]:
+            check_expression(arg, assigned, *context)
+        check_call(node[1], len(node[2]), *context)
+    else:
+        raise Impure(op)
+
+
+def check_call(name, count, functions, deps, visiting):
+    """
+    Checks a call to a math or user-defined function.
+
+    :param name: The name of the function.
+    :param count: The number of arguments of the call.
+    :param functions: The function table.
+    :param deps: A dictionary receiving the definitions the analysis relies on.
+    :param visiting: The names of the functions being analyzed.
+    :raises Impure: If the call may print an error or the callee is not pure.
+    """
+    if name in math_functions:
+        return
+
+    definition = functions.get(name)
+    deps[name] = definition
+    if definition is None or len(definition[0]) != count:
+        raise Impure(name)
+    if name in visiting:
+        return
+
+    visiting.add(name)
+    try:
+        check_function(definition, functions, deps, visiting)
+    finally:
+        visiting.discard(name)
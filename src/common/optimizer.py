@@ -0,0 +1,324 @@
+"""Modulo optimizer."""
+
+import math
+import operator
+import os
+
+from .interpreter import math_functions
+from .scope import assigned_names
+
+FOLDABLE_OPERATIONS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "^": operator.pow,
+    "<": operator.lt,
+    ">": operator.gt,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<=": operator.le,
+    ">=": operator.ge,
+}
+
+NUMERIC_OPERATIONS = {"+", "-", "*", "/", "^", "neg"}
+
+MAX_FOLDED_BITS = 4096
+
+
+def is_constant(node):
+    """
+    Checks whether an AST node is a literal number.
+
+    :param node: The AST node.
+    :return: True if the node is an int, a float or a bool.
+    """
+    return isinstance(node, (int, float))
+
+
+def is_number(node, numeric=frozenset()):
+    """
+    Checks whether an AST node always evaluates to a number that is not a bool, so
+    that identities such as `x * 1` return exactly the same value as the operand.
+
+    :param node: The AST node.
+    :param numeric: The names of the variables known to hold such a number.
+    :return: True if the node is a number literal, an arithmetic operation, a call
+             to a math function or one of the numeric variables.
+    """
+    if isinstance(node, bool):
+        return False
+    if is_constant(node):
+        return True
+    if not isinstance(node, tuple):
+        return False
+    if node[0] == "call":
+        return node[1] in math_functions
+    if node[0] == "var":
+        return node[1] in numeric
+    return node[0] in NUMERIC_OPERATIONS
+
+
+def is_zero(node):
+    """
+    Checks whether an AST node is the integer literal zero. The float 0.0 is not
+    an identity, since adding it turns an int into a float.
+
+    :param node: The AST node.
+    :return: True if the node is 0.
+    """
+    return isinstance(node, int) and not isinstance(node, bool) and node == 0
+
+
+def is_one(node):
+    """
+    Checks whether an AST node is the integer literal one. The float 1.0 is not
+    an identity, since multiplying by it turns an int into a float.
+
+    :param node: The AST node.
+    :return: True if the node is 1.
+    """
+    return isinstance(node, int) and not isinstance(node, bool) and node == 1
+
+
+IDENTITIES = {
+    "*": (is_one, is_one),
+    "+": (is_zero, is_zero),
+    "-": (None, is_zero),
+    "^": (None, is_one),
+}
+
+
+def count_nodes(node):
+    """
+    Counts the nodes of an AST, including literals and statement lists.
+
+    :param node: The root node of the AST.
+    :return: The number of nodes.
+    """
+    if isinstance(node, list):
+        return 1 + sum(count_nodes(child) for child in node)
+    if isinstance(node, tuple):
+        return 1 + sum(
+            count_nodes(child) for child in node[1:] if not isinstance(child, str)
+        )
+    return 1
+
+
+def fold(function, *values):
+    """
+    Computes the value of a constant subtree at optimization time.
+
+    :param function: The operation of the subtree.
+    :param values: The constant operands.
+    :return: The value, or None if computing it raises an error or gives a value
+             that cannot be written as a literal, in which case the subtree is kept
+             and the error happens at run time, as before.
+    """
+    if function is operator.pow and all(isinstance(v, int) for v in values):
+        base, exponent = values
+        if exponent > 0 and abs(base) > 1:
+            if base.bit_length() * exponent > MAX_FOLDED_BITS:
+                return None
+    try:
+        value = function(*values)
+    except (ArithmeticError, ValueError, TypeError):
+        return None
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+class Optimizer:
+    """
+    Rewrites the AST produced by the parser into an equivalent, smaller one.
+
+    Constant arithmetic and comparisons, and calls to math functions with constant
+    arguments, are folded into literals. The identities `x * 1`, `1 * x`, `x + 0`,
+    `0 + x`, `x - 0` and `x ^ 1` are simplified when `x` is known to be a number,
+    and `if` statements whose condition is constant are replaced by the branch that
+    would run. A variable is known to be a number after an assignment of a number
+    to it in the same statement list, until a statement that may assign it
+    otherwise; comparisons give bools, which these identities would turn into
+    ints. Divisions by a constant zero are never folded, so the error is still
+    reported at run time. The only visible difference is that `x + 0` keeps the
+    sign of a negative zero.
+
+    The optimizer never modifies the AST it receives, so it can be used on ASTs
+    shared through the parse cache.
+    """
+
+    def __init__(self, enabled=True):
+        """
+        Initializes an Optimizer.
+
+        :param enabled: Whether the optimizer rewrites ASTs. When disabled, ASTs are
+                        returned unchanged.
+        """
+        self.enabled = enabled
+        self.removed = 0
+        self.numeric = set()
+
+    def optimize(self, node):
+        """
+        Optimizes an AST and adds the number of removed nodes to `removed`.
+
+        ASTs nested too deeply for the recursive rewrite are returned unchanged.
+
+        :param node: The root node of the AST.
+        :return: The optimized AST.
+        """
+        if not self.enabled or node is None:
+            return node
+        self.numeric = set()
+        try:
+            optimized = self.rewrite(node)
+        except RecursionError:
+            return node
+        self.removed += count_nodes(node) - count_nodes(optimized)
+        return optimized
+
+    def rewrite(self, node):  # pylint: disable=R0911
+        """
+        Rewrites an AST node and its children.
+
+        :param node: The AST node.
+        :return: The rewritten node.
+        """
+        if isinstance(node, list):
+            return self.rewrite_statements(node)
+        if not isinstance(node, tuple):
+            return node
+
+        op = node[0]
+        if op in FOLDABLE_OPERATIONS:
+            return self.rewrite_binary(op, self.rewrite(node[1]), self.rewrite(node[2]))
+        if op == "neg":
+            operand = self.rewrite(node[1])
+            if is_constant(operand):
+                value = fold(operator.neg, operand)
+                if value is not None:
+                    return value
+            return ("neg", operand)
+        if op == "call":
+            return self.rewrite_call(node)
+        if op == "def":
+            outer, self.numeric = self.numeric, set()
+            try:
+                return ("def", node[1], node[2], self.rewrite(node[3]))
+            finally:
+                self.numeric = outer
+        if op == "assign":
+            return (op, node[1], self.rewrite(node[2]))
+        if op == "var":
+            return node
+        return (op,) + tuple(self.rewrite(child) for child in node[1:])
+
+    def rewrite_binary(self, op, left, right):
+        """
+        Folds or simplifies a binary operation whose operands are already rewritten.
+
+        :param op: The operator.
+        :param left: The rewritten left operand.
+        :param right: The rewritten right operand.
+        :return: The rewritten node.
+        """
+        if is_constant(left) and is_constant(right):
+            if not (op == "/" and right == 0):
+                value = fold(FOLDABLE_OPERATIONS[op], left, right)
+                if value is not None:
+                    return value
+
+        left_identity, right_identity = IDENTITIES.get(op, (None, None))
+        if right_identity and right_identity(right) and is_number(left, self.numeric):
+            return left
+        if left_identity and left_identity(left) and is_number(right, self.numeric):
+            return right
+
+        return (op, left, right)
+
+    def rewrite_call(self, node):
+        """
+        Rewrites the arguments of a call, folding calls to math functions whose
+        arguments are all constant.
+
+        :param node: A tuple of the form ("call", name, [args]).
+        :return: The rewritten node.
+        """
+        name = node[1]
+        args = [self.rewrite(arg) for arg in node[2]]
+        if name in math_functions and all(is_constant(arg) for arg in args):
+            value = fold(math_functions[name], *args)
+            if value is not None:
+                return value
+        return ("call", name, args)
+
+    def rewrite_statements(self, statements):
+        """
+        Rewrites a list of statements, replacing `if` statements that have a
+        constant condition by the statements of the branch that would run.
+
+        A false `if` without an else is dropped, unless it is the last statement,
+        whose value is the value of the whole list.
+
+        The variables assigned a number are added to `numeric` for the following
+        statements of the list. Those a nested statement may assign are removed,
+        and for a `while`, already before its condition and body.
+
+        :param statements: A list of AST nodes.
+        :return: The rewritten list.
+        """
+        outer, self.numeric = self.numeric, set(self.numeric)
+        try:
+            return self.rewrite_list(statements)
+        finally:
+            self.numeric = outer
+
+    def rewrite_list(self, statements):
+        """
+        Rewrites a list of statements for `rewrite_statements`, updating `numeric`.
+
+        :param statements: A list of AST nodes.
+        :return: The rewritten list.
+        """
+        rewritten = []
+        last = len(statements) - 1
+        for index, stmt in enumerate(statements):
+            assigned = set()
+            assigned_names(stmt, assigned)
+            if isinstance(stmt, tuple) and stmt[0] == "while":
+                self.numeric.difference_update(assigned)
+            stmt = self.rewrite(stmt)
+            self.numeric.difference_update(assigned)
+            if isinstance(stmt, tuple) and stmt[0] == "assign":
+                if is_number(stmt[2], self.numeric):
+                    self.numeric.add(stmt[1])
+            if isinstance(stmt, tuple) and stmt[0] == "if" and is_constant(stmt[1]):
+                if stmt[1]:
+                    rewritten.extend(stmt[2])
+                    continue
+                if len(stmt) > 3:
+                    rewritten.extend(stmt[3])
+                    continue
+                if index != last:
+                    continue
+            rewritten.append(stmt)
+        return rewritten
+
+
+default_optimizer = Optimizer(enabled=os.environ.get("OPTIMIZE", "1") != "0")
+
+
+def optimize_ast(node):
+    """
+    Optimizes an AST with the default optimizer.
+
+    The default optimizer is disabled by setting the OPTIMIZE environment variable
+    to 0.
+
+    :param node: The root node of the AST.
+    :return: The optimized AST.
+    """
+    return default_optimizer.optimize(node)
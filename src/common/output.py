@@ -0,0 +1,364 @@
+"""Modulo output."""
+
+import abc
+import contextlib
+import functools
+import json
+import sys
+
+FLUSH_SIZE = 8192
+
+
+class Sink(abc.ABC):
+    """
+    Destination of the values printed by `print` statements.
+
+    A sink is called like `print`, with the values to be printed, and writes them
+    as text with `write`. Sinks that hold text back release it on `flush`.
+    """
+
+    def __call__(self, *values):
+        self.write(" ".join(map(str, values)) + "\n")
+
+    @abc.abstractmethod
+    def write(self, text):
+        """
+        Writes printed text.
+
+        :param text: The text, ending with a newline.
+        """
+
+    def flush(self):
+        """
+        Releases the text held back by the sink, if any.
+        """
+
+
+class StreamSink(Sink):
+    """
+    Sink writing every printed value to a file as soon as it is printed.
+    """
+
+    def __init__(self, stream=None):
+        """
+        Initializes a StreamSink.
+
+        :param stream: The file receiving the text. Defaults to the standard output
+                       at the time of each write.
+        """
+        self.stream = stream
+
+    def write(self, text):
+        (sys.stdout if self.stream is None else self.stream).write(text)
+
+    def flush(self):
+        (sys.stdout if self.stream is None else self.stream).flush()
+
+
+class BufferedSink(Sink):
+    """
+    Sink collecting printed text in memory and writing it to a file in batches.
+
+    The text is written in a single call once `flush_size` characters are pending,
+    when `flush` is called, and when the sink is closed, so output-heavy loops do not
+    pay for a write and a flush of the terminal on every value.
+    """
+
+    def __init__(self, stream=None, flush_size=FLUSH_SIZE):
+        """
+        Initializes a BufferedSink.
+
+        :param stream: The file receiving the text. Defaults to the standard output
+                       at the time of each flush.
+        :param flush_size: The number of pending characters that triggers a flush.
+        """
+        self.stream = stream
+        self.flush_size = flush_size
+        self.parts = []
+        self.size = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        stream = sys.stdout if self.stream is None else self.stream
+        if self.parts:
+            stream.write("".join(self.parts))
+            self.parts = []
+            self.size = 0
+        stream.flush()
+
+    def close(self):
+        """
+        Writes the pending text.
+        """
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ListSink(Sink):
+    """
+    Sink keeping the printed values in a list, without converting them to text.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty ListSink.
+        """
+        self.values = []
+
+    def __call__(self, *values):
+        self.values.append(
+            values[0] if len(values) == 1 else " ".join(map(str, values))
+        )
+
+    def write(self, text):
+        self.values.extend(text.splitlines())
+
+    def getvalue(self):
+        """
+        Returns the printed values as the text `print` would have written.
+
+        :return: The text.
+        """
+        return "".join(f"{value}\n" for value in self.values)
+
+    def clear(self):
+        """
+        Discards the collected values.
+        """
+        self.values.clear()
+
+
+class NullSink(Sink):
+    """
+    Sink discarding everything printed.
+    """
+
+    def __call__(self, *values):
+        pass
+
+    def write(self, text):
+        pass
+
+    def getvalue(self):
+        """
+        Returns the printed text, which is always empty.
+
+        :return: An empty string.
+        """
+        return ""
+
+
+class Diagnostic:
+    """
+    Error reported while lexing, parsing or evaluating a script.
+    """
+
+    def __init__(self, message, kind=None, line=None):
+        """
+        Initializes a Diagnostic.
+
+        :param message: The error message, as it would be printed.
+        :param kind: The kind of error, such as "syntax", "undefined-variable" or
+                     "division-by-zero".
+        :param line: The line of the error in the source text, when known.
+        """
+        self.message = message
+        self.kind = kind
+        self.line = line
+
+    def as_dict(self):
+        """
+        Converts the diagnostic to a dictionary of JSON-compatible values.
+
+        :return: The dictionary.
+        """
+        return {"kind": self.kind, "line": self.line, "message": self.message}
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"Diagnostic({self.message!r}, {self.kind!r}, {self.line!r})"
+
+
+class Diagnostics:
+    """
+    Channel receiving the errors of a script as Diagnostic records, apart from the
+    values it prints.
+    """
+
+    def __init__(self, stream=None):
+        """
+        Initializes a Diagnostics channel.
+
+        :param stream: Optional file receiving every diagnostic as a line of JSON.
+                       Diagnostics written to a stream are not kept in `records`.
+        """
+        self.stream = stream
+        self.records = []
+
+    def __call__(self, message, kind=None, line=None):
+        diagnostic = Diagnostic(message, kind, line)
+        if self.stream is None:
+            self.records.append(diagnostic)
+        else:
+            self.stream.write(
+                json.dumps(diagnostic.as_dict(), ensure_ascii=False) + "\n"
+            )
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def as_list(self):
+        """
+        Converts the kept diagnostics to a list of JSON-compatible dictionaries.
+
+        :return: The list.
+        """
+        return [diagnostic.as_dict() for diagnostic in self.records]
+
+    def clear(self):
+        """
+        Discards the kept diagnostics.
+        """
+        self.records.clear()
+
+
+class Channels:
+    """
+    Pair of the output sink of `print` statements and the diagnostics channel of
+    error messages. Without a diagnostics channel, errors are printed to the output,
+    interleaved with the values, as the interpreter always did.
+    """
+
+    def __init__(self, output=None, diagnostics=None):
+        """
+        Initializes a Channels pair.
+
+        :param output: The callable receiving printed values, such as a Sink.
+                       Defaults to `print`.
+        :param diagnostics: Optional callable receiving the message, kind and line
+                            of every error, such as a Diagnostics channel.
+        """
+        self.output = print if output is None else output
+        self.diagnostics = diagnostics
+
+    def print(self, *values):
+        """
+        Prints values to the output.
+
+        :param values: The values to be printed.
+        """
+        self.output(*values)
+
+    def report(self, message, kind=None, line=None):
+        """
+        Reports an error to the diagnostics channel, or prints it to the output.
+
+        :param message: The error message.
+        :param kind: The kind of error.
+        :param line: The line of the error in the source text, when known.
+        """
+        if self.diagnostics is None:
+            self.output(message)
+        else:
+            self.diagnostics(message, kind, line)
+
+    def flush(self):
+        """
+        Flushes the output, if it holds text back.
+        """
+        flush = getattr(self.output, "flush", None)
+        if flush is not None:
+            flush()
+
+
+channels = Channels()
+
+
+def as_sink(output):
+    """
+    Converts an output argument to a callable receiving printed values.
+
+    :param output: A callable such as a Sink, or a file, which then receives the
+                   values through `print`.
+    :return: The callable.
+    """
+    if callable(output):
+        return output
+    return functools.partial(print, file=output)
+
+
+def open_channels(output=None, diagnostics=None):
+    """
+    Returns the channels of an engine. Without arguments, the engine shares the
+    global channels, so `capture` applies to it.
+
+    :param output: Optional Sink, callable or file receiving printed values.
+                   Defaults to the global output.
+    :param diagnostics: Optional callable receiving the errors. Defaults to the
+                        output when an output is given, else to the global channels.
+    :return: A Channels pair.
+    """
+    if output is None and diagnostics is None:
+        return channels
+    if output is None:
+        return Channels(channels.print, diagnostics)
+    return Channels(as_sink(output), diagnostics)
+
+
+@contextlib.contextmanager
+def redirect(output=None, diagnostics=None):
+    """
+    Replaces the global channels, used by `eval_ast`, the parser, the lexer and the
+    engines created without an output, for the duration of a `with` block.
+
+    :param output: Optional Sink receiving printed values. Defaults to the current
+                   output.
+    :param diagnostics: Optional callable receiving the errors. Defaults to the
+                        current diagnostics channel.
+    :return: A context manager yielding the Channels in use. The output is flushed
+             and the previous channels are restored when the block ends.
+    """
+    current = Channels(
+        channels.output if output is None else output,
+        channels.diagnostics if diagnostics is None else diagnostics,
+    )
+    saved = channels.output, channels.diagnostics
+    channels.output, channels.diagnostics = current.output, current.diagnostics
+    try:
+        yield current
+    finally:
+        channels.output, channels.diagnostics = saved
+        current.flush()
+
+
+def capture(output=None, diagnostics=None):
+    """
+    Captures the values printed and the errors reported through the global channels
+    during a `with` block, without redirecting `sys.stdout`.
+
+    :param output: Optional Sink receiving printed values. Defaults to a new
+                   ListSink.
+    :param diagnostics: Optional callable receiving the errors. Defaults to a new
+                        Diagnostics channel.
+    :return: A context manager yielding the Channels in use, which keep the
+             captured values and diagnostics after the block ends.
+    """
+    return redirect(
+        ListSink() if output is None else output,
+        Diagnostics() if diagnostics is None else diagnostics,
+    )
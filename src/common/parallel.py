@@ -0,0 +1,323 @@
+"""Modulo parallel."""
+
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .compiler import Compiler, default_compiler
+from .interpreter import global_env
+from .memo import Impure, check_expression
+from .reactive import collect_reads, follow_calls
+from .scope import assigned_names
+
+STATEMENTS = {"assign", "print", "return", "if", "while", "def", "block", "parallel"}
+
+
+def statement_expression(node):
+    """
+    Returns the expression of an assignment, a print or an expression statement,
+    whose evaluation is the whole work of the statement.
+
+    :param node: The AST node of the statement.
+    :return: The AST node of the expression, or None for other statements.
+    """
+    if not isinstance(node, tuple):
+        return node if isinstance(node, (int, float)) else None
+    if node[0] in ("assign", "print"):
+        return node[-1]
+    return None if node[0] in STATEMENTS else node
+
+
+def defines_functions(node):
+    """
+    Checks whether a node contains a function definition, which changes the
+    function table shared by every statement.
+
+    :param node: The AST node to be inspected.
+    :return: True if a `def` is found.
+    """
+    if isinstance(node, list):
+        return any(defines_functions(child) for child in node)
+    if not isinstance(node, tuple) or not node:
+        return False
+    return node[0] == "def" or any(defines_functions(child) for child in node[1:])
+
+
+def program_statements(ast):
+    """
+    Lists the top-level statements of a program, with the statements of its
+    top-level `parallel` blocks in their place.
+
+    :param ast: The root node of the AST, a program or a single statement.
+    :return: A list of (statement, hinted) tuples, where hinted is True for the
+             statements of a `parallel` block.
+    """
+    statements = ast[1] if isinstance(ast, tuple) and ast[0] == "program" else [ast]
+    flattened = []
+    for statement in statements:
+        if isinstance(statement, tuple) and statement[0] == "parallel":
+            flattened.extend((child, True) for child in statement[1])
+        else:
+            flattened.append((statement, False))
+    return flattened
+
+
+class Effects:
+    """
+    Variables and functions a top-level statement reads and writes.
+    """
+
+    def __init__(self, node, functions):
+        """
+        Analyzes a statement against the current function table.
+
+        :param node: The AST node of the statement.
+        :param functions: The dictionary of user-defined functions.
+        """
+        self.node = node
+        self.op = node[0] if isinstance(node, tuple) else None
+        variables = set()
+        calls = set()
+        collect_reads(node, variables, calls)
+        self.reads, self.calls = follow_calls(variables, calls, functions)
+        self.writes = set()
+        assigned_names(node, self.writes)
+        self.expression = statement_expression(node)
+        self.portable = self.expression is not None and not any(
+            defines_functions(functions[name][1]) for name in self.calls
+        )
+
+    def independent(self, writes):
+        """
+        Checks that the statement neither reads nor assigns variables assigned by
+        statements that have not finished, so it can run before them.
+
+        :param writes: The set of variables assigned by the unfinished statements.
+        :return: True if the statement does not depend on them.
+        """
+        return self.reads.isdisjoint(writes) and self.writes.isdisjoint(writes)
+
+    def silent(self, defined):
+        """
+        Checks that the statement only computes arithmetic on defined variables, so
+        it cannot print or report an error.
+
+        :param defined: The variables defined when the statement runs.
+        :return: True if the statement is silent.
+        """
+        if self.expression is None or self.op == "print":
+            return False
+        try:
+            check_expression(self.expression, defined, {}, {}, set())
+        except Impure:
+            return False
+        return True
+
+
+class Recorder:
+    """
+    Output of a worker process, recording the printed values and the reported
+    errors of a statement in order, so that the main process can replay them.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty Recorder.
+        """
+        self.events = []
+
+    def __call__(self, *values):
+        self.events.append(("print", values))
+
+    def report(self, message, kind=None, line=None):
+        """
+        Records an error.
+
+        :param message: The error message.
+        :param kind: The kind of error.
+        :param line: The line of the error in the source text, when known.
+        """
+        self.events.append(("report", (message, kind, line)))
+
+
+@functools.cache
+def worker_compiler():
+    """
+    Returns the Compiler of a worker process and its Recorder, created on first
+    use. The function table keeps the definitions received before, so that their
+    compiled bodies, translated code and cached results are reused by the following
+    statements.
+
+    :return: A (compiler, recorder) tuple.
+    """
+    recorder = Recorder()
+    compiler = Compiler(functions={}, output=recorder, diagnostics=recorder.report)
+    return compiler, recorder
+
+
+def run_statement(statement, values, definitions):
+    """
+    Evaluates a statement in a worker process.
+
+    :param statement: The AST node of the statement.
+    :param values: The dictionary of the defined variables the statement reads,
+                   directly or through the functions it calls.
+    :param definitions: The dictionary of the functions the statement calls,
+                        directly or not.
+    :return: A (result, events, error) tuple, with the result of the statement, the
+             events of its Recorder and the exception it raised, if any.
+    """
+    compiler, recorder = worker_compiler()
+    functions = compiler.functions
+    for name in functions.keys() - definitions.keys():
+        del functions[name]
+    for name, definition in definitions.items():
+        if functions.get(name) != definition:
+            functions[name] = definition
+
+    recorder.events = []
+    try:
+        return compiler.compile(statement)(values), recorder.events, None
+    except Exception as e:  # pylint: disable=W0718
+        return None, recorder.events, e
+
+
+class Parallel:
+    """
+    Evaluates programs, running their independent top-level statements in a pool of
+    worker processes.
+
+    Every top-level statement is analyzed for the variables and functions it reads
+    and the variables it writes. An assignment, a print or an expression statement
+    that calls user-defined functions, none of which defines a function, is sent to
+    a worker with the values of the variables and the definitions of the functions
+    it reads, while the following statements go on. Statements inside a top-level
+    `parallel` block are sent even when they only compute arithmetic. The results
+    are applied in program order, with the values printed and the errors reported
+    by the worker, so the variables and the output are those of a sequential run.
+    A statement that reads or assigns a variable of a statement still running waits
+    for it. Other statements run in the main process: those that only compute
+    arithmetic on defined variables right away, the others after every statement
+    before them.
+    """
+
+    def __init__(self, env=None, compiler=None, workers=None):
+        """
+        Initializes a Parallel session.
+
+        :param env: The environment of the statements. Defaults to the global one.
+        :param compiler: The Compiler of the statements run in the main process.
+                         Defaults to the shared one, bound to the global function
+                         table.
+        :param workers: The number of worker processes. Defaults to the number of
+                        CPUs.
+        """
+        self.env = global_env if env is None else env
+        self.compiler = default_compiler if compiler is None else compiler
+        self.functions = self.compiler.functions
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+        self.offloaded = 0
+
+    def run(self, ast):
+        """
+        Evaluates a program.
+
+        :param ast: The root node of the AST, a program or a single statement.
+        :return: The result of the last statement.
+        """
+        pending = []
+        result = None
+        try:
+            for statement, hinted in program_statements(ast):
+                effects = Effects(statement, self.functions)
+                if effects.portable:
+                    self.finish(pending, self.last_writer(effects, pending))
+                    if effects.calls or hinted:
+                        self.submit(effects, pending)
+                        continue
+                    if effects.silent(self.env.keys()):
+                        try:
+                            result = self.compiler.compile(statement)(self.env)
+                        except (ArithmeticError, ValueError):
+                            self.finish(pending, len(pending))
+                            raise
+                        if pending:
+                            pending.append((effects, None, result))
+                        continue
+                self.finish(pending, len(pending))
+                result = self.compiler.compile(statement)(self.env)
+            if pending:
+                result = self.finish(pending, len(pending))
+            return result
+        finally:
+            for _, future, _ in pending:
+                if future is not None:
+                    future.cancel()
+
+    def submit(self, effects, pending):
+        """
+        Sends a statement to a worker process, with the values of the variables and
+        the definitions of the functions it reads.
+
+        :param effects: The Effects of the statement.
+        :param pending: The list of unfinished statements, in program order, as
+                        (effects, future, result) tuples, receiving the statement.
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        values = {name: self.env[name] for name in effects.reads if name in self.env}
+        definitions = {name: self.functions[name] for name in effects.calls}
+        future = self.executor.submit(run_statement, effects.node, values, definitions)
+        pending.append((effects, future, None))
+        self.offloaded += 1
+
+    @staticmethod
+    def last_writer(effects, pending):
+        """
+        Finds the last statement still running in a worker that a statement depends
+        on.
+
+        :param effects: The Effects of the statement.
+        :param pending: The list of unfinished statements.
+        :return: The number of unfinished statements to be finished.
+        """
+        for index in range(len(pending) - 1, -1, -1):
+            other, future, _ = pending[index]
+            if future is not None and not effects.independent(other.writes):
+                return index + 1
+        return 0
+
+    def finish(self, pending, count, result=None):
+        """
+        Waits for the first unfinished statements and applies their effects in
+        program order: the output of the worker is replayed, then the variable is
+        assigned, or the exception of the statement is raised.
+
+        :param pending: The list of unfinished statements, from which they are
+                        removed.
+        :param count: The number of statements to be finished.
+        :param result: The result to return if no statement is finished.
+        :return: The result of the last finished statement.
+        """
+        while count:
+            effects, future, result = pending.pop(0)
+            count -= 1
+            if future is None:
+                continue
+            result, events, error = future.result()
+            for channel, arguments in events:
+                getattr(self.compiler, channel)(*arguments)
+            if error is not None:
+                raise error
+            if effects.op == "assign":
+                self.env[effects.node[1]] = result
+        return result
+
+    def close(self):
+        """
+        Shuts down the worker processes.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
@@ -1,8 +1,12 @@
 """Modulo parser."""
 
-from ply import yacc
+import copy
+import functools
+import sys
 
-from .lexer import tokens  # pylint: disable=W0611
+from .lexer import get_lexer, tokens  # pylint: disable=W0611
+from .output import channels
+from .tables import Lazy, build_parser
 
 functions = {}
 env = {}
@@ -16,9 +20,42 @@ precedence = (
 )
 
 
+def position(p, index):
+    """
+    Returns the source position of a symbol of a production.
+
+    :param p: The production.
+    :param index: The index of a symbol of the production.
+    :return: A (line, column) tuple. Columns start at 1. The line is 0 for
+             nonterminal symbols, whose position is not tracked.
+    """
+    lexpos = p.lexpos(index)
+    return p.lineno(index), lexpos - p.lexer.lexdata.rfind("\n", 0, lexpos)
+
+
+def node(p, index, op, *children):
+    """
+    Builds an AST node.
+
+    The node is a tuple, unless the parser has a `builder` attribute, such as the
+    CompactBuilder used by `parse_compact`, which then builds the node with the
+    position of the symbol at `index`.
+
+    :param p: The production.
+    :param index: The index of the symbol where the node starts.
+    :param op: The operator of the node.
+    :param children: The children of the node.
+    :return: The node.
+    """
+    builder = getattr(p.parser, "builder", None)
+    if builder is None:
+        return (op, *children)
+    return builder.node(op, children, position(p, index))
+
+
 def p_program(p):
     "program : statements"
-    p[0] = ("program", p[1])
+    p[0] = node(p, 1, "program", p[1])
 
 
 def p_statement_expr(p):
@@ -34,12 +71,13 @@ def p_expression_call(p):
 def p_statement_assign(p):
     "statement : ID EQUALS expression"
 
-    p[0] = ("assign", p[1], p[3])
+    p[0] = node(p, 1, "assign", p[1], p[3])
 
 
 def p_expression_number(p):
     """expression : NUMBER"""
-    p[0] = p[1]
+    builder = getattr(p.parser, "builder", None)
+    p[0] = p[1] if builder is None else builder.number(p[1], position(p, 1))
 
 
 def p_empty(p):
@@ -49,7 +87,8 @@ def p_empty(p):
 
 def p_statements(p):
     "statements : statements statement"
-    p[0] = p[1] + [p[2]]
+    p[1].append(p[2])
+    p[0] = p[1]
 
 
 def p_statements_single(p):
@@ -59,7 +98,7 @@ def p_statements_single(p):
 
 def p_expression_id(p):
     "expression : ID"
-    p[0] = ("var", p[1])
+    p[0] = node(p, 1, "var", p[1])
 
 
 def p_expression_binop(p):
@@ -68,7 +107,7 @@ def p_expression_binop(p):
     | expression TIMES expression
     | expression DIVIDE expression
     | expression POWER expression"""
-    p[0] = (p[2], p[1], p[3])
+    p[0] = node(p, 2, p[2], p[1], p[3])
 
 
 def p_expression_group(p):
@@ -78,22 +117,39 @@ def p_expression_group(p):
 
 def p_expression_uminus(p):
     "expression : MINUS expression %prec UMINUS"
-    p[0] = ("neg", p[2])
+    p[0] = node(p, 1, "neg", p[2])
 
 
 def p_statement_if(p):
     "statement : IF LPAREN expression RPAREN block"
-    p[0] = ("if", p[3], p[5])
+    p[0] = node(p, 1, "if", p[3], p[5])
 
 
 def p_statement_if_else(p):
     "statement : IF LPAREN expression RPAREN block ELSE block"
-    p[0] = ("if", p[3], p[5], p[7])
+    p[0] = node(p, 1, "if", p[3], p[5], p[7])
 
 
 def p_statement_while(p):
     "statement : WHILE LPAREN expression RPAREN block"
-    p[0] = ("while", p[3], p[5])
+    p[0] = node(p, 1, "while", p[3], p[5])
+
+
+def p_statement_parallel(p):
+    "statement : ID block"
+    # `parallel` is not a reserved word, so that it can still name variables and
+    # functions: a name followed by a block is only valid when it is `parallel`.
+    if p[1] != "parallel":
+        line = p.lineno(1)
+        report = getattr(p.lexer, "report", channels.report)
+        report(
+            f"Error at line {line}: unexpected block after '{p[1]}'. "
+            "Suggestion: Only 'parallel' can be followed by a block.",
+            kind="syntax",
+            line=line,
+        )
+        raise SyntaxError
+    p[0] = node(p, 1, "parallel", p[2])
 
 
 def p_opt_params(p):
@@ -110,8 +166,8 @@ def p_opt_params(p):
 
 def p_statement_function(p):
     "statement : DEF ID LPAREN opt_params RPAREN block"
-    functions[p[2]] = {"params": p[4], "body": p[6]}
-    p[0] = ("def", p[2], p[4], p[6])
+    getattr(p.parser, "functions", functions)[p[2]] = {"params": p[4], "body": p[6]}
+    p[0] = node(p, 1, "def", p[2], p[4], p[6])
 
 
 def p_opt_args(p):
@@ -128,47 +184,47 @@ def p_opt_args(p):
 
 def p_statement_print(p):
     "statement : PRINT LPAREN expression RPAREN"
-    p[0] = ("print", p[3])
+    p[0] = node(p, 1, "print", p[3])
 
 
 def p_statement_print_call(p):
     "statement : PRINT function_call"
-    p[0] = ("print", p[2])
+    p[0] = node(p, 1, "print", p[2])
 
 
 def p_statement_sin(p):
     "expression : SIN LPAREN expression RPAREN"
-    p[0] = ("sin", p[3])
+    p[0] = node(p, 1, "sin", p[3])
 
 
 def p_statement_cos(p):
     "expression : COS LPAREN expression RPAREN"
-    p[0] = ("cos", p[3])
+    p[0] = node(p, 1, "cos", p[3])
 
 
 def p_statement_tan(p):
     "expression : TAN LPAREN expression RPAREN"
-    p[0] = ("tan", p[3])
+    p[0] = node(p, 1, "tan", p[3])
 
 
 def p_statement_exp(p):
     "expression : EXP LPAREN expression RPAREN"
-    p[0] = ("exp", p[3])
+    p[0] = node(p, 1, "exp", p[3])
 
 
 def p_statement_sqrt(p):
     "expression : SQRT LPAREN expression RPAREN"
-    p[0] = ("sqrt", p[3])
+    p[0] = node(p, 1, "sqrt", p[3])
 
 
 def p_statement_log(p):
     "expression : LOG LPAREN expression RPAREN"
-    p[0] = ("log", p[3])
+    p[0] = node(p, 1, "log", p[3])
 
 
 def p_statement_abs(p):
     "expression : ABS LPAREN expression RPAREN"
-    p[0] = ("abs", p[3])
+    p[0] = node(p, 1, "abs", p[3])
 
 
 def p_expression_comparison(p):
@@ -180,12 +236,12 @@ def p_expression_comparison(p):
                | expression EQ expression
                | expression NE expression
     """
-    p[0] = (p[2], p[1], p[3])
+    p[0] = node(p, 2, p[2], p[1], p[3])
 
 
 def p_statement_return(p):
     "statement : RETURN expression"
-    p[0] = ("return", p[2])
+    p[0] = node(p, 1, "return", p[2])
 
 
 def p_block(p):
@@ -195,71 +251,112 @@ def p_block(p):
 
 def p_function_call(p):
     "function_call : ID LPAREN opt_args RPAREN"
-    p[0] = ("call", p[1], p[3])
+    p[0] = node(p, 1, "call", p[1], p[3])
 
 
 def p_error(p):
     """
     Handles errors in the parser.
 
-    This function is called when a syntax error is found during parsing. It prints an
-    error message indicating the error, the line number, and a suggestion to fix it.
+    This function is called when a syntax error is found during parsing. It reports an
+    error message indicating the error, the line number, and a suggestion to fix it,
+    to the same place as the lexer: the `report` attribute of the lexer that
+    produced the token, such as a Tokenizer, or else the global channels.
     :param p: The token containing the error.
     """
     if p:
         line = p.lineno
+        report = getattr(p.lexer, "report", channels.report)
+        report = functools.partial(report, kind="syntax", line=line)
 
         if p.type in ["PLUS", "MINUS", "TIMES", "DIVIDE", "POWER"]:
-            print(
+            report(
                 f"Error at line {line}: operator '{p.type}' without operand. "
                 "Suggestion: Add an operand before or after the operator."
             )
         elif p.type == "LPAREN":
-            print(
+            report(
                 f"Error at line {line}: opening parenthesis without a closing one. "
                 "Suggestion: Add a ')' at the end."
             )
         elif p.type == "RPAREN":
-            print(
+            report(
                 f"Error at line {line}: closing parenthesis without an opening one. "
                 "Suggestion: Add a '(' before it."
             )
         elif p.type == "LBRACE":
-            print(
+            report(
                 f"Error at line {line}: opening curly brace without a matching closing brace. "
                 "Suggestion: Add a "
                 f"{"}"}"
                 " at the end."
             )
         elif p.type == "RBRACE":
-            print(
+            report(
                 f"Error at line {line}: closing curly brace without a matching opening brace. "
                 "Suggestion: Add a "
                 f"{"{"}"
                 " before it."
             )
         elif p.type == "ID":
-            print(
+            report(
                 f"Error at line {line}: unexpected identifier '{p.value}'. "
                 "Suggestion: Check if it is used correctly in a valid statement."
             )
         elif p.type == "EQUALS":
-            print(
+            report(
                 f"Error at line {line}: equals sign '=' without a valid variable or expression. "
                 "Suggestion: Check the assignment syntax."
             )
         elif p.type == "IF":
-            print(
+            report(
                 f"Error at line {line}: incomplete if condition. "
                 "Suggestion: Ensure you have a condition inside parentheses followed by a block."
             )
         elif p.type == "WHILE":
-            print(
+            report(
                 f"Error at line {line}: incomplete while loop condition. "
                 "Suggestion: Ensure you have a condition inside parentheses followed by a block."
             )
         else:
-            print(f"Syntax error at line {line}: token '{p.value}' of type '{p.type}'.")
+            report(
+                f"Syntax error at line {line}: token '{p.value}' of type '{p.type}'."
+            )
+
 
+def make_parser():
+    """
+    Builds the shared parser.
+
+    The shared lexer is built first, since PLY parses with the last lexer built
+    when no lexer is given to `parse`.
+
+    :return: The parser.
+    """
+    get_lexer()
+    return build_parser(sys.modules[__name__])
 
-parser = yacc.yacc()
+
+def get_parser():
+    """
+    Returns the shared parser, building it from the shipped tables on first use.
+
+    :return: The parser.
+    """
+    return parser.get()
+
+
+parser = Lazy(make_parser)
+
+
+def clone_parser():
+    """
+    Creates a parser that shares the LALR tables of the module parser but keeps its
+    own parsing state and table of parsed functions, so that parsers can be used
+    from different threads at the same time.
+
+    :return: A new parser instance.
+    """
+    clone = copy.copy(get_parser())
+    clone.functions = {}
+    return clone
@@ -0,0 +1,79 @@
+# Generated by `make tables`; do not edit.
+# pylint: skip-file
+# isort: skip_file
+# fmt: off
+
+# parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'leftPLUSMINUSleftTIMESDIVIDEleftSINCOSTANEXPSQRTLOGABSrightPOWERrightUMINUSABS COMMA COS DEF DIVIDE ELSE EQ EQUALS EXP GE GT ID IF LBRACE LE LOG LPAREN LT MINUS NE NUMBER PLUS POWER PRINT RBRACE RETURN RPAREN SIN SQRT TAN TIMES WHILEprogram : statementsstatement : expressionexpression : function_callstatement : ID EQUALS expressionexpression : NUMBERempty :statements : statements statementstatements : statementexpression : IDexpression : expression PLUS expression\n| expression MINUS expression\n| expression TIMES expression\n| expression DIVIDE expression\n| expression POWER expressionexpression : LPAREN expression RPARENexpression : MINUS expression %prec UMINUSstatement : IF LPAREN expression RPAREN blockstatement : IF LPAREN expression RPAREN block ELSE blockstatement : WHILE LPAREN expression RPAREN blockstatement : ID blockopt_params : ID\n| ID COMMA opt_params\n| emptystatement : DEF ID LPAREN opt_params RPAREN blockopt_args : expression\n| expression COMMA opt_args\n| emptystatement : PRINT LPAREN expression RPARENstatement : PRINT function_callexpression : SIN LPAREN expression RPARENexpression : COS LPAREN expression RPARENexpression : TAN LPAREN expression RPARENexpression : EXP LPAREN expression RPARENexpression : SQRT LPAREN expression RPARENexpression : LOG LPAREN expression RPARENexpression : ABS LPAREN expression RPAREN\nexpression : expression LT expression\n           | expression GT expression\n           | expression LE expression\n           | expression GE expression\n           | expression EQ expression\n           | expression NE expression\nstatement : RETURN expressionblock : LBRACE statements RBRACEfunction_call : ID LPAREN opt_args RPAREN'
+    
+_lr_action_items = {'ID':([0,2,3,4,5,7,9,10,11,12,13,14,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,40,41,43,44,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,65,66,70,72,74,83,84,85,91,92,93,94,95,96,97,98,100,101,102,106,107,],[5,5,-8,-2,-9,40,42,45,-3,40,-5,40,-7,40,40,40,40,40,40,40,40,40,40,40,40,-20,40,5,40,-9,40,40,-29,-43,-16,40,40,40,40,40,40,40,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,5,-15,88,-45,40,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,88,-24,-18,]),'IF':([0,2,3,4,5,11,13,22,35,37,40,44,46,47,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,85,91,92,93,94,95,96,97,98,100,101,106,107,],[6,6,-8,-2,-9,-3,-5,-7,-20,6,-9,-29,-43,-16,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,6,-15,-45,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'WHILE':([0,2,3,4,5,11,13,22,35,37,40,44,46,47,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,85,91,92,93,94,95,96,97,98,100,101,106,107,],[8,8,-8,-2,-9,-3,-5,-7,-20,8,-9,-29,-43,-16,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,8,-15,-45,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'DEF':([0,2,3,4,5,11,13,22,35,37,40,44,46,47,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,85,91,92,93,94,95,96,97,98,100,101,106,107,],[9,9,-8,-2,-9,-3,-5,-7,-20,9,-9,-29,-43,-16,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,9,-15,-45,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'PRINT':([0,2,3,4,5,11,13,22,35,37,40,44,46,47,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,85,91,92,93,94,95,96,97,98,100,101,106,107,],[10,10,-8,-2,-9,-3,-5,-7,-20,10,-9,-29,-43,-16,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,10,-15,-45,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'RETURN':([0,2,3,4,5,11,13,22,35,37,40,44,46,47,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,85,91,92,93,94,95,96,97,98,100,101,106,107,],[12,12,-8,-2,-9,-3,-5,-7,-20,12,-9,-29,-43,-16,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,12,-15,-45,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'NUMBER':([0,2,3,4,5,7,11,12,13,14,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,40,41,43,44,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,84,85,91,92,93,94,95,96,97,98,100,101,106,107,],[13,13,-8,-2,-9,13,-3,13,-5,13,-7,13,13,13,13,13,13,13,13,13,13,13,13,-20,13,13,13,-9,13,13,-29,-43,-16,13,13,13,13,13,13,13,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,13,-15,-45,13,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'LPAREN':([0,2,3,4,5,6,7,8,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,40,41,42,43,44,45,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,84,85,91,92,93,94,95,96,97,98,100,101,106,107,],[7,7,-8,-2,36,38,7,41,43,-3,7,-5,7,48,49,50,51,52,53,54,-7,7,7,7,7,7,7,7,7,7,7,7,7,-20,7,7,7,36,7,74,7,-29,36,-43,-16,7,7,7,7,7,7,7,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,7,-15,-45,7,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'MINUS':([0,2,3,4,5,7,11,12,13,14,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,43,44,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,65,66,68,70,71,72,73,75,76,77,78,79,80,81,82,83,84,85,91,92,93,94,95,96,97,98,100,101,106,107,],[14,14,-8,24,-9,14,-3,14,-5,14,-7,14,14,14,14,14,14,14,14,14,14,14,14,-20,14,14,14,24,-9,14,14,-29,24,-16,14,14,14,14,14,14,14,-10,-11,-12,-13,-14,24,24,24,24,24,24,24,24,14,24,-15,24,24,24,24,24,24,24,24,24,-45,14,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'SIN':([0,2,3,4,5,7,11,12,13,14,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,40,41,43,44,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,84,85,91,92,93,94,95,96,97,98,100,101,106,107,],[15,15,-8,-2,-9,15,-3,15,-5,15,-7,15,15,15,15,15,15,15,15,15,15,15,15,-20,15,15,15,-9,15,15,-29,-43,-16,15,15,15,15,15,15,15,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,15,-15,-45,15,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'COS':([0,2,3,4,5,7,11,12,13,14,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,40,41,43,44,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,84,85,91,92,93,94,95,96,97,98,100,101,106,107,],[16,16,-8,-2,-9,16,-3,16,-5,16,-7,16,16,16,16,16,16,16,16,16,16,16,16,-20,16,16,16,-9,16,16,-29,-43,-16,16,16,16,16,16,16,16,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,16,-15,-45,16,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'TAN':([0,2,3,4,5,7,11,12,13,14,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,40,41,43,44,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,84,85,91,92,93,94,95,96,97,98,100,101,106,107,],[17,17,-8,-2,-9,17,-3,17,-5,17,-7,17,17,17,17,17,17,17,17,17,17,17,17,-20,17,17,17,-9,17,17,-29,-43,-16,17,17,17,17,17,17,17,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,17,-15,-45,17,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'EXP':([0,2,3,4,5,7,11,12,13,14,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,40,41,43,44,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,84,85,91,92,93,94,95,96,97,98,100,101,106,107,],[18,18,-8,-2,-9,18,-3,18,-5,18,-7,18,18,18,18,18,18,18,18,18,18,18,18,-20,18,18,18,-9,18,18,-29,-43,-16,18,18,18,18,18,18,18,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,18,-15,-45,18,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'SQRT':([0,2,3,4,5,7,11,12,13,14,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,40,41,43,44,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,84,85,91,92,93,94,95,96,97,98,100,101,106,107,],[19,19,-8,-2,-9,19,-3,19,-5,19,-7,19,19,19,19,19,19,19,19,19,19,19,19,-20,19,19,19,-9,19,19,-29,-43,-16,19,19,19,19,19,19,19,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,19,-15,-45,19,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'LOG':([0,2,3,4,5,7,11,12,13,14,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,40,41,43,44,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,84,85,91,92,93,94,95,96,97,98,100,101,106,107,],[20,20,-8,-2,-9,20,-3,20,-5,20,-7,20,20,20,20,20,20,20,20,20,20,20,20,-20,20,20,20,-9,20,20,-29,-43,-16,20,20,20,20,20,20,20,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,20,-15,-45,20,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'ABS':([0,2,3,4,5,7,11,12,13,14,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,40,41,43,44,46,47,48,49,50,51,52,53,54,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,84,85,91,92,93,94,95,96,97,98,100,101,106,107,],[21,21,-8,-2,-9,21,-3,21,-5,21,-7,21,21,21,21,21,21,21,21,21,21,21,21,-20,21,21,21,-9,21,21,-29,-43,-16,21,21,21,21,21,21,21,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,21,-15,-45,21,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'$end':([1,2,3,4,5,11,13,22,35,40,44,46,47,55,56,57,58,59,60,61,62,63,64,65,66,72,83,85,91,92,93,94,95,96,97,98,100,101,106,107,],[0,-1,-8,-2,-9,-3,-5,-7,-20,-9,-29,-43,-16,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,-15,-45,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'RBRACE':([3,4,5,11,13,22,35,40,44,46,47,55,56,57,58,59,60,61,62,63,64,65,66,70,72,83,85,91,92,93,94,95,96,97,98,100,101,106,107,],[-8,-2,-9,-3,-5,-7,-20,-9,-29,-43,-16,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,-4,85,-15,-45,-44,-28,-30,-31,-32,-33,-34,-35,-36,-17,-19,-24,-18,]),'PLUS':([4,5,11,13,39,40,46,47,55,56,57,58,59,60,61,62,63,64,65,66,68,71,72,73,75,76,77,78,79,80,81,82,83,92,93,94,95,96,97,98,],[23,-9,-3,-5,23,-9,23,-16,-10,-11,-12,-13,-14,23,23,23,23,23,23,23,23,23,-15,23,23,23,23,23,23,23,23,23,-45,-30,-31,-32,-33,-34,-35,-36,]),'TIMES':([4,5,11,13,39,40,46,47,55,56,57,58,59,60,61,62,63,64,65,66,68,71,72,73,75,76,77,78,79,80,81,82,83,92,93,94,95,96,97,98,],[25,-9,-3,-5,25,-9,25,-16,25,25,-12,-13,-14,25,25,25,25,25,25,25,25,25,-15,25,25,25,25,25,25,25,25,25,-45,-30,-31,-32,-33,-34,-35,-36,]),'DIVIDE':([4,5,11,13,39,40,46,47,55,56,57,58,59,60,61,62,63,64,65,66,68,71,72,73,75,76,77,78,79,80,81,82,83,92,93,94,95,96,97,98,],[26,-9,-3,-5,26,-9,26,-16,26,26,-12,-13,-14,26,26,26,26,26,26,26,26,26,-15,26,26,26,26,26,26,26,26,26,-45,-30,-31,-32,-33,-34,-35,-36,]),'POWER':([4,5,11,13,39,40,46,47,55,56,57,58,59,60,61,62,63,64,65,66,68,71,72,73,75,76,77,78,79,80,81,82,83,92,93,94,95,96,97,98,],[27,-9,-3,-5,27,-9,27,-16,27,27,27,27,27,27,27,27,27,27,27,27,27,27,-15,27,27,27,27,27,27,27,27,27,-45,-30,-31,-32,-33,-34,-35,-36,]),'LT':([4,5,11,13,39,40,46,47,55,56,57,58,59,60,61,62,63,64,65,66,68,71,72,73,75,76,77,78,79,80,81,82,83,92,93,94,95,96,97,98,],[28,-9,-3,-5,28,-9,28,-16,-10,-11,-12,-13,-14,28,28,28,28,28,28,28,28,28,-15,28,28,28,28,28,28,28,28,28,-45,-30,-31,-32,-33,-34,-35,-36,]),'GT':([4,5,11,13,39,40,46,47,55,56,57,58,59,60,61,62,63,64,65,66,68,71,72,73,75,76,77,78,79,80,81,82,83,92,93,94,95,96,97,98,],[29,-9,-3,-5,29,-9,29,-16,-10,-11,-12,-13,-14,29,29,29,29,29,29,29,29,29,-15,29,29,29,29,29,29,29,29,29,-45,-30,-31,-32,-33,-34,-35,-36,]),'LE':([4,5,11,13,39,40,46,47,55,56,57,58,59,60,61,62,63,64,65,66,68,71,72,73,75,76,77,78,79,80,81,82,83,92,93,94,95,96,97,98,],[30,-9,-3,-5,30,-9,30,-16,-10,-11,-12,-13,-14,30,30,30,30,30,30,30,30,30,-15,30,30,30,30,30,30,30,30,30,-45,-30,-31,-32,-33,-34,-35,-36,]),'GE':([4,5,11,13,39,40,46,47,55,56,57,58,59,60,61,62,63,64,65,66,68,71,72,73,75,76,77,78,79,80,81,82,83,92,93,94,95,96,97,98,],[31,-9,-3,-5,31,-9,31,-16,-10,-11,-12,-13,-14,31,31,31,31,31,31,31,31,31,-15,31,31,31,31,31,31,31,31,31,-45,-30,-31,-32,-33,-34,-35,-36,]),'EQ':([4,5,11,13,39,40,46,47,55,56,57,58,59,60,61,62,63,64,65,66,68,71,72,73,75,76,77,78,79,80,81,82,83,92,93,94,95,96,97,98,],[32,-9,-3,-5,32,-9,32,-16,-10,-11,-12,-13,-14,32,32,32,32,32,32,32,32,32,-15,32,32,32,32,32,32,32,32,32,-45,-30,-31,-32,-33,-34,-35,-36,]),'NE':([4,5,11,13,39,40,46,47,55,56,57,58,59,60,61,62,63,64,65,66,68,71,72,73,75,76,77,78,79,80,81,82,83,92,93,94,95,96,97,98,],[33,-9,-3,-5,33,-9,33,-16,-10,-11,-12,-13,-14,33,33,33,33,33,33,33,33,33,-15,33,33,33,33,33,33,33,33,33,-45,-30,-31,-32,-33,-34,-35,-36,]),'EQUALS':([5,],[34,]),'LBRACE':([5,86,87,103,104,],[37,37,37,37,37,]),'RPAREN':([11,13,36,39,40,47,55,56,57,58,59,60,61,62,63,64,65,67,68,69,71,72,73,74,75,76,77,78,79,80,81,82,83,84,88,89,90,92,93,94,95,96,97,98,99,102,105,],[-3,-5,-6,72,-9,-16,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,83,-25,-27,86,-15,87,-6,91,92,93,94,95,96,97,98,-45,-6,-21,103,-23,-30,-31,-32,-33,-34,-35,-36,-26,-6,-22,]),'COMMA':([11,13,40,47,55,56,57,58,59,60,61,62,63,64,65,68,72,83,88,92,93,94,95,96,97,98,],[-3,-5,-9,-16,-10,-11,-12,-13,-14,-37,-38,-39,-40,-41,-42,84,-15,-45,102,-30,-31,-32,-33,-34,-35,-36,]),'ELSE':([85,100,],[-44,104,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'program':([0,],[1,]),'statements':([0,37,],[2,70,]),'statement':([0,2,37,70,],[3,22,3,22,]),'expression':([0,2,7,12,14,23,24,25,26,27,28,29,30,31,32,33,34,36,37,38,41,43,48,49,50,51,52,53,54,70,84,],[4,4,39,46,47,55,56,57,58,59,60,61,62,63,64,65,66,68,4,71,73,75,76,77,78,79,80,81,82,4,68,]),'function_call':([0,2,7,10,12,14,23,24,25,26,27,28,29,30,31,32,33,34,36,37,38,41,43,48,49,50,51,52,53,54,70,84,],[11,11,11,44,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,]),'block':([5,86,87,103,104,],[35,100,101,106,107,]),'opt_args':([36,84,],[67,99,]),'empty':([36,74,84,102,],[69,90,69,90,]),'opt_params':([74,102,],[89,105,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> program","S'",1,None,None,None),
+  ('program -> statements','program',1,'p_program','parser.py',57),
+  ('statement -> expression','statement',1,'p_statement_expr','parser.py',62),
+  ('expression -> function_call','expression',1,'p_expression_call','parser.py',67),
+  ('statement -> ID EQUALS expression','statement',3,'p_statement_assign','parser.py',72),
+  ('expression -> NUMBER','expression',1,'p_expression_number','parser.py',78),
+  ('empty -> <empty>','empty',0,'p_empty','parser.py',84),
+  ('statements -> statements statement','statements',2,'p_statements','parser.py',89),
+  ('statements -> statement','statements',1,'p_statements_single','parser.py',95),
+  ('expression -> ID','expression',1,'p_expression_id','parser.py',100),
+  ('expression -> expression PLUS expression','expression',3,'p_expression_binop','parser.py',105),
+  ('expression -> expression MINUS expression','expression',3,'p_expression_binop','parser.py',106),
+  ('expression -> expression TIMES expression','expression',3,'p_expression_binop','parser.py',107),
+  ('expression -> expression DIVIDE expression','expression',3,'p_expression_binop','parser.py',108),
+  ('expression -> expression POWER expression','expression',3,'p_expression_binop','parser.py',109),
+  ('expression -> LPAREN expression RPAREN','expression',3,'p_expression_group','parser.py',114),
+  ('expression -> MINUS expression','expression',2,'p_expression_uminus','parser.py',119),
+  ('statement -> IF LPAREN expression RPAREN block','statement',5,'p_statement_if','parser.py',124),
+  ('statement -> IF LPAREN expression RPAREN block ELSE block','statement',7,'p_statement_if_else','parser.py',129),
+  ('statement -> WHILE LPAREN expression RPAREN block','statement',5,'p_statement_while','parser.py',134),
+  ('statement -> ID block','statement',2,'p_statement_parallel','parser.py',139),
+  ('opt_params -> ID','opt_params',1,'p_opt_params','parser.py',156),
+  ('opt_params -> ID COMMA opt_params','opt_params',3,'p_opt_params','parser.py',157),
+  ('opt_params -> empty','opt_params',1,'p_opt_params','parser.py',158),
+  ('statement -> DEF ID LPAREN opt_params RPAREN block','statement',6,'p_statement_function','parser.py',168),
+  ('opt_args -> expression','opt_args',1,'p_opt_args','parser.py',174),
+  ('opt_args -> expression COMMA opt_args','opt_args',3,'p_opt_args','parser.py',175),
+  ('opt_args -> empty','opt_args',1,'p_opt_args','parser.py',176),
+  ('statement -> PRINT LPAREN expression RPAREN','statement',4,'p_statement_print','parser.py',186),
+  ('statement -> PRINT function_call','statement',2,'p_statement_print_call','parser.py',191),
+  ('expression -> SIN LPAREN expression RPAREN','expression',4,'p_statement_sin','parser.py',196),
+  ('expression -> COS LPAREN expression RPAREN','expression',4,'p_statement_cos','parser.py',201),
+  ('expression -> TAN LPAREN expression RPAREN','expression',4,'p_statement_tan','parser.py',206),
+  ('expression -> EXP LPAREN expression RPAREN','expression',4,'p_statement_exp','parser.py',211),
+  ('expression -> SQRT LPAREN expression RPAREN','expression',4,'p_statement_sqrt','parser.py',216),
+  ('expression -> LOG LPAREN expression RPAREN','expression',4,'p_statement_log','parser.py',221),
+  ('expression -> ABS LPAREN expression RPAREN','expression',4,'p_statement_abs','parser.py',226),
+  ('expression -> expression LT expression','expression',3,'p_expression_comparison','parser.py',232),
+  ('expression -> expression GT expression','expression',3,'p_expression_comparison','parser.py',233),
+  ('expression -> expression LE expression','expression',3,'p_expression_comparison','parser.py',234),
+  ('expression -> expression GE expression','expression',3,'p_expression_comparison','parser.py',235),
+  ('expression -> expression EQ expression','expression',3,'p_expression_comparison','parser.py',236),
+  ('expression -> expression NE expression','expression',3,'p_expression_comparison','parser.py',237),
+  ('statement -> RETURN expression','statement',2,'p_statement_return','parser.py',243),
+  ('block -> LBRACE statements RBRACE','block',3,'p_block','parser.py',248),
+  ('function_call -> ID LPAREN opt_args RPAREN','function_call',4,'p_function_call','parser.py',253),
+]
@@ -0,0 +1,330 @@
+"""Modulo profiler."""
+
+import time
+from collections import Counter
+
+from .compact import parse_compact
+from .compiler import Compiler
+from .interpreter import global_env
+
+ROOT = "<program>"
+
+
+class Profiler:
+    """
+    Execution statistics of a program run by a ProfilingCompiler.
+
+    The profiler counts the evaluations of every operator, the calls and the
+    inclusive and exclusive time of every user-defined function, and the runs,
+    iterations and time of every while loop, keyed by its source line. Functions
+    and loops are also kept on a stack of frames, whose exclusive times are
+    accumulated per call path for flamegraph tools.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        """
+        Initializes an empty Profiler.
+
+        :param clock: The function returning the current time in seconds.
+        """
+        self.clock = clock
+        self.opcodes = Counter()
+        self.functions = {}
+        self.loops = {}
+        self.definitions = {}
+        self.stacks = Counter()
+        self.frames = []
+        self.active = Counter()
+        self.total = 0.0
+
+    def enter(self, label, function=None):
+        """
+        Pushes a frame.
+
+        :param label: The label of the frame in the call paths.
+        :param function: The name of the user-defined function, or None for loops
+                         and the program itself.
+        """
+        path = f"{self.frames[-1][0]};{label}" if self.frames else label
+        self.frames.append([path, self.clock(), 0.0, 0.0, function])
+
+    def leave(self):
+        """
+        Pops a frame and accounts its time to its call path and to its parent.
+
+        :return: A tuple with the elapsed time of the frame and the time spent in
+                 the user-defined functions it called.
+        """
+        path, start, children, calls, function = self.frames.pop()
+        elapsed = self.clock() - start
+        self.stacks[path] += elapsed - children
+        if self.frames:
+            self.frames[-1][2] += elapsed
+            if function is not None:
+                for frame in reversed(self.frames):
+                    if frame[4] is not None:
+                        frame[3] += elapsed
+                        break
+        return elapsed, calls
+
+    def enter_function(self, name):
+        """
+        Starts a call to a user-defined function.
+
+        :param name: The name of the function.
+        """
+        self.active[name] += 1
+        self.enter(name, name)
+
+    def leave_function(self, name):
+        """
+        Ends a call to a user-defined function. The inclusive time of recursive
+        calls is only counted once, at the outermost call.
+
+        :param name: The name of the function.
+        """
+        elapsed, calls = self.leave()
+        stats = self.functions.get(name)
+        if stats is None:
+            stats = self.functions[name] = {
+                "calls": 0,
+                "inclusive": 0.0,
+                "exclusive": 0.0,
+            }
+        stats["calls"] += 1
+        stats["exclusive"] += elapsed - calls
+        self.active[name] -= 1
+        if not self.active[name]:
+            stats["inclusive"] += elapsed
+
+    def leave_loop(self, line, iterations):
+        """
+        Ends a run of a while loop.
+
+        :param line: The source line of the loop, or None if it is not known.
+        :param iterations: The number of iterations of the run.
+        """
+        elapsed, _ = self.leave()
+        stats = self.loops.get(line)
+        if stats is None:
+            stats = self.loops[line] = {"runs": 0, "iterations": 0, "time": 0.0}
+        stats["runs"] += 1
+        stats["iterations"] += iterations
+        stats["time"] += elapsed
+
+    def run(self, compiled, env):
+        """
+        Runs a compiled program under the profiler.
+
+        :param compiled: The closure returned by ProfilingCompiler.compile.
+        :param env: The environment of the program.
+        :return: The result of the program.
+        """
+        self.enter(ROOT)
+        try:
+            return compiled(env)
+        finally:
+            while len(self.frames) > 1:
+                self.leave()
+            self.total += self.leave()[0]
+
+    def report(self, limit=10):
+        """
+        Formats the statistics as a ranked report.
+
+        :param limit: The maximum number of entries of each section.
+        :return: The report, as a string.
+        """
+        lines = [f"Profile: {self.total:.6f} s"]
+
+        functions = sorted(
+            self.functions.items(), key=lambda item: item[1]["exclusive"], reverse=True
+        )
+        lines.append("Functions (by exclusive time):")
+        lines.append(
+            f"  {'name':<20} {'line':>6} {'calls':>10} {'inclusive':>12} "
+            f"{'exclusive':>12}"
+        )
+        for name, stats in functions[:limit]:
+            line = self.definitions.get(name, "-")
+            lines.append(
+                f"  {name:<20} {line:>6} {stats['calls']:>10} "
+                f"{stats['inclusive']:>12.6f} {stats['exclusive']:>12.6f}"
+            )
+
+        loops = sorted(
+            self.loops.items(), key=lambda item: item[1]["time"], reverse=True
+        )
+        lines.append("Loops (by time):")
+        lines.append(f"  {'line':>6} {'runs':>10} {'iterations':>12} {'time':>12}")
+        for line, stats in loops[:limit]:
+            line = "-" if line is None else line
+            lines.append(
+                f"  {line:>6} {stats['runs']:>10} {stats['iterations']:>12} "
+                f"{stats['time']:>12.6f}"
+            )
+
+        lines.append("Operations (by count):")
+        for op, count in self.opcodes.most_common(limit):
+            lines.append(f"  {op:<10} {count:>12}")
+
+        return "\n".join(lines)
+
+    def collapsed(self):
+        """
+        Returns the exclusive time of every call path in the collapsed-stack format
+        read by flamegraph tools: one `frame;frame;frame microseconds` line per path.
+
+        :return: The collapsed stacks, as a string.
+        """
+        return "".join(
+            f"{path} {round(seconds * 1_000_000)}\n"
+            for path, seconds in sorted(self.stacks.items())
+        )
+
+    def write_collapsed(self, file_path):
+        """
+        Writes the collapsed stacks to a file.
+
+        :param file_path: The path of the file.
+        """
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(self.collapsed())
+
+
+class ProfilingCompiler(Compiler):
+    """
+    Compiler whose closures report to a Profiler.
+
+    Every closure counts the evaluations of its operator, calls to user-defined
+    functions are timed, and while loops count their iterations. The JIT, the
+    memoization of pure functions, the elimination of common subexpressions and the
+    specialization of operators are disabled, so that every call, iteration and
+    operation of the program is actually run and measured. The Compiler used when
+    profiling is off is not affected.
+    """
+
+    def __init__(self, profiler, positions=None, functions=None, output=None):
+        """
+        Initializes a ProfilingCompiler.
+
+        :param profiler: The Profiler receiving the statistics.
+        :param positions: Optional dictionary of node id to source line, as filled
+                          by CompactAst.to_tuple.
+        :param functions: The dictionary of user-defined functions. Defaults to the
+                          interpreter's global table.
+        :param output: Optional file receiving print statements and error messages.
+        """
+        super().__init__(
+            functions=functions,
+            jit=False,
+            output=output,
+            memoize=False,
+            cse=False,
+            specialize=False,
+        )
+        self.profiler = profiler
+        self.positions = {} if positions is None else positions
+
+    def compile(self, node):
+        """
+        Compiles an AST node into a closure that counts its evaluations.
+
+        :param node: The AST node to be compiled.
+        :return: The compiled closure.
+        """
+        compiled = super().compile(node)
+        if isinstance(node, tuple):
+            op = node[0]
+        elif isinstance(node, (int, float)):
+            op = "number"
+        else:
+            return compiled
+
+        counts = self.profiler.opcodes
+
+        def counted(env):
+            counts[op] += 1
+            return compiled(env)
+
+        return counted
+
+    def execute(self, name, definition, values, env):
+        """
+        Runs the body of a user-defined function in a profiler frame.
+
+        :param name: The name of the function.
+        :param definition: The (params, body) tuple of the function.
+        :param values: The evaluated argument values.
+        :param env: The environment of the caller.
+        :return: The result of the function call.
+        """
+        self.profiler.enter_function(name)
+        try:
+            return super().execute(name, definition, values, env)
+        finally:
+            self.profiler.leave_function(name)
+
+    def compile_def(self, node):
+        """
+        Compiles a function definition, recording the line where it appears.
+
+        :param node: A tuple of the form ("def", name, params, body).
+        :return: The compiled closure.
+        """
+        line = self.positions.get(id(node))
+        if line is not None:
+            self.profiler.definitions.setdefault(node[1], line)
+        return super().compile_def(node)
+
+    def compile_while(self, node):
+        """
+        Compiles a while loop that runs in a profiler frame and counts its
+        iterations.
+
+        :param node: A tuple of the form ("while", condition, block).
+        :return: The compiled closure.
+        """
+        condition = self.compile(node[1])
+        block = self.compile_block(node[2])
+        line = self.positions.get(id(node))
+        label = "while" if line is None else f"while:{line}"
+        profiler = self.profiler
+
+        def loop(env):
+            profiler.enter(label)
+            iterations = 0
+            try:
+                while condition(env):
+                    block(env)
+                    iterations += 1
+            finally:
+                profiler.leave_loop(line, iterations)
+            return env.get("x", 0)
+
+        return loop
+
+
+def profile_source(source, local_env=None, profiler=None):
+    """
+    Parses and runs a source text under the profiler.
+
+    The source is parsed into a CompactAst to know the line of every node, and
+    runs as written, without the AST optimizer, so that the statistics match the
+    source.
+
+    :param source: The source text.
+    :param local_env: Optional dictionary representing a local variable environment.
+    :param profiler: Optional Profiler receiving the statistics.
+    :return: A tuple with the AST, the result of the program and the Profiler, or
+             None if the source could not be parsed.
+    """
+    tree = parse_compact(source)
+    if tree is None:
+        return None
+    positions = {}
+    ast = tree.to_tuple(positions=positions)
+    profiler = Profiler() if profiler is None else profiler
+    compiled = ProfilingCompiler(profiler, positions).compile(ast)
+    env = local_env if local_env is not None else global_env
+    return ast, profiler.run(compiled, env), profiler
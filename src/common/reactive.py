@@ -0,0 +1,242 @@
+"""Modulo reactive."""
+
+import graphlib
+
+from .compiler import default_compiler
+from .interpreter import global_env, math_functions
+from .scope import assigned_names
+
+
+class Rule:  # pylint: disable=R0903
+    """
+    Top-level assignment recomputed when the variables or functions it reads change.
+    """
+
+    def __init__(self, node, compiled):
+        """
+        Initializes a Rule.
+
+        :param node: A tuple of the form ("assign", name, expression).
+        :param compiled: The compiled closure of the assignment.
+        """
+        self.name = node[1]
+        self.node = node
+        self.compiled = compiled
+        self.variables = set()
+        self.calls = set()
+        collect_reads(node[2], self.variables, self.calls)
+
+    def reads(self, functions):
+        """
+        Returns the variables and user-defined functions the assignment reads,
+        following the calls through the current function table. Since variables are
+        dynamically scoped, a function reads every variable its body mentions that
+        is not a parameter.
+
+        :param functions: The dictionary of user-defined functions.
+        :return: A tuple with the set of variable names and the set of function names.
+        """
+        return follow_calls(self.variables, self.calls, functions)
+
+
+def follow_calls(variables, calls, functions):
+    """
+    Extends the variables and functions a node reads with those read by the
+    functions it calls, transitively, through the current function table.
+
+    :param variables: The set of variable names the node reads.
+    :param calls: The set of function names the node calls.
+    :param functions: The dictionary of user-defined functions.
+    :return: A tuple with the set of variable names and the set of the names of the
+             defined functions called.
+    """
+    variables = set(variables)
+    called = set()
+    pending = list(calls)
+    while pending:
+        name = pending.pop()
+        if name in called or name not in functions:
+            continue
+        called.add(name)
+        params, body = functions[name]
+        names = set()
+        calls = set()
+        collect_reads(body, names, calls)
+        variables.update(names.difference(params))
+        pending.extend(calls)
+    return variables, called
+
+
+def collect_reads(node, variables, calls):
+    """
+    Collects the variables and the user-defined functions mentioned in a node.
+    Variables assigned inside the node are collected as well, since a function body
+    may read them before assigning them.
+
+    :param node: The AST node to be inspected.
+    :param variables: The set receiving the variable names.
+    :param calls: The set receiving the names of the called functions.
+    """
+    if isinstance(node, list):
+        for child in node:
+            collect_reads(child, variables, calls)
+    elif isinstance(node, tuple) and node:
+        op = node[0]
+        if op in ("var", "assign"):
+            variables.add(node[1])
+        elif op == "while":
+            variables.add("x")
+        if op == "call":
+            if node[1] not in math_functions:
+                calls.add(node[1])
+            collect_reads(node[2], variables, calls)
+        elif op != "def":
+            for child in node[1:]:
+                collect_reads(child, variables, calls)
+
+
+class Reactive:
+    """
+    Evaluates top-level statements and keeps the assignments up to date.
+
+    Every top-level assignment `name = expression` becomes a Rule recording the
+    variables and functions its expression reads. When a statement changes a
+    variable, or a `def` redefines a function, only the rules that depend on it,
+    directly or through other rules, are recomputed, in topological order, instead
+    of rerunning the whole script. An assignment that reads its own variable, such
+    as `i = i + 1`, or that would close a cycle of rules, is evaluated once as a
+    plain update, and the variable stops being recomputed.
+    """
+
+    def __init__(self, env=None, compiler=None):
+        """
+        Initializes a Reactive session.
+
+        :param env: The environment of the statements. Defaults to the global one.
+        :param compiler: The Compiler of the statements. Defaults to the shared one,
+                         bound to the global function table.
+        """
+        self.env = global_env if env is None else env
+        self.compiler = default_compiler if compiler is None else compiler
+        self.functions = self.compiler.functions
+        self.rules = {}
+        self.recomputed = []
+
+    def run(self, ast):
+        """
+        Evaluates a program, statement by statement, recomputing the dependent
+        assignments after each statement. The names of the recomputed variables are
+        left in `recomputed`.
+
+        :param ast: The root node of the AST, a program or a single statement.
+        :return: The result of the last statement.
+        """
+        statements = ast[1] if isinstance(ast, tuple) and ast[0] == "program" else [ast]
+        self.recomputed = []
+        result = None
+        for statement in statements:
+            result = self.execute(statement)
+        return result
+
+    def execute(self, statement):
+        """
+        Evaluates a top-level statement and recomputes its dependents.
+
+        :param statement: The AST node of the statement.
+        :return: The result of the statement.
+        """
+        variables = set()
+        functions = set()
+        if isinstance(statement, tuple) and statement[0] == "assign":
+            result = self.assign(statement)
+            variables.add(statement[1])
+        elif isinstance(statement, tuple) and statement[0] == "def":
+            self.functions.pop(statement[1], None)
+            result = self.compiler.compile(statement)(self.env)
+            functions.add(statement[1])
+        else:
+            result = self.compiler.compile(statement)(self.env)
+            assigned_names(statement, variables)
+            for name in variables:
+                self.rules.pop(name, None)
+        self.propagate(variables, functions)
+        return result
+
+    def assign(self, node):
+        """
+        Evaluates a top-level assignment and records it as the Rule of its variable,
+        unless it reads its own variable or closes a cycle of rules.
+
+        :param node: A tuple of the form ("assign", name, expression).
+        :return: The assigned value.
+        """
+        name = node[1]
+        with self.compiler.repeating():
+            rule = Rule(node, self.compiler.compile_statement(node))
+        self.rules.pop(name, None)
+        variables, _ = rule.reads(self.functions)
+        if name not in self.upstream(variables):
+            self.rules[name] = rule
+        return rule.compiled(self.env)
+
+    def upstream(self, variables):
+        """
+        Returns some variables and the variables their rules read, transitively.
+
+        :param variables: The set of variable names.
+        :return: The set of variable names.
+        """
+        seen = set(variables)
+        pending = list(variables)
+        while pending:
+            rule = self.rules.get(pending.pop())
+            if rule is None:
+                continue
+            for name in rule.reads(self.functions)[0]:
+                if name not in seen:
+                    seen.add(name)
+                    pending.append(name)
+        return seen
+
+    def propagate(self, variables, functions):
+        """
+        Recomputes the rules depending on changed variables or functions. Rules
+        caught in a cycle, which a redefined function may create, become plain
+        variables.
+
+        :param variables: The names of the changed variables.
+        :param functions: The names of the redefined functions.
+        """
+        if not self.rules or not (variables or functions):
+            return
+        reads = {name: rule.reads(self.functions) for name, rule in self.rules.items()}
+        dirty = {
+            name
+            for name, (names, calls) in reads.items()
+            if not names.isdisjoint(variables) or not calls.isdisjoint(functions)
+        }
+        pending = list(dirty)
+        while pending:
+            current = pending.pop()
+            for name, (names, _) in reads.items():
+                if name not in dirty and current in names:
+                    dirty.add(name)
+                    pending.append(name)
+        dirty.difference_update(variables)
+
+        while True:
+            graph = {name: reads[name][0] & dirty for name in dirty}
+            try:
+                order = list(graphlib.TopologicalSorter(graph).static_order())
+                break
+            except graphlib.CycleError as e:
+                cycle = sorted(set(e.args[1]))
+                self.compiler.report(
+                    f"Erro: dependência circular entre {', '.join(cycle)}.", "cycle"
+                )
+                for name in cycle:
+                    del self.rules[name]
+                    dirty.discard(name)
+        for name in order:
+            self.rules[name].compiled(self.env)
+            self.recomputed.append(name)
@@ -0,0 +1,122 @@
+"""Modulo scope."""
+
+
+class Frame(dict):
+    """
+    Variables of one call of a user-defined function.
+
+    A frame only holds the variables the function mentions, and is chained to the
+    environment of its caller, which is another Frame or, at the top of the chain,
+    the global environment dictionary. It behaves like the copy of the caller's
+    environment that the function used to run in: reads of names the function
+    mentions find the caller's values, and assignments never reach the caller.
+    """
+
+    __slots__ = ("parent",)
+
+    def __init__(self, parent):
+        """
+        Initializes an empty Frame.
+
+        :param parent: The environment of the caller, a Frame or a dictionary.
+        """
+        super().__init__()
+        self.parent = parent
+
+
+def scope_names(params, body, names=None):
+    """
+    Resolves the variables of a function body.
+
+    :param params: The parameter names of the function.
+    :param body: The body of the function.
+    :param names: Optional set receiving the names.
+    :return: The names read or assigned by the body, including `x`, the value of
+             while loops, that are not parameters, as a tuple.
+    """
+    names = set() if names is None else names
+    collect_names(body, names)
+    return tuple(sorted(names.difference(params)))
+
+
+def collect_names(node, names):
+    """
+    Collects the variables read or assigned inside a node. Bodies of nested
+    function definitions are skipped, since they run in their own frames.
+
+    :param node: The AST node to be inspected.
+    :param names: The set receiving the names.
+    """
+    if isinstance(node, list):
+        for child in node:
+            collect_names(child, names)
+    elif isinstance(node, tuple) and node:
+        op = node[0]
+        if op in ("var", "assign"):
+            names.add(node[1])
+        if op == "while":
+            names.add("x")
+        if op == "call":
+            collect_names(node[2], names)
+        elif op != "def":
+            for child in node[1:]:
+                collect_names(child, names)
+
+
+def assigned_names(node, names):
+    """
+    Collects the variables a statement assigns in its environment. Bodies of
+    function definitions are skipped, since they run in their own frames.
+
+    :param node: The AST node of the statement.
+    :param names: The set receiving the names.
+    """
+    if isinstance(node, list):
+        for child in node:
+            assigned_names(child, names)
+    elif isinstance(node, tuple) and node and node[0] != "def":
+        if node[0] == "assign":
+            names.add(node[1])
+        for child in node[1:]:
+            assigned_names(child, names)
+
+
+def lookup(env, name):
+    """
+    Looks up a variable along a chain of frames.
+
+    :param env: A Frame or an environment dictionary.
+    :param name: The name of the variable.
+    :return: The environment holding the variable, or None if it is not defined.
+    """
+    while name not in env:
+        if env.__class__ is not Frame:
+            return None
+        env = env.parent
+    return env
+
+
+def enter_frame(caller, names, params, values):
+    """
+    Creates the frame of a call.
+
+    The cost depends on the number of variables of the function, not on the size
+    of the caller's environment.
+
+    :param caller: The environment of the caller, a Frame or a dictionary.
+    :param names: The variables of the function other than its parameters, as
+                  returned by `scope_names`.
+    :param params: The parameter names of the function.
+    :param values: The argument values.
+    :return: The new Frame.
+    """
+    frame = Frame(caller)
+    for name in names:
+        if name in caller:
+            frame[name] = caller[name]
+        elif caller.__class__ is Frame:
+            holder = lookup(caller.parent, name)
+            if holder is not None:
+                frame[name] = holder[name]
+    frame.update(zip(params, values))
+    return frame
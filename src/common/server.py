@@ -0,0 +1,277 @@
+"""Modulo server."""
+
+import asyncio
+import contextlib
+import io
+import json
+import signal
+from concurrent.futures import ProcessPoolExecutor
+
+from .batch import warm_worker
+from .cache import parse_cache
+from .session import Evaluation, evaluate_script
+
+DEFAULT_TIMEOUT = 10.0
+DEADLINE_GRACE = 1.0
+MAX_PENDING = 64
+LINE_LIMIT = 16 * 1024 * 1024
+RESPONSE_FIELDS = ("result", "output", "error", "elapsed")
+
+
+class DeadlineExceeded(Exception):
+    """
+    Exception raised in a worker process when a request runs past its deadline.
+    """
+
+
+def on_deadline(_signum, _frame):
+    """
+    Signal handler interrupting the evaluation of a request.
+
+    :raises DeadlineExceeded: Always.
+    """
+    raise DeadlineExceeded("the request exceeded its deadline")
+
+
+def evaluate_request(source, timeout, budget=None):
+    """
+    Evaluates the source of a request in a fresh interpreter, in a worker process.
+
+    Where the platform supports interval timers, the evaluation is interrupted when
+    the deadline expires, so a runaway loop frees its worker.
+
+    :param source: The source text.
+    :param timeout: The deadline of the request, in seconds.
+    :param budget: Optional Budget limiting the evaluation. Its time limit is
+                   lowered to the deadline.
+    :return: The evaluation as a dictionary.
+    """
+    if budget is not None:
+        budget.seconds = (
+            timeout if budget.seconds is None else min(budget.seconds, timeout)
+        )
+    alarm = hasattr(signal, "setitimer")
+    output = io.StringIO()
+    try:
+        if alarm:
+            signal.signal(signal.SIGALRM, on_deadline)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        with contextlib.redirect_stdout(output):
+            evaluation = evaluate_script(
+                source, cache=parse_cache, output=output, budget=budget
+            )
+    except DeadlineExceeded as e:
+        evaluation = Evaluation(None, output=output.getvalue(), error=deadline_error(e))
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return evaluation.as_dict()
+
+
+def deadline_error(error):
+    """
+    Formats the error of a request that exceeded its deadline.
+
+    :param error: The exception.
+    :return: The error message.
+    """
+    return f"{DeadlineExceeded.__name__}: {error}"
+
+
+def parse_address(address):
+    """
+    Parses the address of the server.
+
+    :param address: `unix:PATH` for a Unix socket, or `HOST:PORT` or `PORT` for TCP.
+    :return: A ("unix", path) or ("tcp", host, port) tuple.
+    :raises ValueError: If the port is not a number.
+    """
+    if address.startswith("unix:"):
+        return ("unix", address[len("unix:") :])
+    host, _, port = address.rpartition(":")
+    return ("tcp", host or "127.0.0.1", int(port))
+
+
+class Server:
+    """
+    Asyncio evaluation server speaking a JSON-lines protocol.
+
+    Each request is a line holding a JSON object with the `source` of an expression
+    or script, an optional `id` and an optional `timeout` in seconds. Each response
+    is a line holding the `id`, the `result`, the captured `output`, the `error`, if
+    any, and the `elapsed` time. Requests run in fresh interpreters on a pool of
+    worker processes, so long evaluations never block the event loop.
+
+    A connection may send many requests without waiting for the responses. They are
+    evaluated concurrently and answered in the order they were received; at most
+    `max_pending` requests per connection are in flight before reading pauses.
+    """
+
+    def __init__(
+        self,
+        workers=None,
+        timeout=DEFAULT_TIMEOUT,
+        max_pending=MAX_PENDING,
+        budget=None,
+    ):
+        """
+        Initializes a Server.
+
+        :param workers: The number of worker processes. Defaults to the number of
+                        CPUs.
+        :param timeout: The default and maximum deadline of a request, in seconds.
+        :param max_pending: The maximum number of requests in flight per connection.
+        :param budget: Optional Budget limiting every request.
+        """
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=warm_worker
+        )
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.budget = budget
+
+    async def handle(self, reader, writer):
+        """
+        Serves a connection: reads requests, evaluates them concurrently and writes
+        the responses in order.
+
+        :param reader: The StreamReader of the connection.
+        :param writer: The StreamWriter of the connection.
+        """
+        pending = asyncio.Queue(self.max_pending)
+        responder = asyncio.create_task(self.respond(pending, writer))
+        try:
+            while not responder.done():
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    await pending.put(asyncio.create_task(self.process(line)))
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            if not responder.done():
+                await pending.put(None)
+                await responder
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def respond(self, pending, writer):
+        """
+        Writes the responses of a connection in the order of the requests.
+
+        When the client goes away, the remaining requests are cancelled.
+
+        :param pending: The queue of request tasks, ended by None.
+        :param writer: The StreamWriter of the connection.
+        """
+        while True:
+            task = await pending.get()
+            if task is None:
+                return
+            reply = await task
+            try:
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+            except ConnectionError:
+                break
+        while not pending.empty():
+            task = pending.get_nowait()
+            if task is not None:
+                task.cancel()
+
+    async def process(self, line):
+        """
+        Evaluates a request line on the worker pool.
+
+        :param line: The request, as a line of JSON.
+        :return: The response dictionary.
+        """
+        ident = None
+        try:
+            request = json.loads(line)
+            ident = request.get("id")
+            source = request["source"]
+            timeout = min(float(request.get("timeout", self.timeout)), self.timeout)
+            if not isinstance(source, str) or timeout <= 0:
+                raise TypeError("'source' must be a string and 'timeout' positive")
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return response(ident, Evaluation(ident, error=f"Invalid request: {e}"))
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self.executor, evaluate_request, source, timeout, self.budget
+        )
+        try:
+            result = await asyncio.wait_for(future, timeout + DEADLINE_GRACE)
+        except asyncio.TimeoutError:
+            error = deadline_error(
+                DeadlineExceeded("the request exceeded its deadline")
+            )
+            return response(ident, Evaluation(ident, error=error, elapsed=timeout))
+        except Exception as e:  # pylint: disable=W0718
+            return response(ident, Evaluation(ident, error=f"{type(e).__name__}: {e}"))
+        return {"id": ident, **{field: result[field] for field in RESPONSE_FIELDS}}
+
+    async def serve(self, address, ready=None):
+        """
+        Listens on an address until cancelled.
+
+        :param address: The address, as accepted by `parse_address`.
+        :param ready: Optional function called with the listening asyncio server.
+        """
+        kind, *location = parse_address(address)
+        if kind == "unix":
+            server = await asyncio.start_unix_server(
+                self.handle, location[0], limit=LINE_LIMIT
+            )
+        else:
+            server = await asyncio.start_server(
+                self.handle, location[0], location[1], limit=LINE_LIMIT
+            )
+        if ready is not None:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def response(ident, evaluation):
+    """
+    Builds a response from an Evaluation.
+
+    :param ident: The id of the request.
+    :param evaluation: The Evaluation.
+    :return: The response dictionary.
+    """
+    result = evaluation.as_dict()
+    return {"id": ident, **{field: result[field] for field in RESPONSE_FIELDS}}
+
+
+def run_server(address, workers=None, timeout=DEFAULT_TIMEOUT, budget=None):
+    """
+    Runs the evaluation server until interrupted.
+
+    :param address: `unix:PATH`, `HOST:PORT` or `PORT`.
+    :param workers: The number of worker processes. Defaults to the number of CPUs.
+    :param timeout: The default and maximum deadline of a request, in seconds.
+    :param budget: Optional Budget limiting every request.
+    """
+    server = Server(workers=workers, timeout=timeout, budget=budget)
+
+    def ready(listener):
+        names = ", ".join(str(sock.getsockname()) for sock in listener.sockets)
+        print(f"Serving on {names}. Press Ctrl+C to stop.")
+
+    try:
+        asyncio.run(server.serve(address, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
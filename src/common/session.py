@@ -0,0 +1,301 @@
+"""Modulo session."""
+
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .budget import BudgetCompiler
+from .compiler import Compiler
+from .optimizer import Optimizer
+from .parser import clone_parser
+from .snapshot import load_snapshot, save_snapshot, warm_start
+from .tokenizer import get_tokenizer
+
+
+class Interpreter:
+    """
+    Self-contained interpreter session.
+
+    Each Interpreter owns its variable environment, its function table, its compiler
+    and its own lexer and parser instances, so several interpreters can evaluate
+    scripts at the same time, from different threads, without sharing any state.
+    """
+
+    def __init__(  # pylint: disable=R0913,R0917
+        self,
+        jit=True,
+        output=None,
+        cache=None,
+        optimize=True,
+        budget=None,
+        diagnostics=None,
+    ):
+        """
+        Initializes an Interpreter with empty environments.
+
+        :param jit: Whether hot functions and loops are translated to Python code.
+        :param output: Optional Sink or file receiving print statements, and error
+                       messages without a diagnostics channel. Defaults to the
+                       global output channel.
+        :param cache: Optional ParseCache used to skip parsing known sources.
+        :param optimize: Whether ASTs are optimized before being evaluated.
+        :param budget: Optional Budget limiting every evaluation. The JIT is not
+                       used when a budget is given.
+        :param diagnostics: Optional callable receiving the evaluation errors, such
+                            as a Diagnostics channel.
+        """
+        self.env = {}
+        self.functions = {}
+        self.output = output
+        self.diagnostics = diagnostics
+        self.cache = cache
+        self.budget = budget
+        self.lexer = get_tokenizer().clone()
+        self.parser = clone_parser()
+        self.compiler = self.new_compiler(jit)
+        self.optimizer = Optimizer(enabled=optimize)
+
+    def new_compiler(self, jit):
+        """
+        Creates the compiler of this interpreter.
+
+        :param jit: Whether hot functions and loops are translated to Python code.
+        :return: A BudgetCompiler if the interpreter has a budget, else a Compiler.
+        """
+        if self.budget is not None:
+            return BudgetCompiler(
+                self.budget,
+                self.functions,
+                output=self.output,
+                diagnostics=self.diagnostics,
+            )
+        return Compiler(
+            self.functions, jit=jit, output=self.output, diagnostics=self.diagnostics
+        )
+
+    def parse(self, source, report=None):
+        """
+        Parses a source text with the parser of this interpreter. Illegal
+        characters and syntax errors are reported to the output or diagnostics
+        channel of the interpreter, like the errors of the evaluation.
+
+        :param source: The source text.
+        :param report: Optional function receiving the errors instead of the
+                       channels of the interpreter.
+        :return: The AST, or None if the source could not be parsed.
+        """
+        self.lexer.lineno = 1
+        self.lexer.report = self.compiler.report if report is None else report
+        return self.parser.parse(source, lexer=self.lexer)
+
+    def evaluate(self, ast):
+        """
+        Evaluates an AST in the environment of this interpreter. A buffered output
+        is flushed when the evaluation ends.
+
+        :param ast: The root node of the AST.
+        :return: The result of the evaluation.
+        :raises BudgetExceeded: If the evaluation exceeds the budget.
+        """
+        compiled = self.compiler.compile(self.optimizer.optimize(ast))
+        if self.budget is not None:
+            self.budget.start()
+        try:
+            return compiled(self.env)
+        finally:
+            self.compiler.channels.flush()
+
+    def parse_source(self, source):
+        """
+        Parses a source text, through the parse cache of this interpreter if any.
+
+        :param source: The source text.
+        :return: The AST, or None if the source could not be parsed.
+        """
+        if self.cache is not None:
+            return self.cache.parse(source, self.parse, self.compiler.report)
+        return self.parse(source)
+
+    def run(self, source):
+        """
+        Parses and evaluates a source text.
+
+        :param source: The source text.
+        :return: The result of the evaluation, or None if the source could not be parsed.
+        """
+        ast = self.parse_source(source)
+        if ast is None:
+            return None
+        return self.evaluate(ast)
+
+    def save(self, path, source=None):
+        """
+        Saves the variables, functions and translated code of this interpreter to a
+        snapshot file.
+
+        :param path: The path of the snapshot file.
+        :param source: Optional source text that produced the state.
+        :raises SnapshotError: If a variable holds a value that cannot be saved.
+        """
+        save_snapshot(path, self.env, self.compiler, source)
+
+    def load(self, path, source=None):
+        """
+        Loads a snapshot file into this interpreter.
+
+        :param path: The path of the snapshot file.
+        :param source: Optional source text the snapshot must have been produced
+                       from.
+        :raises SnapshotError: If the snapshot is rejected.
+        """
+        load_snapshot(path, self.env, self.compiler, source)
+
+    def warm_start(self, path, source):
+        """
+        Runs a prelude, or loads its state from a snapshot saved by a previous run.
+
+        :param path: The path of the snapshot file.
+        :param source: The source text of the prelude.
+        :return: True if the snapshot was loaded, False if the prelude was run.
+        """
+        return warm_start(path, source, self.run, self.env, self.compiler)
+
+    def reset(self):
+        """
+        Clears the variables, functions and compiled code of this interpreter.
+        """
+        self.env.clear()
+        self.functions.clear()
+        self.compiler = self.new_compiler(self.compiler.jit is not None)
+
+
+class Evaluation:  # pylint: disable=R0903
+    """
+    Outcome of a script evaluated in its own interpreter.
+    """
+
+    def __init__(self, name, result=None, output="", error=None, elapsed=0.0):
+        """
+        Initializes an Evaluation.
+
+        :param name: An identifier of the script, such as its path.
+        :param result: The result of the last statement of the script.
+        :param output: Everything the script printed, including error messages.
+        :param error: A description of the exception that stopped the script, if any.
+        :param elapsed: The evaluation time in seconds.
+        """
+        self.name = name
+        self.result = result
+        self.output = output
+        self.error = error
+        self.elapsed = elapsed
+
+    def as_dict(self):
+        """
+        Converts the evaluation to a dictionary of JSON-compatible values.
+
+        :return: The dictionary.
+        """
+        result = self.result
+        if not isinstance(result, (int, float, bool, type(None))):
+            result = repr(result)
+        return {
+            "name": self.name,
+            "result": result,
+            "output": self.output,
+            "error": self.error,
+            "elapsed": self.elapsed,
+        }
+
+
+def evaluate_script(  # pylint: disable=R0913,R0917
+    source, name=None, jit=True, cache=None, output=None, budget=None, diagnostics=None
+):
+    """
+    Evaluates a script in a fresh interpreter, capturing its output.
+
+    Exceptions raised by the script are recorded in the evaluation instead of being
+    propagated, so one failing script does not affect the others.
+
+    :param source: The source text of the script.
+    :param name: An identifier of the script, such as its path.
+    :param jit: Whether hot functions and loops are translated to Python code.
+    :param cache: Optional ParseCache used to skip parsing known sources.
+    :param output: Optional StringIO, ListSink or NullSink receiving the output.
+                   Defaults to a new StringIO.
+    :param budget: Optional Budget limiting the evaluation.
+    :param diagnostics: Optional callable receiving the evaluation errors, which
+                        are then left out of the output.
+    :return: An Evaluation.
+    """
+    output = io.StringIO() if output is None else output
+    evaluation = Evaluation(name)
+    start = time.perf_counter()
+    try:
+        interpreter = Interpreter(
+            jit=jit, output=output, cache=cache, budget=budget, diagnostics=diagnostics
+        )
+        ast = interpreter.parse_source(source)
+        if ast is None:
+            evaluation.error = "SyntaxError: the script could not be parsed."
+        else:
+            evaluation.result = interpreter.evaluate(ast)
+    except Exception as e:  # pylint: disable=W0718
+        evaluation.error = f"{type(e).__name__}: {e}"
+    evaluation.elapsed = time.perf_counter() - start
+    evaluation.output = output.getvalue()
+    return evaluation
+
+
+class InterpreterPool:
+    """
+    Evaluates independent scripts concurrently on a thread pool.
+
+    Every script runs in its own Interpreter, so scripts never see each other's
+    variables or functions, and its output is captured in the returned Evaluation.
+    """
+
+    def __init__(self, max_workers=None, jit=True, cache=None):
+        """
+        Initializes an InterpreterPool.
+
+        :param max_workers: The maximum number of threads. Defaults to the
+                            ThreadPoolExecutor default.
+        :param jit: Whether hot functions and loops are translated to Python code.
+        :param cache: Optional ParseCache shared by the scripts.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.jit = jit
+        self.cache = cache
+
+    def submit(self, source, name=None):
+        """
+        Schedules the evaluation of a script.
+
+        :param source: The source text of the script.
+        :param name: An identifier of the script, such as its path.
+        :return: A Future resolving to an Evaluation.
+        """
+        return self.executor.submit(evaluate_script, source, name, self.jit, self.cache)
+
+    def map(self, sources):
+        """
+        Evaluates several scripts concurrently.
+
+        :param sources: An iterable of source texts.
+        :return: A list of Evaluations, in the order of the sources.
+        """
+        futures = [self.submit(source, index) for index, source in enumerate(sources)]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """
+        Waits for the pending scripts and releases the threads.
+        """
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
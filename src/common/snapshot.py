@@ -0,0 +1,240 @@
+"""Modulo snapshot."""
+
+import contextlib
+import hashlib
+import marshal
+import os
+import struct
+
+from .cache import source_key
+from .compiler import default_compiler
+from .interpreter import global_env
+from .jit import JitEntry, Module
+from .tables import grammar_version
+
+MAGIC = b"PLYSNAP\0"
+FORMAT_VERSION = 1
+HEADER = struct.Struct(">8sH32s")
+
+
+class SnapshotError(Exception):
+    """
+    Exception raised when a session cannot be saved to a snapshot, or when a
+    snapshot is rejected because it is damaged, stale or of another format.
+    """
+
+
+def jit_constants(namespace):
+    """
+    Returns the constants a translated module references, such as the nodes of the
+    functions it defines.
+
+    :param namespace: The namespace of the generated code.
+    :return: A dictionary of constant name to value.
+    """
+    return {
+        name: value
+        for name, value in namespace.items()
+        if name.startswith("_c") and name[2:].isdigit()
+    }
+
+
+def dump_jit(compiler, translate=True):
+    """
+    Collects the translated code of the user-defined functions of a compiler.
+
+    :param compiler: The Compiler whose JIT entries are saved.
+    :param translate: Whether the functions that are not hot yet are translated
+                      first, so that a loaded session runs them as Python code from
+                      the first call. Functions whose calls nest too deeply to be
+                      translated are skipped.
+    :return: A dictionary of function name to a (kind, deps, code, source,
+             constants) tuple, where kind is "fast" or "function".
+    """
+    jit = compiler.jit
+    if jit is None:
+        return {}
+    if translate:
+        for name, definition in compiler.functions.items():
+            if name not in jit.entries:
+                try:
+                    jit.entries[name] = jit.translate_function(name, definition)
+                except RecursionError:
+                    continue
+
+    saved = {}
+    for name, entry in jit.entries.items():
+        function = entry.fast or entry.function
+        if function is None or not entry.is_valid(compiler.functions):
+            continue
+        constants = jit_constants(function.__globals__)
+        try:
+            marshal.dumps(constants)
+        except ValueError:
+            continue
+        code = compile(entry.source, f"<jit {name}>", "exec")
+        kind = "fast" if entry.fast is not None else "function"
+        saved[name] = (kind, tuple(entry.deps), code, entry.source, constants)
+    return saved
+
+
+def load_jit(compiler, saved):
+    """
+    Installs saved translated code in the JIT of a compiler. Code whose functions
+    are missing from the function table is skipped.
+
+    :param compiler: The Compiler receiving the JIT entries.
+    :param saved: The dictionary returned by `dump_jit`.
+    """
+    jit = compiler.jit
+    if jit is None:
+        return
+    for name, (kind, deps, code, source, constants) in saved.items():
+        if not all(dep in compiler.functions for dep in deps):
+            continue
+        module = Module(jit)
+        module.namespace.update(constants)
+        module.namespace["_define"] = jit.define
+        module.deps = {dep: compiler.functions[dep] for dep in deps}
+        if kind == "fast":
+            module.translated = set(deps)
+            function = module.load(code, f"f_{name}")
+            jit.entries[name] = JitEntry(module.deps, fast=function, source=source)
+        else:
+            function = module.load(code, "_function")
+            jit.entries[name] = JitEntry(module.deps, function=function, source=source)
+
+
+def save_snapshot(path, env=None, compiler=None, source=None, translate=True):
+    """
+    Saves the state of a session to a snapshot file: its variables, its function
+    table, with the bodies as optimized when they were defined, and the translated
+    code of its functions.
+
+    The file holds a header with a magic number, the format version and the SHA-256
+    checksum of the payload, followed by the payload in `marshal` format. The
+    payload records the grammar version, which covers the Python version, and the
+    hash of the source that produced the state, if given, so that stale snapshots
+    are rejected when loaded. The file is replaced atomically.
+
+    :param path: The path of the snapshot file.
+    :param env: The environment to be saved. Defaults to the global environment.
+    :param compiler: The Compiler whose functions are saved. Defaults to the one
+                     bound to the global function table.
+    :param source: Optional source text that produced the state, such as a prelude.
+    :param translate: Whether every function is translated by the JIT before being
+                      saved.
+    :raises SnapshotError: If a variable holds a value that cannot be saved.
+    :raises OSError: If the file cannot be written.
+    """
+    env = global_env if env is None else env
+    compiler = default_compiler if compiler is None else compiler
+    state = {
+        "grammar": grammar_version(),
+        "source": None if source is None else source_key(source),
+        "env": dict(env),
+        "functions": dict(compiler.functions),
+        "jit": dump_jit(compiler, translate),
+    }
+    try:
+        payload = marshal.dumps(state)
+    except ValueError as e:
+        raise SnapshotError(
+            f"the session holds a value that cannot be saved: {e}"
+        ) from e
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, hashlib.sha256(payload).digest())
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as file:
+            file.write(header)
+            file.write(payload)
+        os.replace(temp_path, path)
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+
+
+def read_snapshot(path, source=None):
+    """
+    Reads and validates a snapshot file.
+
+    :param path: The path of the snapshot file.
+    :param source: Optional source text the snapshot must have been produced from.
+    :return: The state dictionary, with the keys "grammar", "source", "env",
+             "functions" and "jit".
+    :raises SnapshotError: If the file is not a snapshot, was written by another
+                           format version, is damaged, was produced by another
+                           grammar or Python version, or from another source.
+    :raises OSError: If the file cannot be read.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        raise SnapshotError(f"'{path}' is not a snapshot.")
+    magic, version, checksum = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError(f"'{path}' is not a snapshot.")
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"'{path}' has format version {version}.")
+    payload = memoryview(data)[HEADER.size :]
+    if hashlib.sha256(payload).digest() != checksum:
+        raise SnapshotError(f"'{path}' is damaged: checksum mismatch.")
+    try:
+        state = marshal.loads(payload)
+    except (EOFError, ValueError, TypeError) as e:
+        raise SnapshotError(f"'{path}' is damaged: {e}") from e
+    if state["grammar"] != grammar_version():
+        raise SnapshotError(f"'{path}' was saved by another grammar or Python.")
+    if source is not None and state["source"] != source_key(source):
+        raise SnapshotError(f"'{path}' was saved from another source.")
+    return state
+
+
+def load_snapshot(path, env=None, compiler=None, source=None):
+    """
+    Loads a snapshot into a session. The saved variables and functions are added
+    to the current ones, replacing those with the same name.
+
+    :param path: The path of the snapshot file.
+    :param env: The environment receiving the variables. Defaults to the global
+                environment.
+    :param compiler: The Compiler receiving the functions and their translated
+                     code. Defaults to the one bound to the global function table.
+    :param source: Optional source text the snapshot must have been produced from.
+    :return: The state dictionary read from the file.
+    :raises SnapshotError: If the snapshot is rejected.
+    :raises OSError: If the file cannot be read.
+    """
+    env = global_env if env is None else env
+    compiler = default_compiler if compiler is None else compiler
+    state = read_snapshot(path, source)
+    env.update(state["env"])
+    compiler.functions.update(state["functions"])
+    load_jit(compiler, state["jit"])
+    return state
+
+
+def warm_start(path, source, run, env=None, compiler=None):
+    """
+    Brings a session to the state produced by a source text, such as a prelude of
+    function definitions, from a snapshot when one matches the source. Otherwise the
+    source is run and its state is saved for the next process.
+
+    :param path: The path of the snapshot file.
+    :param source: The source text.
+    :param run: The function evaluating the source text in the session.
+    :param env: The environment of the session. Defaults to the global environment.
+    :param compiler: The Compiler of the session. Defaults to the one bound to the
+                     global function table.
+    :return: True if the snapshot was loaded, False if the source was run.
+    :raises SnapshotError: If the resulting state cannot be saved.
+    """
+    try:
+        load_snapshot(path, env, compiler, source)
+        return True
+    except (OSError, SnapshotError):
+        pass
+    run(source)
+    save_snapshot(path, env, compiler, source)
+    return False
@@ -0,0 +1,402 @@
+"""Modulo specialize."""
+
+import contextlib
+from collections import Counter
+
+from .interpreter import eval_variable, math_functions
+from .jit import PYTHON_OPERATORS
+from .loops import HOISTED
+
+ANY = object
+
+KINDS = (bool, int, float)
+
+RANKS = {None: 0, bool: 1, int: 2, float: 3, ANY: 4}
+
+ARITHMETIC = {"+", "-", "*", "^"}
+
+COMPARISONS = {"<", ">", "==", "!=", "<=", ">="}
+
+EXACT_FLOATS = 2**53
+
+TEMPLATES = {}
+
+
+def widen(first, second):
+    """
+    Joins two types, following the numeric promotion of Python: a variable holding
+    ints and floats is expected to hold floats.
+
+    :param first: A type, or None when no value has been seen yet.
+    :param second: Another type, or None.
+    :return: The wider type. ANY stands for a value that is not known to be a number.
+    """
+    return first if RANKS[first] >= RANKS[second] else second
+
+
+def arithmetic_type(operand):
+    """
+    Returns the type an operand contributes to an arithmetic result, in which bools
+    behave like ints.
+
+    :param operand: The type of the operand.
+    :return: The type.
+    """
+    return int if operand is bool else operand
+
+
+def expression_type(node, types, cache=None):
+    """
+    Predicts the type of the value of an expression.
+
+    Literals have the type chosen by the lexer, comparisons give bools, the
+    mathematical functions give floats, except `abs`, which keeps the type of its
+    argument, and divisions give floats. The prediction is checked by the guards of
+    the specialized closures, so it only has to be right most of the time.
+
+    :param node: The AST node of the expression.
+    :param types: The dictionary of variable name to predicted type.
+    :param cache: Optional dictionary of node id to a (node, type) tuple, holding
+                  the types of the subexpressions already visited.
+    :return: bool, int or float, ANY if the type is unknown, or None if the
+             expression only reads variables that have no value yet.
+    """
+    if cache is None:
+        return node_type(node, types, {})
+    cached = cache.get(id(node))
+    if cached is not None and cached[0] is node:
+        return cached[1]
+    kind = node_type(node, types, cache)
+    cache[id(node)] = (node, kind)
+    return kind
+
+
+def node_type(node, types, cache):  # pylint: disable=R0911
+    """
+    Predicts the type of the value of an expression from the types of its
+    children, as described in `expression_type`.
+
+    :param node: The AST node of the expression.
+    :param types: The dictionary of variable name to predicted type.
+    :param cache: The dictionary of the types of the subexpressions.
+    :return: The type.
+    """
+    if node.__class__ in KINDS:
+        return node.__class__
+    if not isinstance(node, tuple):
+        return ANY
+    op = node[0]
+    if op == "var":
+        return types.get(node[1], ANY)
+    if op == HOISTED:
+        return expression_type(node[3], types, cache)
+    if op in COMPARISONS:
+        return bool
+    if op in ARITHMETIC or op == "/":
+        joined = widen(
+            arithmetic_type(expression_type(node[1], types, cache)),
+            arithmetic_type(expression_type(node[2], types, cache)),
+        )
+        return float if op == "/" and joined in (int, float) else joined
+    if op == "neg":
+        return arithmetic_type(expression_type(node[1], types, cache))
+    if op == "if-else":
+        return widen(
+            expression_type(node[2], types, cache),
+            expression_type(node[3], types, cache),
+        )
+    if op == "call" and node[1] in math_functions and len(node[2]) == 1:
+        if node[1] == "abs":
+            return arithmetic_type(expression_type(node[2][0], types, cache))
+        return float
+    return ANY
+
+
+def collect_assignments(node, assignments):
+    """
+    Collects the assignments of the statements of a node, outside function bodies.
+    Expressions are not visited, since they cannot assign variables.
+
+    :param node: The AST node to be inspected.
+    :param assignments: The list receiving (name, expression) tuples.
+    """
+    if isinstance(node, list):
+        for child in node:
+            collect_assignments(child, assignments)
+    elif isinstance(node, tuple) and node:
+        op = node[0]
+        if op == "assign":
+            assignments.append((node[1], node[2]))
+        elif op in ("if", "while"):
+            for block in node[2:]:
+                collect_assignments(block, assignments)
+        elif op in ("block", "parallel", "program"):
+            collect_assignments(node[1], assignments)
+
+
+def infer_types(statements, seeds=None):
+    """
+    Infers the types of the variables of a program or of a function body.
+
+    The inference does not follow the order of the statements: a variable has the
+    widest type of all the values assigned to it, which is computed by iterating
+    over the assignments until no type changes.
+
+    :param statements: The list of statements.
+    :param seeds: Optional dictionary of variable name to the type of its value on
+                  entry, such as the parameters of a function.
+    :return: The dictionary of variable name to predicted type. Variables that are
+             only read are not included.
+    """
+    assignments = []
+    collect_assignments(statements, assignments)
+    types = {name: None for name, _ in assignments}
+    types.update(seeds or {})
+
+    changed = True
+    while changed:
+        changed = False
+        cache = {}
+        for name, expression in assignments:
+            joined = widen(types[name], expression_type(expression, types, cache))
+            if joined is not types[name]:
+                types[name] = joined
+                changed = True
+    return types
+
+
+def operand_source(slot, shape, indent):
+    """
+    Returns the lines loading an operand in the source of a template.
+
+    :param slot: The name of the operand in the template, "a" or "b".
+    :param shape: "var", "expr" or "const".
+    :param indent: The indentation of the lines.
+    :return: The list of lines.
+    """
+    if shape == "var":
+        return [
+            f"{indent}try:",
+            f"{indent}    {slot} = env[{slot}_arg]",
+            f"{indent}except KeyError:",
+            f"{indent}    {slot} = missing({slot}_arg, env)",
+        ]
+    if shape == "expr":
+        return [f"{indent}{slot} = {slot}_arg(env)"]
+    return []
+
+
+def template(op, shapes, kinds):
+    """
+    Returns the factory of the specialized closures of an operator, for operands of
+    the given shapes and types, generating it the first time it is needed.
+
+    Every combination has its own code, so the operations inside run on values of a
+    single type, which the interpreter of Python executes on its fast paths. The
+    closure loads its operands like the generic one, checks their classes, and
+    falls back to the generic operation on the same values when a check fails.
+
+    :param op: The operator.
+    :param shapes: The shapes of the operands, "var", "expr" or "const".
+    :param kinds: The types of the operands.
+    :return: A function receiving, for each operand, its name, closure or value and
+             its value converted for the fast path, and then the callables
+             reporting missing variables and errors, and returning the closure.
+    """
+    key = (op, shapes, kinds)
+    factory = TEMPLATES.get(key)
+    if factory is not None:
+        return factory
+
+    guards = " and ".join(
+        f"{slot}.__class__ is {kind.__name__}"
+        for slot, shape, kind in zip("ab", shapes, kinds)
+        if shape != "const"
+    )
+    fast, slow = (
+        [
+            f"{slot}_{suffix}" if shape == "const" else slot
+            for slot, shape in zip("ab", shapes)
+        ]
+        for suffix in ("fast", "arg")
+    )
+    python = "/" if op == "/" else PYTHON_OPERATORS[op]
+    result = [
+        f"if {guards}:",
+        f"    return {fast[0]} {python} {fast[1]}",
+        f"return {slow[0]} {python} {slow[1]}",
+    ]
+
+    lines = ["def factory(a_arg, a_fast, b_arg, b_fast, missing, report):"]
+    lines += ["    def typed(env):"]
+    if op == "/":
+        lines += operand_source("b", shapes[1], " " * 8)
+        if shapes[1] == "const":
+            lines += operand_source("a", shapes[0], " " * 8)
+            lines += [" " * 8 + line for line in result]
+        else:
+            lines += ["        if b != 0:"]
+            lines += operand_source("a", shapes[0], " " * 12)
+            lines += [" " * 12 + line for line in result]
+            lines += ['        report("Error: division by zero", "division-by-zero")']
+            lines += ["        return 0"]
+    else:
+        lines += operand_source("a", shapes[0], " " * 8)
+        lines += operand_source("b", shapes[1], " " * 8)
+        lines += [" " * 8 + line for line in result]
+    lines += ["    return typed"]
+
+    namespace = {}
+    exec(  # pylint: disable=W0122
+        compile("\n".join(lines), f"<typed {op}>", "exec"), namespace
+    )
+    factory = TEMPLATES[key] = namespace["factory"]
+    return factory
+
+
+class TypeSpecializer:
+    """
+    Specialization of the arithmetic and comparison operators of the compiler for
+    the types of their operands.
+
+    Before a program or a function body is compiled, the types of its variables are
+    inferred from the int and float literals of the lexer, from the known results of
+    the mathematical functions and, for a function, from the arguments of its first
+    call. An operator whose operands are variables, literals or expressions of a
+    known type is then compiled into a single closure for that combination, which
+    reads variables and literals itself instead of calling a closure for each of
+    them, and converts int literals used with floats once, at compile time. The
+    closure checks the classes of the operands on every run, and computes the
+    generic operation when a prediction is wrong, so the results never change.
+    """
+
+    def __init__(self, compiler):
+        """
+        Initializes a TypeSpecializer.
+
+        :param compiler: The Compiler of the operators.
+        """
+        self.compiler = compiler
+        self.types = None
+        self.cache = {}
+        self.stats = Counter()
+
+    @contextlib.contextmanager
+    def scope(self, statements, seeds=None):
+        """
+        Infers the types of the variables of a program or of a function body for the
+        duration of a `with` block, in which its operators are compiled.
+
+        :param statements: The list of statements.
+        :param seeds: Optional dictionary of variable name to the type of its value
+                      on entry.
+        :return: A context manager.
+        """
+        saved = self.types, self.cache
+        self.types = infer_types(statements, seeds)
+        self.cache = {}
+        try:
+            yield
+        finally:
+            self.types, self.cache = saved
+
+    def type_of(self, node):
+        """
+        Returns the predicted type of an expression in the current scope.
+
+        :param node: The AST node of the expression.
+        :return: The type, as returned by `expression_type`.
+        """
+        return expression_type(node, self.types, self.cache)
+
+    def operand(self, node):
+        """
+        Describes an operand of a specialized operator.
+
+        :param node: The AST node of the operand.
+        :return: A (shape, argument) tuple, where the argument is the name of a
+                 variable, the value of a literal or the compiled closure of an
+                 expression.
+        """
+        if node.__class__ in KINDS:
+            return "const", node
+        if node[0] == "var":
+            return "var", node[1]
+        return "expr", self.compiler.compile(node)
+
+    @staticmethod
+    def converted(shape, argument, kind, other):
+        """
+        Converts an int literal used with a float to a float, which gives the same
+        results, so that the operation runs on two floats.
+
+        :param shape: The shape of the operand.
+        :param argument: The argument of the operand, as returned by `operand`.
+        :param kind: The type of the operand.
+        :param other: The type of the other operand.
+        :return: The argument for the fast path of the closure.
+        """
+        if (
+            shape == "const"
+            and kind is int
+            and other is float
+            and abs(argument) <= EXACT_FLOATS
+        ):
+            return float(argument)
+        return argument
+
+    def compile(self, node):
+        """
+        Compiles a binary operator specialized for the types of its operands.
+
+        :param node: A tuple of the form (op, left, right).
+        :return: The compiled closure, or None if the operator cannot be specialized
+                 in the current scope.
+        """
+        if self.types is None:
+            return None
+        op, left, right = node
+        if left.__class__ in KINDS and right.__class__ in KINDS:
+            return None
+        if op == "/" and right.__class__ in KINDS and right == 0:
+            return None
+        left_kind = self.type_of(left)
+        right_kind = self.type_of(right)
+        if left_kind not in KINDS or right_kind not in KINDS:
+            return None
+
+        left_shape, left_argument = self.operand(left)
+        right_shape, right_argument = self.operand(right)
+        factory = template(op, (left_shape, right_shape), (left_kind, right_kind))
+        self.stats[self.type_of(node).__name__] += 1
+        return factory(
+            left_argument,
+            self.converted(left_shape, left_argument, left_kind, right_kind),
+            right_argument,
+            self.converted(right_shape, right_argument, right_kind, left_kind),
+            self.missing,
+            self.compiler.report,
+        )
+
+    def missing(self, name, env):
+        """
+        Reports a variable that is not defined, from a specialized closure.
+
+        :param name: The name of the variable.
+        :param env: The environment in which the variable was looked up.
+        :return: 0, the value of an undefined variable.
+        """
+        return eval_variable(name, env, self.compiler.report)
+
+    def report(self):
+        """
+        Summarizes the specialized operators.
+
+        :return: A line of text with the number of operators specialized for each
+                 type of result.
+        """
+        total = sum(self.stats.values())
+        kinds = ", ".join(
+            f"{count} {kind}" for kind, count in sorted(self.stats.items())
+        )
+        return f"{total} specialized operators" + (f": {kinds}" if kinds else "")
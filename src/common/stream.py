@@ -0,0 +1,133 @@
+"""Modulo stream."""
+
+import itertools
+
+from .compiler import default_compiler
+from .interpreter import global_env
+from .lexer import functions, reserved, tokens
+from .optimizer import default_optimizer
+from .parser import clone_parser
+from .tokenizer import get_tokenizer
+
+DEPTH_CHANGES = {"LPAREN": 1, "LBRACE": 1, "RPAREN": -1, "RBRACE": -1}
+
+OPERATOR_TOKENS = (
+    set(tokens)
+    - {"NUMBER", "ID", "LPAREN", "RPAREN", "LBRACE", "RBRACE"}
+    - set(reserved.values())
+    - set(functions.values())
+)
+
+CONTINUATION_TOKENS = OPERATOR_TOKENS | {"ELSE", "LBRACE"}
+
+INCOMPLETE_TOKENS = CONTINUATION_TOKENS | {
+    "IF",
+    "WHILE",
+    "DEF",
+    "RETURN",
+    "PRINT",
+    "ELSE",
+    "LPAREN",
+}
+
+
+def continues(statement, line_tokens):
+    """
+    Checks whether a line continues a statement, the way the parser would read it if
+    the whole file was parsed at once.
+
+    :param statement: The tokens of the statement so far.
+    :param line_tokens: The tokens of the next line.
+    :return: True if the line belongs to the same statement.
+    """
+    first = line_tokens[0].type
+    if first in CONTINUATION_TOKENS:
+        return True
+    return first == "LPAREN" and statement[-1].type in ("ID", "PRINT")
+
+
+def split_statements(lines, lexer_instance=None):
+    """
+    Groups the lines of a script into complete top-level statements.
+
+    Each line is tokenized once and the tokens are handed to the parser as they are,
+    so illegal characters are reported only once. A statement ends at the end of a
+    line when all its parentheses and braces are closed, it does not end with an
+    operator or keyword, and the next line does not start with `else`, `{` or a
+    binary operator.
+
+    :param lines: An iterable of source lines, such as an open file.
+    :param lexer_instance: Optional lexer used to tokenize the lines. Defaults to a
+                           clone of the shared Tokenizer.
+    :return: A generator of token lists, one per top-level statement group.
+    """
+    scanner = lexer_instance or get_tokenizer().clone()
+
+    statement = []
+    depth = 0
+
+    for lineno, line in enumerate(lines, 1):
+        scanner.lineno = lineno
+        scanner.input(line)
+        line_tokens = list(iter(scanner.token, None))
+        if not line_tokens:
+            continue
+
+        if statement and depth == 0 and not continues(statement, line_tokens):
+            if statement[-1].type not in INCOMPLETE_TOKENS:
+                yield statement
+                statement = []
+
+        statement.extend(line_tokens)
+        for token in line_tokens:
+            depth = max(0, depth + DEPTH_CHANGES.get(token.type, 0))
+
+    if statement:
+        yield statement
+
+
+def execute_stream(lines, compiler=None, env=None, optimizer=None):
+    """
+    Parses and executes a script statement by statement while it is being read.
+
+    Only the statement being parsed is held in memory, so very large scripts run
+    with flat memory and the first results are available right away. A statement
+    that fails to parse is reported and skipped.
+
+    :param lines: An iterable of source lines, such as an open file.
+    :param compiler: Optional Compiler. Defaults to the one bound to the global
+                     function table.
+    :param env: Optional environment. Defaults to the global environment.
+    :param optimizer: Optional Optimizer applied to every statement. Defaults to
+                      the default optimizer.
+    :return: A generator of (statement, result) tuples.
+    """
+    compiler = default_compiler if compiler is None else compiler
+    env = global_env if env is None else env
+    optimizer = default_optimizer if optimizer is None else optimizer
+    scanner = get_tokenizer().clone()
+    statement_parser = clone_parser()
+
+    for group in split_statements(lines, scanner):
+        program = statement_parser.parse(
+            lexer=scanner,
+            tokenfunc=itertools.chain(group, itertools.repeat(None)).__next__,
+        )
+        if program is None:
+            continue
+        for statement in optimizer.optimize(program[1]):
+            yield statement, compiler.compile(statement)(env)
+
+
+def stream_file(file_path, compiler=None, env=None):
+    """
+    Executes a script file statement by statement, reading it in buffered chunks.
+
+    :param file_path: The path to the file containing code.
+    :param compiler: Optional Compiler. Defaults to the one bound to the global
+                     function table.
+    :param env: Optional environment. Defaults to the global environment.
+    :return: A generator of (statement, result) tuples.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        yield from execute_stream(file, compiler, env)
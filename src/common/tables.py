@@ -0,0 +1,161 @@
+"""Modulo tables."""
+
+import functools
+import hashlib
+import importlib
+import os
+import sys
+import threading
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+GRAMMAR_FILES = ("lexer.py", "parser.py")
+LEXTAB = "lextab"
+PARSETAB = "parsetab"
+HEADER = (
+    "# Generated by `make tables`; do not edit.\n"
+    "# pylint: skip-file\n"
+    "# isort: skip_file\n"
+    "# fmt: off\n"
+)
+
+
+@functools.cache
+def grammar_version():
+    """
+    Returns a hash identifying the grammar and the AST it produces.
+
+    The hash covers the sources of the lexer and the parser, so any change to a
+    token, a rule or a parser action changes it. The Python version is included as
+    well, since it determines the format of serialized ASTs.
+
+    :return: A hexadecimal digest.
+    """
+    digest = hashlib.sha256(repr(sys.version_info[:2]).encode())
+    for name in GRAMMAR_FILES:
+        with open(os.path.join(DIRECTORY, name), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+@functools.cache
+def tables_are_current():
+    """
+    Checks whether the shipped tables were generated from the current grammar.
+
+    :return: True if the lexer table records the current grammar version.
+    """
+    try:
+        lextab = importlib.import_module(f"{__package__}.{LEXTAB}")
+    except ImportError:
+        return False
+    return getattr(lextab, "_grammar_version", None) == grammar_version()
+
+
+def build_lexer(module):
+    """
+    Builds the lexer of a rules module without writing any file.
+
+    When the shipped tables are current, the lexer is loaded from them and the rules
+    are not validated again. Otherwise it is built from the rules.
+
+    :param module: The module defining the tokens and the t_ rules.
+    :return: The lexer.
+    """
+    lex = importlib.import_module("ply.lex")
+    return lex.lex(module=module, optimize=tables_are_current(), lextab=LEXTAB)
+
+
+def build_parser(module):
+    """
+    Builds the parser of a grammar module without writing any file.
+
+    When the shipped tables are current, they are loaded without checking their
+    signature. Otherwise PLY checks the signature and regenerates the tables in
+    memory if needed.
+
+    :param module: The module defining the p_ rules.
+    :return: The parser.
+    """
+    yacc = importlib.import_module("ply.yacc")
+    return yacc.yacc(
+        module=module,
+        debug=False,
+        write_tables=False,
+        optimize=tables_are_current(),
+        tabmodule=PARSETAB,
+        errorlog=yacc.NullLogger(),
+    )
+
+
+class Lazy:
+    """
+    Placeholder for an object that is only built when it is first used.
+
+    Attribute access and iteration are forwarded to the object returned by the
+    factory, which is called once.
+    """
+
+    def __init__(self, factory):
+        """
+        Initializes a Lazy placeholder.
+
+        :param factory: A function without arguments that builds the object.
+        """
+        self.factory = factory
+        self.target = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        """
+        Returns the object, building it on first use.
+
+        :return: The object.
+        """
+        if self.target is None:
+            with self.lock:
+                if self.target is None:
+                    self.target = self.factory()
+        return self.target
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def __iter__(self):
+        return iter(self.get())
+
+
+def write_tables():
+    """
+    Regenerates the lexer and parser tables shipped with the package.
+
+    The lexer table also records the grammar version, which tells the runtime that
+    the tables can be loaded without validation.
+    """
+    for name in (LEXTAB, PARSETAB):
+        path = os.path.join(DIRECTORY, f"{name}.py")
+        if os.path.exists(path):
+            os.remove(path)
+        sys.modules.pop(f"{__package__}.{name}", None)
+    importlib.invalidate_caches()
+
+    lex = importlib.import_module("ply.lex")
+    yacc = importlib.import_module("ply.yacc")
+    lexer_module = importlib.import_module(f"{__package__}.lexer")
+    parser_module = importlib.import_module(f"{__package__}.parser")
+
+    lex.lex(module=lexer_module).writetab(LEXTAB, DIRECTORY)
+    yacc.yacc(
+        module=parser_module,
+        debug=False,
+        tabmodule=PARSETAB,
+        outputdir=DIRECTORY,
+    )
+
+    for name in (LEXTAB, PARSETAB):
+        path = os.path.join(DIRECTORY, f"{name}.py")
+        with open(path, "r", encoding="utf-8") as file:
+            content = file.read()
+        if name == LEXTAB:
+            content += f"_grammar_version = {grammar_version()!r}\n"
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(HEADER + content)
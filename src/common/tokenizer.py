@@ -0,0 +1,172 @@
+"""Modulo tokenizer."""
+
+import functools
+import importlib
+import re
+
+from .lexer import reserved
+from .output import channels
+from .tables import Lazy
+
+LEXER_MODULE = importlib.import_module(f"{__package__}.lexer")
+
+IGNORED_RULES = {"COMMENT_LINE", "COMMENT_BLOCK"}
+
+ERROR = "error"
+
+
+class Token:  # pylint: disable=R0903
+    """
+    Token produced by the Tokenizer, with the attributes of PLY's LexToken.
+    """
+
+    __slots__ = ("type", "value", "lineno", "lexpos", "lexer")
+
+    def __init__(self, kind, value, lineno, lexpos):
+        """
+        Initializes a Token.
+
+        :param kind: The token type.
+        :param value: The value of the token.
+        :param lineno: The line of the token.
+        :param lexpos: The position of the token in the input.
+        """
+        self.type = kind
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+
+    def __repr__(self):
+        return f"LexToken({self.type},{self.value!r},{self.lineno},{self.lexpos})"
+
+
+def master_pattern(module):
+    """
+    Builds the master regular expression of the rules of a lexer module.
+
+    The alternatives are ordered as PLY orders them: the function rules in the
+    order they are defined, then the string rules from the longest to the shortest
+    pattern, so that `<=` is tried before `<`. Any other character matches the
+    error group. Ignored characters before a token are consumed by the same match.
+
+    :param module: The module defining the t_ rules.
+    :return: The compiled regular expression.
+    """
+    functions = []
+    strings = []
+    for name, rule in vars(module).items():
+        if not name.startswith("t_") or name in ("t_ignore", "t_error"):
+            continue
+        if callable(rule):
+            functions.append((rule.__code__.co_firstlineno, name[2:], rule.__doc__))
+        else:
+            strings.append((name[2:], rule))
+    strings.sort(key=lambda item: len(item[1]), reverse=True)
+
+    groups = [f"(?P<{name}>{regex})" for _, name, regex in sorted(functions)]
+    groups += [f"(?P<{name}>{regex})" for name, regex in strings]
+    groups.append(f"(?P<{ERROR}>[\\s\\S])")
+    ignore = f"[{re.escape(module.t_ignore)}]*"
+    return re.compile(f"{ignore}(?:{'|'.join(groups)})?", re.VERBOSE)
+
+
+class Tokenizer:
+    """
+    Tokenizer matching the rules of `lexer.py` with a single precompiled regular
+    expression.
+
+    It produces the same tokens, line numbers, positions and error messages as the
+    PLY lexer, without calling a Python function for every identifier, number,
+    comment and newline, and with the ignored characters consumed by the match of
+    the next token. It has the `input()` and `token()` interface of the PLY lexer,
+    so the parser can use it unchanged. `token` is bound by `input()` to the
+    generator of the tokens, so the parser pulls them without going through a
+    Python method, and the input is read lazily, so memory does not grow with the
+    size of the input.
+    """
+
+    def __init__(self, pattern=None, report=None):
+        """
+        Initializes a Tokenizer.
+
+        :param pattern: The master regular expression. Defaults to the one of
+                        `lexer.py`.
+        :param report: The function used to report illegal characters, called with
+                       the message, the kind of error and the line. Defaults to the
+                       global channels.
+        """
+        self.pattern = master_pattern(LEXER_MODULE) if pattern is None else pattern
+        self.report = channels.report if report is None else report
+        self.lineno = 1
+        self.lexpos = 0
+        self.lexdata = ""
+        self.token = functools.partial(next, iter(()), None)
+
+    def clone(self):
+        """
+        Creates a Tokenizer sharing the master regular expression of this one.
+
+        :return: A new Tokenizer, starting at the current line.
+        """
+        clone = Tokenizer(self.pattern, self.report)
+        clone.lineno = self.lineno
+        return clone
+
+    def input(self, data):
+        """
+        Sets the text to be tokenized, starting at the current line.
+
+        :param data: The source text.
+        """
+        self.lexdata = data
+        self.lexpos = 0
+        self.token = functools.partial(next, self.scan(data), None)
+
+    def __iter__(self):
+        return iter(self.token, None)
+
+    def scan(self, data):
+        """
+        Generates the tokens of a text.
+
+        :param data: The source text.
+        :return: A generator of Tokens. The line number of the Tokenizer is updated
+                 as newlines are read.
+        """
+        ignored = IGNORED_RULES
+        lineno = self.lineno
+        for match in self.pattern.finditer(data):
+            kind = match.lastgroup
+            if kind is None:
+                continue
+            if kind == "ID":
+                value = match.group(kind)
+                yield Token(reserved.get(value, kind), value, lineno, match.start(kind))
+            elif kind == "NUMBER":
+                value = match.group(kind)
+                value = float(value) if "." in value else int(value)
+                yield Token(kind, value, lineno, match.start(kind))
+            elif kind == "newline":
+                lineno = self.lineno = lineno + match.end() - match.start(kind)
+            elif kind == ERROR:
+                self.report(
+                    f"Character illegal '{match.group(kind)}' at line {lineno}.",
+                    "illegal-character",
+                    lineno,
+                )
+            elif kind not in ignored:
+                yield Token(kind, match.group(kind), lineno, match.start(kind))
+        self.lexpos = len(data)
+
+
+def get_tokenizer():
+    """
+    Returns the shared Tokenizer, building its master regular expression on first
+    use. Use `clone()` to get an instance for a parse.
+
+    :return: The Tokenizer.
+    """
+    return tokenizer.get()
+
+
+tokenizer = Lazy(Tokenizer)
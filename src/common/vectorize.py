@@ -0,0 +1,464 @@
+"""Modulo vectorize."""
+
+import importlib
+
+from .interpreter import global_functions, math_functions
+from .output import channels
+
+np = None  # pylint: disable=C0103
+
+UFUNCS = {
+    "sin": "sin",
+    "cos": "cos",
+    "tan": "tan",
+    "exp": "exp",
+    "log": "log",
+    "sqrt": "sqrt",
+    "abs": "abs",
+}
+
+ARITHMETIC_UFUNCS = {
+    "+": "add",
+    "-": "subtract",
+    "*": "multiply",
+}
+
+BOUND_UFUNCS = {
+    "+": "add",
+    "-": "add",
+    "*": "multiply",
+    "^": "power",
+}
+
+INT_BOUND = 2.0**62
+
+COMPARISON_UFUNCS = {
+    "<": "less",
+    ">": "greater",
+    "==": "equal",
+    "!=": "not_equal",
+    "<=": "less_equal",
+    ">=": "greater_equal",
+}
+
+
+class VectorizeError(Exception):
+    """
+    Exception raised when an expression cannot be evaluated in vectorized mode.
+    """
+
+
+def load_numpy():
+    """
+    Imports NumPy on first use, so that it is only loaded by the vectorized mode.
+
+    :raise VectorizeError: If NumPy is not installed.
+    """
+    global np  # pylint: disable=W0603
+    if np is None:
+        try:
+            np = importlib.import_module("numpy")
+        except ImportError as e:
+            raise VectorizeError(
+                "vectorized mode requires numpy to be installed."
+            ) from e
+
+
+class Vectorizer:
+    """
+    Evaluates a parsed expression over whole NumPy arrays of variable bindings.
+
+    Each variable is bound to an array with one element per row, and every operator
+    is lowered to the matching NumPy operation, so the expression is evaluated for
+    all rows in a handful of array operations instead of one `eval_ast` per row.
+
+    While a branch of a conditional is evaluated, `mask` holds the rows that take
+    it, so that divisions and mathematical functions of the other rows neither
+    report errors nor raise warnings.
+    """
+
+    def __init__(self, functions=None):
+        """
+        Initializes a Vectorizer.
+
+        :param functions: The dictionary of user-defined functions that may be inlined.
+                          Defaults to the interpreter's global table.
+        """
+        load_numpy()
+        self.functions = global_functions if functions is None else functions
+        self.division_by_zero = False
+        self.inlining = []
+        self.mask = None
+
+    def evaluate(self, node, bindings):
+        """
+        Evaluates a node for every row of the bindings.
+
+        Programs and blocks may contain assignments, which bind a new array for the
+        following statements, and user-defined functions whose bodies only contain
+        assignments and a final return are inlined.
+
+        :param node: The AST node to be evaluated.
+        :param bindings: A dictionary of variable name to NumPy array.
+        :return: The array (or scalar) result of the last statement.
+        """
+        self.division_by_zero = False
+        self.mask = None
+        env = {name: np.asarray(value) for name, value in bindings.items()}
+        result = self.statement(node, env)
+        if self.division_by_zero:
+            channels.report("Error: division by zero", "division-by-zero")
+        return result
+
+    def statement(self, node, env):
+        """
+        Evaluates a statement, updating the array environment on assignment.
+
+        :param node: The AST node of the statement.
+        :param env: A dictionary of variable name to array.
+        :return: The value of the statement.
+        """
+        if isinstance(node, list):
+            return self.block(node, env)
+
+        op = node[0] if isinstance(node, tuple) else None
+
+        if op in ("program", "block", "parallel"):
+            return self.block(node[1], env)
+        if op == "assign":
+            env[node[1]] = self.expression(node[2], env)
+            return env[node[1]]
+        if op == "return":
+            return self.expression(node[1], env)
+        if op == "if" and len(node) > 3:
+            return self.if_else(node, env)
+        if op in ("print", "def", "while", "if"):
+            raise VectorizeError(f"statement '{op}' cannot be vectorized.")
+
+        return self.expression(node, env)
+
+    def block(self, statements, env):
+        """
+        Evaluates a list of statements, stopping at a return.
+
+        :param statements: A list of AST nodes.
+        :param env: A dictionary of variable name to array.
+        :return: The value of the last statement evaluated.
+        """
+        result = None
+        for stmt in statements:
+            result = self.statement(stmt, env)
+            if returns(stmt):
+                break
+        return result
+
+    def if_else(self, node, env):
+        """
+        Lowers an if-else statement to `np.where`.
+
+        Both blocks are evaluated for every row, each with the rows that take it as
+        the active mask. Variables assigned in the blocks are merged row by row into
+        the environment, and the value of the statement is the value of the block
+        selected for each row.
+
+        :param node: A tuple of the form ("if", condition, block, else_block).
+        :param env: A dictionary of variable name to array.
+        :return: The merged value of the blocks.
+        """
+        if returns(node) != (returns(node[2]) or returns(node[3])) or any(
+            has_return(stmt) and not returns(stmt) for stmt in node[2] + node[3]
+        ):
+            raise VectorizeError("return is only supported at the end of both blocks.")
+
+        condition = self.expression(node[1], env)
+        taken, untaken = self.branches(condition)
+        then_env = dict(env)
+        then = self.masked(taken, self.block, node[2], then_env)
+        else_env = dict(env)
+        otherwise = self.masked(untaken, self.block, node[3], else_env)
+
+        for name in sorted(set(then_env) | set(else_env)):
+            if name in then_env and name in else_env:
+                env[name] = np.where(condition, then_env[name], else_env[name])
+            elif not returns(node):
+                raise VectorizeError(
+                    f"variable '{name}' is only assigned in one branch of an if."
+                )
+
+        if then is None or otherwise is None:
+            return None
+        return np.where(condition, then, otherwise)
+
+    def branches(self, condition):
+        """
+        Splits the active rows by a condition.
+
+        :param condition: The array (or scalar) value of the condition.
+        :return: A (taken, untaken) tuple of boolean masks, of the active rows where
+                 the condition is true and of those where it is false.
+        """
+        condition = np.asarray(condition, dtype=np.bool_)
+        if self.mask is None:
+            return condition, ~condition
+        return self.mask & condition, self.mask & ~condition
+
+    def masked(self, mask, evaluate, *args):
+        """
+        Calls an evaluation function with only some rows active.
+
+        :param mask: The boolean mask of the active rows.
+        :param evaluate: The evaluation function, such as `block` or `expression`.
+        :param args: The arguments of the function.
+        :return: The result of the function.
+        """
+        saved, self.mask = self.mask, mask
+        try:
+            return evaluate(*args)
+        finally:
+            self.mask = saved
+
+    def expression(self, node, env):  # pylint: disable=R0911
+        """
+        Evaluates an expression over arrays.
+
+        :param node: The AST node of the expression.
+        :param env: A dictionary of variable name to array.
+        :return: The resulting array or scalar.
+        """
+        if isinstance(node, (int, float)):
+            return node
+
+        if not isinstance(node, tuple):
+            raise VectorizeError(f"unsupported node {node!r}.")
+
+        op = node[0]
+
+        if op in ARITHMETIC_UFUNCS:
+            return self.arithmetic(
+                op, self.numeric(node[1], env), self.numeric(node[2], env)
+            )
+        if op in COMPARISON_UFUNCS:
+            ufunc = getattr(np, COMPARISON_UFUNCS[op])
+            return ufunc(self.expression(node[1], env), self.expression(node[2], env))
+        if op == "^":
+            return self.power(self.numeric(node[1], env), self.numeric(node[2], env))
+        if op == "/":
+            return self.divide(
+                self.expression(node[1], env), self.expression(node[2], env)
+            )
+        if op == "neg":
+            operand = self.numeric(node[1], env)
+            if np.asarray(operand).dtype.kind in "iu":
+                return self.arithmetic("-", 0, operand)
+            return np.negative(operand)
+        if op == "var":
+            if node[1] not in env:
+                raise VectorizeError(f"variable '{node[1]}' is not bound.")
+            return env[node[1]]
+        if op == "call":
+            args = [self.expression(arg, env) for arg in node[2]]
+            return self.call(node[1], args, env)
+        if op == "if-else":
+            condition = self.expression(node[1], env)
+            taken, untaken = self.branches(condition)
+            return np.where(
+                condition,
+                self.masked(taken, self.expression, node[2], env),
+                self.masked(untaken, self.expression, node[3], env),
+            )
+
+        raise VectorizeError(f"operator '{op}' cannot be vectorized.")
+
+    def numeric(self, node, env):
+        """
+        Evaluates an operand of an arithmetic operator, turning booleans into integers
+        so that arithmetic on comparisons matches Python.
+
+        :param node: The AST node of the operand.
+        :param env: A dictionary of variable name to array.
+        :return: The operand as a numeric array or scalar.
+        """
+        value = self.expression(node, env)
+        if np.asarray(value).dtype == np.bool_:
+            return np.asarray(value, dtype=np.int64)
+        return value
+
+    @staticmethod
+    def arithmetic(op, left, right):
+        """
+        Applies `+`, `-`, `*` or `^` element-wise. When both operands are integers
+        and the result could exceed 64 bits, as estimated with floats, it is
+        computed with Python integers in an object array, so it never wraps around
+        and matches `eval_ast` exactly.
+
+        :param op: The operator.
+        :param left: The left operand array or scalar.
+        :param right: The right operand array or scalar.
+        :return: The resulting array.
+        """
+        ufunc = np.power if op == "^" else getattr(np, ARITHMETIC_UFUNCS[op])
+        left_array = np.asarray(left)
+        right_array = np.asarray(right)
+        if left_array.dtype.kind in "iu" and right_array.dtype.kind in "iu":
+            with np.errstate(over="ignore"):
+                bound = getattr(np, BOUND_UFUNCS[op])(
+                    np.abs(left_array, dtype=np.float64),
+                    np.abs(right_array, dtype=np.float64),
+                )
+            if np.any(bound >= INT_BOUND):
+                return ufunc(left_array.astype(object), right_array.astype(object))
+        return ufunc(left, right)
+
+    def power(self, base, exponent):
+        """
+        Raises to a power element-wise, using floats for negative integer exponents
+        like Python's `**`.
+
+        :param base: The base array or scalar.
+        :param exponent: The exponent array or scalar.
+        :return: The resulting array.
+        """
+        exponent_array = np.asarray(exponent)
+        if exponent_array.dtype.kind in "iu" and np.any(exponent_array < 0):
+            return np.power(np.asarray(base, dtype=np.float64), exponent)
+        return self.arithmetic("^", base, exponent)
+
+    def divide(self, left, right):
+        """
+        Divides element-wise, giving 0 wherever the divisor is zero like `eval_ast`.
+        The error is only reported for the active rows.
+
+        :param left: The dividend array or scalar.
+        :param right: The divisor array or scalar.
+        :return: The quotient array.
+        """
+        zero = np.equal(right, 0)
+        active = zero if self.mask is None else zero & self.mask
+        if np.any(active):
+            self.division_by_zero = True
+        with np.errstate(divide="ignore", invalid="ignore"):
+            quotient = np.true_divide(left, np.where(zero, 1, right))
+        return np.where(zero, 0, quotient)
+
+    def ufunc(self, name, args):
+        """
+        Applies a mathematical function to the active rows, so that the other rows
+        raise no warning for values out of its domain. Integers too large for 64
+        bits are converted to floats, like the `math` module does. A value of an
+        active row out of the domain or range of the function raises the error of
+        the `math` function, as in `eval_ast`.
+
+        :param name: The name of the function.
+        :param args: The evaluated argument arrays.
+        :return: The resulting array, with zeros in the inactive rows.
+        :raises ValueError: If a value is out of the domain of the function.
+        :raises OverflowError: If a result is too large.
+        """
+        if len(args) != 1:
+            raise VectorizeError(
+                f"function '{name}' expects 1 argument, but {len(args)} were provided."
+            )
+        function = getattr(np, UFUNCS[name])
+        value = np.asarray(args[0])
+        if value.dtype == object and name != "abs":
+            value = value.astype(np.float64)
+        try:
+            with np.errstate(invalid="raise", divide="raise", over="raise"):
+                if self.mask is None:
+                    return function(value)
+                shape = np.broadcast_shapes(value.shape, self.mask.shape)
+                dtype = function(np.zeros(0, dtype=value.dtype)).dtype
+                return function(
+                    value, out=np.zeros(shape, dtype=dtype), where=self.mask
+                )
+        except FloatingPointError:
+            rows = value if self.mask is None else np.broadcast_to(value, shape)
+            if self.mask is not None:
+                rows = rows[np.broadcast_to(self.mask, shape)]
+            for item in np.ravel(rows):
+                math_functions[name](item.item())
+            raise
+
+    def call(self, name, args, env=None):
+        """
+        Applies a mathematical function as a ufunc, or inlines a user-defined function.
+        Since variables are dynamically scoped, an inlined body sees the variables of
+        the caller, with its parameters bound to the arguments.
+
+        :param name: The name of the function.
+        :param args: The evaluated argument arrays.
+        :param env: The environment of the caller.
+        :return: The resulting array.
+        """
+        if name in UFUNCS:
+            return self.ufunc(name, args)
+
+        if name not in self.functions:
+            raise VectorizeError(f"function '{name}' is not defined.")
+
+        if name in self.inlining:
+            raise VectorizeError(f"recursive function '{name}' cannot be vectorized.")
+
+        params, body = self.functions[name]
+        if len(params) != len(args):
+            raise VectorizeError(
+                f"function '{name}' expects {len(params)} arguments, but {len(args)} were provided."
+            )
+
+        self.inlining.append(name)
+        try:
+            return self.block(body, {**(env or {}), **dict(zip(params, args))})
+        finally:
+            self.inlining.pop()
+
+
+def has_return(node):
+    """
+    Checks whether a statement contains a return statement.
+
+    :param node: The AST node of the statement.
+    :return: True if a return statement is found.
+    """
+    if isinstance(node, list):
+        return any(has_return(stmt) for stmt in node)
+    if isinstance(node, tuple) and node:
+        if node[0] == "return":
+            return True
+        if node[0] == "parallel":
+            return has_return(node[1])
+        if node[0] in ("if", "while", "block"):
+            return any(
+                has_return(child) for child in node[2:] if isinstance(child, list)
+            )
+    return False
+
+
+def returns(node):
+    """
+    Checks whether a statement always ends in a return statement.
+
+    :param node: The AST node of the statement, or a list of statements.
+    :return: True if every path through the statement returns.
+    """
+    if isinstance(node, list):
+        return bool(node) and returns(node[-1])
+    if isinstance(node, tuple) and node:
+        if node[0] == "return":
+            return True
+        if node[0] == "if" and len(node) > 3:
+            return returns(node[2]) and returns(node[3])
+        if node[0] == "parallel":
+            return returns(node[1])
+    return False
+
+
+def eval_vectorized(node, bindings, functions=None):
+    """
+    Evaluates a parsed expression for every row of an array of variable bindings.
+
+    :param node: The AST node to be evaluated.
+    :param bindings: A dictionary of variable name to NumPy array (or sequence).
+    :param functions: Optional dictionary of user-defined functions to inline.
+    :return: The array of results, one element per row.
+    """
+    return Vectorizer(functions).evaluate(node, bindings)
@@ -1,15 +1,185 @@
 """Main module."""
 
+import argparse
+import contextlib
+import functools
+import json
 import os
+import sys
 
-from .common import eval_ast, parser, print_ast
+from .common import (
+    eval_ast,
+    optimize_ast,
+    parse_cached,
+    print_ast,
+    run_compiled,
+    run_stack,
+)
+from .common.batch import collect_scripts, run_batch
+from .common.budget import Budget, BudgetCompiler, BudgetExceeded, run_budgeted
+from .common.optimizer import default_optimizer
+from .common.output import BufferedSink, Diagnostics, channels, redirect
+from .common.parallel import Parallel
+from .common.profiler import profile_source
+from .common.reactive import Reactive
+from .common.server import DEFAULT_TIMEOUT, run_server
+from .common.snapshot import SnapshotError, load_snapshot, warm_start
+from .common.stream import stream_file
 
+ENGINES = {"compiled": run_compiled, "tree": eval_ast, "stack": run_stack}
 
-def process_file(file_path):
+
+def select_engine(
+    compiled=True, engine=None, budget=None, reactive=None, parallel=None
+):
+    """
+    Returns the function used to evaluate ASTs.
+
+    :param compiled: Whether to evaluate with the closure compiler instead of `eval_ast`.
+    :param engine: Optional name of an engine of ENGINES, which takes precedence.
+    :param budget: Optional Budget, enforced by the closure compiler, which then
+                   takes precedence over the engine.
+    :param reactive: Optional Reactive session, which takes precedence over the
+                     engine. With a budget, its compiler must be a BudgetCompiler
+                     enforcing it.
+    :param parallel: Optional Parallel session, which takes precedence over the
+                     engine and cannot be combined with a budget.
+    :return: The evaluation function.
+    :raises ValueError: If both a budget and a Parallel session are given.
+    """
+    if reactive is not None:
+        if budget is not None:
+            return functools.partial(run_started, reactive.run, budget)
+        return reactive.run
+    if parallel is not None:
+        if budget is not None:
+            raise ValueError("a Parallel session cannot enforce a Budget.")
+        return parallel.run
+    if budget is not None:
+        return functools.partial(run_budgeted, budget=budget)
+    if engine is not None:
+        return ENGINES[engine]
+    return run_compiled if compiled else eval_ast
+
+
+def run_started(evaluate, budget, ast):
+    """
+    Resets the consumed resources of a Budget, then evaluates an AST.
+
+    :param evaluate: The evaluation function, whose compiler enforces the budget.
+    :param budget: The Budget.
+    :param ast: The root node of the AST to be evaluated.
+    :return: The result of the evaluation.
+    """
+    budget.start()
+    return evaluate(ast)
+
+
+def run_flushed(evaluate, ast):
+    """
+    Evaluates an AST and flushes the buffered output, so that it is shown before
+    the messages printed afterwards.
+
+    :param evaluate: The evaluation function.
+    :param ast: The AST to be evaluated.
+    :return: The result of the evaluation.
+    """
+    try:
+        return evaluate(ast)
+    finally:
+        channels.flush()
+
+
+def show_ast(ast, label="AST"):
+    """
+    Prints an AST, unless it is nested too deeply to be converted to a string.
+
+    :param ast: The AST to be printed.
+    :param label: The label printed before the AST.
+    """
+    try:
+        print(f"{label}:", print_ast(ast))
+    except RecursionError:
+        print(f"{label}: (nested too deeply to be printed)")
+
+
+def parse_shown(source, show_optimized=False):
+    """
+    Parses and optimizes a source text, printing the parsed AST and, on request,
+    the optimized one.
+
+    :param source: The source text.
+    :param show_optimized: Whether to print the optimized AST as well.
+    :return: The optimized AST, or None if the source could not be parsed.
+    """
+    ast = parse_cached(source)
+    if ast is None:
+        return None
+    show_ast(ast)
+    optimized = optimize_ast(ast)
+    if show_optimized:
+        show_ast(optimized, "Optimized AST")
+    return optimized
+
+
+def show_recomputed(reactive):
+    """
+    Prints the variables recomputed by the last run of a Reactive session.
+
+    :param reactive: The Reactive session, or None.
+    """
+    if reactive is not None and reactive.recomputed:
+        print("Recomputed:", ", ".join(reactive.recomputed))
+
+
+def run_profiled(source, collapsed=None):
+    """
+    Runs a source text under the profiler and prints the ranked report.
+
+    :param source: The source text.
+    :param collapsed: Optional path of a file receiving the collapsed stacks, for
+                      flamegraph tools.
+    :return: The result of the program.
+    """
+    profiled = profile_source(source)
+    channels.flush()
+    if profiled is None:
+        return None
+    ast, result, profiler = profiled
+    show_ast(ast)
+    print(profiler.report())
+    if collapsed is not None:
+        profiler.write_collapsed(collapsed)
+        print(f"Collapsed stacks written to '{collapsed}'.")
+    return result
+
+
+def process_file(  # pylint: disable=R0913,R0917
+    file_path,
+    compiled=True,
+    engine=None,
+    profile=False,
+    collapsed=None,
+    budget=None,
+    reactive=None,
+    parallel=None,
+    show_optimized=False,
+):
     """
     Reads a file and processes it as a whole block.
 
     :param file_path: The path to the file containing code.
+    :param compiled: Whether to evaluate with the closure compiler instead of `eval_ast`.
+    :param engine: Optional name of the evaluation engine, which takes precedence.
+    :param profile: Whether to run the file under the profiler.
+    :param collapsed: Optional path of the collapsed stacks written when profiling.
+    :param budget: Optional Budget limiting the evaluation, which then runs on the
+                   closure compiler.
+    :param reactive: Optional Reactive session recomputing the dependent
+                     assignments.
+    :param parallel: Optional Parallel session running independent statements in
+                     worker processes.
+    :param show_optimized: Whether to print the optimized AST after the parsed one.
     :return: None
     """
     try:
@@ -21,66 +191,403 @@ def process_file(file_path):
             return
 
         try:
-            asts = parser.parse(content)
-            if isinstance(asts, list):
-                for ast in asts:
-                    if ast is not None:
-                        print("AST:", print_ast(ast))
-            else:
-                if asts is not None:
-                    print("AST:", print_ast(asts))
-                    eval_ast(asts)
+            if profile:
+                run_profiled(content, collapsed)
+                return
+            ast = parse_shown(content, show_optimized)
+            if ast is not None:
+                evaluate = select_engine(compiled, engine, budget, reactive, parallel)
+                run_flushed(evaluate, ast)
+                show_recomputed(reactive)
+        except BudgetExceeded as e:
+            print(f"Budget error: {e}")
         except SyntaxError as e:
             print(f"Syntax error: {e}")
         except ValueError as e:
             print(f"Value error: {e}")
+        except RecursionError as e:
+            print(f"Recursion error: {e}. Use --engine stack for deep recursion.")
 
     except FileNotFoundError:
         print(f"Error: The file '{file_path}' was not found.")
 
 
-def process_input(input_line):
+def process_input(  # pylint: disable=R0913,R0917
+    input_line,
+    compiled=True,
+    engine=None,
+    profile=False,
+    collapsed=None,
+    budget=None,
+    reactive=None,
+    parallel=None,
+    show_optimized=False,
+):
     """
     Process a single input line directly (for interactive input).
 
     :param input_line: The input expression to be processed.
+    :param compiled: Whether to evaluate with the closure compiler instead of `eval_ast`.
+    :param engine: Optional name of the evaluation engine, which takes precedence.
+    :param profile: Whether to run the expression under the profiler.
+    :param collapsed: Optional path of the collapsed stacks written when profiling.
+    :param budget: Optional Budget limiting the evaluation, which then runs on the
+                   closure compiler.
+    :param reactive: Optional Reactive session recomputing the dependent
+                     assignments.
+    :param parallel: Optional Parallel session running independent statements in
+                     worker processes.
+    :param show_optimized: Whether to print the optimized AST after the parsed one.
     :return: None
     """
     try:
-        ast = parser.parse(input_line.strip())
+        if profile:
+            print("Result:", run_profiled(input_line.strip(), collapsed))
+            return
+        ast = parse_shown(input_line.strip(), show_optimized)
         if ast is not None:
-            print("AST:", print_ast(ast))
-            result = eval_ast(ast)
+            evaluate = select_engine(compiled, engine, budget, reactive, parallel)
+            result = run_flushed(evaluate, ast)
+            show_recomputed(reactive)
             print("Result:", result)
+    except BudgetExceeded as e:
+        print(f"Budget error: {e}")
     except SyntaxError as e:
         print(f"Syntax error: {e}")
     except ValueError as e:
         print(f"Value error: {e}")
+    except RecursionError as e:
+        print(f"Recursion error: {e}. Use --engine stack for deep recursion.")
+
 
+def process_stream(file_path):
+    """
+    Executes a file statement by statement while it is being read, so that output
+    starts right away and memory stays flat on very large scripts.
 
-def main():
+    :param file_path: The path to the file containing code.
+    :return: None
+    """
+    try:
+        for _ in stream_file(file_path):
+            pass
+    except FileNotFoundError:
+        print(f"Error: The file '{file_path}' was not found.")
+    except ValueError as e:
+        print(f"Value error: {e}")
+    finally:
+        channels.flush()
+
+
+def run_source(source):
+    """
+    Parses, optimizes and evaluates a source text in the global session.
+
+    :param source: The source text.
+    :return: The result of the evaluation, or None if the source could not be parsed.
+    """
+    ast = optimize_ast(parse_cached(source))
+    if ast is None:
+        return None
+    return run_flushed(run_compiled, ast)
+
+
+def start_session(prelude=None, snapshot=None):
+    """
+    Runs a prelude file before the session starts, or loads the session from a
+    snapshot. With both, the snapshot is loaded if it was saved from the current
+    prelude; otherwise the prelude is run and the snapshot saved again.
+
+    :param prelude: Optional path of a file with definitions to run first.
+    :param snapshot: Optional path of the snapshot file.
+    :return: None
+    """
+    try:
+        if prelude is None:
+            load_snapshot(snapshot)
+            print(f"Snapshot '{snapshot}' loaded.")
+            return
+
+        with open(prelude, "r", encoding="utf-8") as file:
+            source = file.read()
+        if snapshot is None:
+            run_source(source)
+        elif warm_start(snapshot, source, run_source):
+            print(f"Prelude loaded from snapshot '{snapshot}'.")
+        else:
+            print(f"Prelude run and saved to snapshot '{snapshot}'.")
+    except FileNotFoundError as e:
+        print(f"Error: The file '{e.filename}' was not found.")
+    except SnapshotError as e:
+        print(f"Snapshot error: {e}")
+
+
+def process_batch(target, workers=None, report=None):
+    """
+    Runs every script matching a directory or glob pattern on a pool of processes
+    and writes a JSON report with the results, output, errors and timings.
+
+    :param target: A directory or a glob pattern such as `examples/*.txt`.
+    :param workers: The number of worker processes. Defaults to the number of CPUs.
+    :param report: Optional path of the report file. Defaults to standard output.
+    :return: None
+    """
+    paths = collect_scripts(target)
+    if not paths:
+        print(f"Error: no scripts found for '{target}'.")
+        return
+
+    result = json.dumps(run_batch(paths, workers=workers), indent=2)
+
+    if report is None:
+        print(result)
+    else:
+        with open(report, "w", encoding="utf-8") as file:
+            file.write(result + "\n")
+
+
+def parse_arguments(argv=None):
+    """
+    Parses the command line arguments.
+
+    :param argv: Optional list of arguments. Defaults to sys.argv.
+    :return: The parsed arguments.
+    """
+    arg_parser = argparse.ArgumentParser(description="Simple interpreter with PLY.")
+    arg_parser.add_argument(
+        "--batch",
+        metavar="PATH",
+        help="run every script of a directory or glob pattern and print a JSON report",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of worker processes used by --batch, --serve and --parallel",
+    )
+    arg_parser.add_argument(
+        "--report", metavar="FILE", help="write the --batch report to a file"
+    )
+    arg_parser.add_argument(
+        "--stream",
+        metavar="FILE",
+        help="execute a file statement by statement while reading it",
+    )
+    arg_parser.add_argument(
+        "--engine",
+        choices=sorted(ENGINES),
+        help="evaluation engine; 'stack' supports very deep recursion and nesting",
+    )
+    arg_parser.add_argument(
+        "--no-optimize",
+        action="store_true",
+        help="evaluate the AST as parsed, without constant folding",
+    )
+    arg_parser.add_argument(
+        "--show-optimized",
+        action="store_true",
+        help="print the optimized AST after the parsed one, and the number of "
+        "nodes removed on exit",
+    )
+    arg_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="run under the profiler and print a report of operations, functions "
+        "and loops",
+    )
+    arg_parser.add_argument(
+        "--collapsed",
+        metavar="FILE",
+        help="with --profile, write collapsed stacks for flamegraph tools to a file",
+    )
+    arg_parser.add_argument(
+        "--serve",
+        metavar="ADDRESS",
+        help="serve JSON-lines evaluation requests on HOST:PORT, PORT or unix:PATH",
+    )
+    arg_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="default and maximum deadline of a --serve request, in seconds",
+    )
+    arg_parser.add_argument(
+        "--max-steps",
+        type=int,
+        help="maximum number of loop iterations and function calls of an evaluation",
+    )
+    arg_parser.add_argument(
+        "--max-time", type=float, help="maximum wall time of an evaluation, in seconds"
+    )
+    arg_parser.add_argument(
+        "--max-depth", type=int, help="maximum depth of nested function calls"
+    )
+    arg_parser.add_argument(
+        "--max-int-bits", type=int, help="maximum size of integers, in bits"
+    )
+    arg_parser.add_argument(
+        "--reactive",
+        action="store_true",
+        help="recompute the assignments that depend on a changed variable or "
+        "function",
+    )
+    arg_parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="run independent pure top-level statements in worker processes "
+        "(not with the --max-* limits)",
+    )
+    arg_parser.add_argument(
+        "--prelude",
+        metavar="FILE",
+        help="run a file of definitions before the session starts",
+    )
+    arg_parser.add_argument(
+        "--snapshot",
+        metavar="FILE",
+        help="load the session from a snapshot file; with --prelude, save the "
+        "prelude state there and reuse it while the prelude is unchanged",
+    )
+    arg_parser.add_argument(
+        "--buffer-output",
+        type=int,
+        metavar="SIZE",
+        help="buffer printed values and write them in batches of SIZE characters",
+    )
+    arg_parser.add_argument(
+        "--diagnostics",
+        metavar="FILE",
+        help="write error messages as JSON lines to a file ('-' for standard error) "
+        "instead of printing them",
+    )
+    args = arg_parser.parse_args(argv)
+    limits = (args.max_steps, args.max_time, args.max_depth, args.max_int_bits)
+    if args.parallel and any(limit is not None for limit in limits):
+        arg_parser.error("--parallel cannot be combined with the --max-* limits")
+    return args
+
+
+def budget_from_arguments(args):
+    """
+    Builds the Budget given by the --max-* arguments.
+
+    :param args: The parsed arguments.
+    :return: A Budget, or None if no limit was given.
+    """
+    limits = {
+        "steps": args.max_steps,
+        "seconds": args.max_time,
+        "depth": args.max_depth,
+        "int_bits": args.max_int_bits,
+    }
+    if all(limit is None for limit in limits.values()):
+        return None
+    return Budget(**limits)
+
+
+@contextlib.contextmanager
+def output_channels(args):
+    """
+    Redirects the printed values and the error messages as given by the
+    --buffer-output and --diagnostics arguments.
+
+    :param args: The parsed arguments.
+    :return: A context manager restoring the channels when the program ends.
+    """
+    with contextlib.ExitStack() as stack:
+        output = None
+        if args.buffer_output:
+            output = stack.enter_context(BufferedSink(flush_size=args.buffer_output))
+        diagnostics = None
+        if args.diagnostics == "-":
+            diagnostics = Diagnostics(sys.stderr)
+        elif args.diagnostics:
+            diagnostics = Diagnostics(
+                stack.enter_context(
+                    open(args.diagnostics, "w", encoding="utf-8", buffering=1)
+                )
+            )
+        with redirect(output, diagnostics):
+            yield
+
+
+def main(argv=None):
     """
     Entry point of the application.
 
     The program will either process user input interactively or from a file,
-    depending on what the user provides.
+    depending on what the user provides. With --batch, it runs a directory of
+    scripts instead and exits.
+
+    :param argv: Optional list of command line arguments.
     """
-    print("Enter 'exit' to quit.")
-    while True:
-        input_line = input("cmd > ").strip()
+    args = parse_arguments(argv)
+    if args.no_optimize:
+        default_optimizer.enabled = False
 
-        if input_line.lower() == "exit":
-            print("Exiting the program.")
-            break
+    if args.batch:
+        process_batch(args.batch, workers=args.workers, report=args.report)
+        return
 
-        if os.path.isfile(input_line):
-            print(f"Processing file: {input_line}")
-            process_file(input_line)
+    with output_channels(args):
+        if args.prelude or args.snapshot:
+            start_session(args.prelude, args.snapshot)
 
-        else:
-            print(f"Processing expression: {input_line}")
-            process_input(input_line)
+        if args.stream:
+            process_stream(args.stream)
+            return
+
+        budget = budget_from_arguments(args)
+        reactive = None
+        if args.reactive:
+            compiler = None if budget is None else BudgetCompiler(budget)
+            reactive = Reactive(compiler=compiler)
+        parallel = Parallel(workers=args.workers) if args.parallel else None
+
+        if args.serve:
+            run_server(
+                args.serve, workers=args.workers, timeout=args.timeout, budget=budget
+            )
+            return
+
+        print("Enter 'exit' to quit.")
+        while True:
+            input_line = input("cmd > ").strip()
+
+            if input_line.lower() == "exit":
+                if args.show_optimized and default_optimizer.enabled:
+                    print(f"Optimizer: {default_optimizer.removed} nodes removed.")
+                if parallel is not None:
+                    print(f"Parallel: {parallel.offloaded} statements offloaded.")
+                    parallel.close()
+                print("Exiting the program.")
+                break
+
+            if os.path.isfile(input_line):
+                print(f"Processing file: {input_line}")
+                process_file(
+                    input_line,
+                    engine=args.engine,
+                    profile=args.profile,
+                    collapsed=args.collapsed,
+                    budget=budget,
+                    reactive=reactive,
+                    parallel=parallel,
+                    show_optimized=args.show_optimized,
+                )
+
+            else:
+                print(f"Processing expression: {input_line}")
+                process_input(
+                    input_line,
+                    engine=args.engine,
+                    profile=args.profile,
+                    collapsed=args.collapsed,
+                    budget=budget,
+                    reactive=reactive,
+                    parallel=parallel,
+                    show_optimized=args.show_optimized,
+                )
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,82 @@
+"""Modulo test_engines."""
+
+import copy
+import glob
+import os
+import unittest
+
+from src.common import Compiler, Machine, Optimizer, capture, eval_ast
+from src.common.interpreter import global_env, global_functions
+from src.common.parser import clone_parser
+from src.common.tokenizer import get_tokenizer
+
+EXAMPLES = sorted(
+    glob.glob(os.path.join(os.path.dirname(__file__), "..", "examples", "*.txt"))
+)
+
+ENGINES = {
+    "tree": lambda ast: eval_ast(ast, global_env),
+    "compiled": lambda ast: Compiler(global_functions).compile(ast)(global_env),
+    "compiled-plain": lambda ast: Compiler(
+        global_functions,
+        jit=False,
+        memoize=False,
+        loops=False,
+        cse=False,
+        specialize=False,
+    ).compile(ast)(global_env),
+    "stack": lambda ast: Machine(global_functions).run(ast, global_env),
+}
+
+
+def run(source, engine, optimize):
+    """
+    Parses and evaluates a script with an engine, starting from empty globals.
+
+    :param source: The source text of the script.
+    :param engine: The name of an engine of ENGINES.
+    :param optimize: Whether the AST is optimized before being evaluated.
+    :return: A tuple with the printed values, the error messages and the result.
+    """
+    global_env.clear()
+    global_functions.clear()
+    with capture() as channels:
+        lexer = get_tokenizer().clone()
+        lexer.lineno = 1
+        ast = clone_parser().parse(source, lexer=lexer)
+        if optimize:
+            ast = Optimizer().optimize(copy.deepcopy(ast))
+        result = ENGINES[engine](ast)
+    messages = [diagnostic.message for diagnostic in channels.diagnostics]
+    return channels.output.values, messages, result
+
+
+class EngineTest(unittest.TestCase):
+    """
+    Checks that every engine prints the same values, reports the same errors and
+    returns the same result as `eval_ast` on the example scripts.
+    """
+
+    def tearDown(self):
+        global_env.clear()
+        global_functions.clear()
+
+    def test_examples(self):
+        """
+        Runs every example with every engine, with and without the AST optimizer.
+        """
+        self.assertTrue(EXAMPLES)
+        for path in EXAMPLES:
+            with open(path, "r", encoding="utf-8") as file:
+                source = file.read()
+            expected = run(source, "tree", optimize=False)
+            for engine in ENGINES:
+                for optimize in (False, True):
+                    with self.subTest(
+                        example=os.path.basename(path), engine=engine, optimize=optimize
+                    ):
+                        self.assertEqual(run(source, engine, optimize), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()